@@ -1,5 +1,5 @@
 import sqlite3
-from typing import Iterable, Sequence, Optional
+from typing import Sequence, Optional, Union
 from .datatypes import get_datatypes
 
 
@@ -12,8 +12,8 @@ class DataModel:
             cur = self._db.cursor()
             cur.execute(query)
 
-    def create_table(self, name, columns: Sequence[str], dtypes: Optional[Sequence[type]] = None):
-        assert len(columns) == len(dtypes)
+    def create_table(self, name, columns: Sequence[str], dtypes: Optional[Sequence[Union[str, type]]] = None):
+        assert dtypes is None or len(columns) == len(dtypes)
         # TODO sanitize column and keep the corresponding values in labels attributes
         query = 'CREATE TABLE IF NOT EXISTS {}({})'
         if dtypes is None:
@@ -22,3 +22,11 @@ class DataModel:
             col_query = ', '.join([col + ' ' + get_datatypes(dtype) for col, dtype in zip(columns, dtypes)])
         query = query.format(name, col_query)
         self._execute(query)
+
+    def insert_table(self, name, table):
+        """Insert all rows of a MappedTable, creating the table if needed. Can be used as a TableBuilder sink."""
+        columns = [str(col) for col in table.columns]
+        self.create_table(name, columns, dtypes=table.dtypes.values())
+        query = 'INSERT INTO {}({}) VALUES ({})'.format(name, ', '.join(columns), ', '.join('?' * len(columns)))
+        with self._db:
+            self._db.executemany(query, zip(*table.column_values))
@@ -1,12 +1,2 @@
-import six
-
-
-def get_datatypes(dtype):
-    if isinstance(dtype, float):
-        return 'REAL'
-    elif isinstance(dtype, six.integer_types):
-        return 'INTEGER'
-    elif isinstance(dtype, six.string_types):
-        return 'TEXT'
-    else:
-        return 'NONE'
+# the SQLite column types are mapped by the dtypes of table, which does not depend on this package
+from table.dtypes import SQLITE_TYPES, sqlite_type as get_datatypes
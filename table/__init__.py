@@ -1,3 +1,12 @@
-from .api import read_excel, concat, merge
+from .api import read_excel, read_excel_many, aread_excel, concat, merge, merge_asof
 from .mapped_table import MappedTable
 from .mapped_sequence import MappedSequence
+from .builder import TableBuilder
+from .partitioned import PartitionedTable
+from .profiling import profile
+from .writers import to_csv, to_excel, to_sqlite
+from .readers import read_csv
+from .registry import read, write, register_reader, register_writer
+from .groupby import GroupBy
+from .multi_index import MultiIndex
+from .views import GroupView, PivotView
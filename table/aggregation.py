@@ -1,17 +1,218 @@
-from typing import Union, Any, Callable
-from statistics import mean, stdev
+from abc import ABC, abstractmethod
+from typing import Union, Any, Callable, Iterable, Optional
+from math import fsum
 from functools import partial
 from .mapped_sequence import MappedSequence
+from .dtypes import NUMERIC, OBJECT, INT, FLOAT
 
 
-def _aggregate(agg_func: Callable, x: Union[MappedSequence, Any]):
-    if len(x) > 1:
-        keys = x.where(lambda x: x is not None)
-        x = x[keys]
-        return agg_func(x)
-    else:
-        return x
+def _aggregate(agg_func: Callable, x: Union[MappedSequence, Iterable[Any]], min_count: int = 1):
+    """Apply agg_func on the values of x that are not None, or return None if there are less than min_count values"""
+    values = [value for value in x if value is not None]
+    if len(values) < min_count:
+        return None
+    return agg_func(values)
 
 
-mean_aggregate = partial(_aggregate, mean)
-std_aggregate = partial(_aggregate, stdev)
+# statistics is only imported when these aggregations are first used, as it is slow to import
+def _mean(values):
+    from statistics import mean
+    return mean(values)
+
+
+def _stdev(values):
+    from statistics import stdev
+    return stdev(values)
+
+
+def _median(values):
+    from statistics import median
+    return median(values)
+
+
+mean_aggregate = partial(_aggregate, _mean)
+std_aggregate = partial(_aggregate, _stdev, min_count=2)
+median_aggregate = partial(_aggregate, _median)
+sum_aggregate = partial(_aggregate, sum, min_count=0)
+count_aggregate = partial(_aggregate, len, min_count=0)
+min_aggregate = partial(_aggregate, min)
+max_aggregate = partial(_aggregate, max)
+
+# aggregations of numeric values only
+NUMERIC_AGGREGATIONS = ('mean', 'std', 'median', 'sum')
+# float arithmetic is faster than the exact one of statistics.mean, at the cost of the last digits
+FAST_AGGREGATIONS = {
+    'mean': partial(_aggregate, lambda values: fsum(values) / len(values)),
+}
+
+AGGREGATIONS = {
+    'mean': mean_aggregate,
+    'std': std_aggregate,
+    'median': median_aggregate,
+    'sum': sum_aggregate,
+    'count': count_aggregate,
+    'min': min_aggregate,
+    'max': max_aggregate,
+}
+
+
+def get_aggregation(agg_func: Union[str, Callable], dtype: Optional[str] = None) -> Callable:
+    """Return the aggregation function corresponding to its name. Callables are returned as is.
+
+    Parameters
+    ----------
+    agg_func: Union[str, Callable]
+        Name of the aggregation or callable
+    dtype: Optional[str]
+        dtype tag of the aggregated values, if known. Numeric aggregations of numeric dtypes use float arithmetic,
+        and numeric aggregations of dtypes that are neither numeric nor object raise a TypeError.
+    """
+    if callable(agg_func):
+        return agg_func
+    assert agg_func in AGGREGATIONS, \
+        'agg_func should be a callable or one of {}, got {} instead'.format(tuple(AGGREGATIONS), agg_func)
+    if dtype is not None and agg_func in NUMERIC_AGGREGATIONS:
+        if dtype in (INT, FLOAT) and agg_func in FAST_AGGREGATIONS:
+            return FAST_AGGREGATIONS[agg_func]
+        elif dtype not in NUMERIC and dtype != OBJECT:
+            raise TypeError('cannot aggregate values of dtype {} with {}'.format(dtype, agg_func))
+    return AGGREGATIONS[agg_func]
+
+
+class Accumulator(ABC):
+    """State of an aggregation updated batch by batch, so that appending rows to a group costs O(batch).
+
+    Values that are None are skipped, like in the aggregations above.
+    """
+
+    __slots__ = []
+
+    @abstractmethod
+    def update(self, values: Iterable[Any]):
+        """Add a batch of values to the state"""
+
+    @abstractmethod
+    def result(self):
+        """Aggregate of all the values added so far"""
+
+
+class SumAccumulator(Accumulator):
+    __slots__ = ['total']
+
+    def __init__(self):
+        self.total = 0
+
+    def update(self, values: Iterable[Any]):
+        self.total += sum([value for value in values if value is not None])
+
+    def result(self):
+        return self.total
+
+
+class CountAccumulator(Accumulator):
+    __slots__ = ['count']
+
+    def __init__(self):
+        self.count = 0
+
+    def update(self, values: Iterable[Any]):
+        self.count += sum([value is not None for value in values])
+
+    def result(self):
+        return self.count
+
+
+class MomentsAccumulator(Accumulator):
+    """Count, mean and sum of squared deviations of the values, merged batch by batch with Welford's update, which
+    stays accurate when the variance is small compared to the mean"""
+
+    __slots__ = ['count', 'mean', 'm2', 'std']
+
+    def __init__(self, std: bool = False):
+        self.count = 0
+        self.mean = 0.
+        self.m2 = 0.
+        # result is the sample standard deviation instead of the mean
+        self.std = std
+
+    def update(self, values: Iterable[Any]):
+        values = [value for value in values if value is not None]
+        count = len(values)
+        if count == 0:
+            return
+        mean = fsum(values) / count
+        m2 = fsum([(value - mean) ** 2 for value in values])
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+    def result(self):
+        if self.std:
+            return (self.m2 / (self.count - 1)) ** 0.5 if self.count >= 2 else None
+        return self.mean if self.count else None
+
+
+class ExtremumAccumulator(Accumulator):
+    __slots__ = ['func', 'value']
+
+    def __init__(self, func: Callable):
+        # min or max
+        self.func = func
+        self.value = None
+
+    def update(self, values: Iterable[Any]):
+        values = [value for value in values if value is not None]
+        if values:
+            extremum = self.func(values)
+            self.value = extremum if self.value is None else self.func(self.value, extremum)
+
+    def result(self):
+        return self.value
+
+
+class ValuesAccumulator(Accumulator):
+    """Fallback of the aggregations that cannot be updated from a summary, such as the median: all values are kept
+    and the aggregation is recomputed on the next result after an update"""
+
+    __slots__ = ['agg_func', 'values', '_result', '_stale']
+
+    def __init__(self, agg_func: Callable):
+        self.agg_func = agg_func
+        self.values = []
+        self._result = None
+        self._stale = True
+
+    def update(self, values: Iterable[Any]):
+        self.values.extend(values)
+        self._stale = True
+
+    def result(self):
+        if self._stale:
+            self._result = self.agg_func(self.values)
+            self._stale = False
+        return self._result
+
+
+# aggregations that can be updated from a summary of the values
+ACCUMULATORS = {
+    'sum': SumAccumulator,
+    'count': CountAccumulator,
+    'mean': MomentsAccumulator,
+    'std': partial(MomentsAccumulator, std=True),
+    'min': partial(ExtremumAccumulator, min),
+    'max': partial(ExtremumAccumulator, max),
+}
+
+
+def get_accumulator(agg_func: Union[str, Callable], dtype: Optional[str] = None) -> Callable[[], Accumulator]:
+    """Return the factory of the accumulators of an aggregation, see :func:`get_aggregation` for the arguments.
+
+    Aggregations that are not in ACCUMULATORS, such as the median and callables, keep all values of each group.
+    """
+    # checks the aggregation and the dtype
+    aggregation = get_aggregation(agg_func, dtype)
+    if isinstance(agg_func, str) and agg_func in ACCUMULATORS:
+        return ACCUMULATORS[agg_func]
+    return partial(ValuesAccumulator, aggregation)
@@ -1,16 +1,114 @@
 # from collections import OrderedDict
-from typing import Sequence, Optional, Iterable, Union
+from functools import partial
+from typing import Sequence, Optional, Iterable, Iterator, Union, List, Dict, Any, TYPE_CHECKING
 from .mapped_sequence import MappedSequence
 from .mapped_table import MappedTable
 from .ordered_set import OrderedSet
-from .utils import is_scalar, is_iterable
+from .profiling import instrument
+from .utils import is_scalar
 
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
 
+
+@instrument
 def read_excel(file_path, header: Optional[Union[int, Iterable[int]]] = 0,
-               sheetname: Optional[str] = None, skiprows=None):
-    return MappedTable.from_excel(file_path=file_path, header=header, sheetname=sheetname, skiprows=skiprows)
+               sheetname: Optional[Union[str, int, List[Union[str, int]]]] = 0, skiprows=None,
+               intern: bool = True, cache_dir=None,
+               cache_max_size: Optional[int] = None
+               ) -> Union[MappedTable, Dict[Union[str, int], MappedTable]]:
+    """Read one or several sheets of an excel file, opening the workbook only once.
+
+    Parameters
+    ----------
+    sheetname: Optional[Union[str, int, List[Union[str, int]]]]
+        Name or position of the sheet to parse, the first one by default. If None, all sheets are parsed, and if a
+        list, the listed sheets are parsed. In both cases, a dictionary of tables indexed by sheet name (or by the
+        listed names and positions) is returned.
+    cache_dir:
+        Directory of a persistent parse cache. The parsed tables are stored there in the native binary format and
+        reloaded as long as the file content and the parsing options do not change.
+    cache_max_size: Optional[int]
+        Maximum size in bytes of cache_dir, the least recently used entries being evicted beyond it. If None,
+        parse_cache.DEFAULT_MAX_SIZE is used.
+
+    See :meth:`MappedTable.from_excel` for the other parameters.
+    """
+    if cache_dir is not None:
+        # the cache is only imported when used, as hashing modules are slow to import
+        from . import parse_cache
+        if cache_max_size is None:
+            cache_max_size = parse_cache.DEFAULT_MAX_SIZE
+        return parse_cache.cached_read(_parse_excel, file_path, cache_dir, max_size=cache_max_size, header=header,
+                                       sheetname=sheetname, skiprows=skiprows, intern=intern)
+    return _parse_excel(file_path, header=header, sheetname=sheetname, skiprows=skiprows, intern=intern)
+
+
+def _parse_excel(file_path, header, sheetname, skiprows, intern):
+    if sheetname is not None and is_scalar(sheetname):
+        return MappedTable.from_excel(file_path=file_path, header=header, sheetname=sheetname, skiprows=skiprows,
+                                      intern=intern)
+
+    from openpyxl import load_workbook
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheetnames = workbook.sheetnames if sheetname is None else sheetname
+        tables = {}
+        for name in sheetnames:
+            sheet = workbook[workbook.sheetnames[name] if type(name) is int else name]
+            tables[name] = MappedTable._from_sheet(sheet, header=header, skiprows=skiprows, intern=intern)
+        return tables
+    finally:
+        workbook.close()
+
+
+def _read_compact(file_path, **kwargs):
+    """Read an excel file and compact the tables, so that they are cheap to send back from a worker process"""
+    result = read_excel(file_path, **kwargs)
+    for table in (result.values() if isinstance(result, dict) else [result]):
+        table.compact()
+    return result
+
+
+def read_excel_many(file_paths: Iterable, executor: Optional['Executor'] = None, max_workers: Optional[int] = None,
+                    **kwargs) -> Dict[Any, Union[MappedTable, Dict[Union[str, int], MappedTable]]]:
+    """Read several excel files concurrently.
+
+    Parameters
+    ----------
+    file_paths: Iterable
+        Paths of the excel files
+    executor: Optional[Executor]
+        Executor parsing the files. If None, a process pool of max_workers processes is used.
+    max_workers: Optional[int]
+        Number of processes of the default pool
+    kwargs:
+        Arguments of :func:`read_excel`, sheetname=None parsing all the sheets of each file
+
+    Returns
+    -------
+    Dict
+    Result of :func:`read_excel` for each path, in the order of file_paths
+    """
+    file_paths = list(file_paths)
+    if executor is None:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            return read_excel_many(file_paths, executor=pool, **kwargs)
+
+    futures = [executor.submit(_read_compact, file_path, **kwargs) for file_path in file_paths]
+    return {file_path: future.result() for file_path, future in zip(file_paths, futures)}
+
+
+async def aread_excel(file_path, executor: Optional['Executor'] = None, **kwargs):
+    """Asynchronous :func:`read_excel`, parsing the file in an executor (the loop default executor if None) so that
+    the event loop stays responsive."""
+    import asyncio
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(_read_compact, file_path, **kwargs))
 
 
+@instrument
 def concat(*args, axis=0):
     if axis == 0:
         return _vstack(*args)
@@ -65,9 +163,44 @@ def _vstack(*args):
     for arg in args:
         values.extend(arg.reindex(columns).to_list())
 
-    return MappedTable(values=values, columns=columns)
+    return MappedTable(values=values, columns=columns)._with_order(_concat_order(args))
 
 
+def _concat_order(tables: Sequence[MappedTable]):
+    """Order kept by the concatenation of tables sorted the same way, when each one starts after the previous one"""
+    tables = [table for table in tables if len(table) > 0]
+    if not tables or any([table.sorted_by != tables[0].sorted_by for table in tables]):
+        return None
+    sorted_by = tables[0].sorted_by
+    if sorted_by is None:
+        return None
+    keys, ascending = sorted_by
+    for previous, table in zip(tables, tables[1:]):
+        last = previous._get_rows([len(previous) - 1], [previous.columns.index(key) for key in keys])[0]
+        first = table._get_rows([0], [table.columns.index(key) for key in keys])[0]
+        try:
+            if (last > first) if ascending else (last < first):
+                return None
+        except TypeError:
+            return None
+    return sorted_by
+
+
+def _merge_columns(left_columns, right_columns, left_on, right_on, suffixes):
+    """Return the left and right columns with the join column first, and the columns of the merged table"""
+    # set the join condition on the first column
+    left_columns = [left_on, *[col for col in left_columns if col != left_on]]
+    right_columns = [right_on, *[col for col in right_columns if col != right_on]]
+
+    new_columns = [left_on] if left_on == right_on else [left_on, right_on]
+    for col in left_columns[1:]:
+        new_columns.append(col if col not in right_columns else col + suffixes[0])
+    for col in right_columns[1:]:
+        new_columns.append(col if col not in left_columns else col + suffixes[1])
+    return left_columns, right_columns, new_columns
+
+
+@instrument
 def merge(left: MappedTable, right: MappedTable, on=None, left_on=None, right_on=None, how='inner',
           suffixes=('_x', '_y')):
     assert isinstance(left, MappedTable) and isinstance(right, MappedTable), \
@@ -86,67 +219,174 @@ def merge(left: MappedTable, right: MappedTable, on=None, left_on=None, right_on
     assert left_on in left.columns, '{} not found in columns of left'.format(left_on)
     assert right_on in right.columns, '{} not found in columns of right'.format(right_on)
 
-    # set the join condition on the first column
-    left_columns = [left_on, *[col for col in left.columns if col != left_on]]
-    right_columns = [right_on, *[col for col in right.columns if col != right_on]]
-
-    new_columns = [left_on] if left_on == right_on else [left_on, right_on]
-    for col in left_columns[1:]:
-        new_columns.append(col if col not in right_columns else col + suffixes[0])
-    for col in right_columns[1:]:
-        new_columns.append(col if col not in left_columns else col + suffixes[1])
+    left_columns, right_columns, new_columns = _merge_columns(left.columns, right.columns, left_on, right_on,
+                                                               suffixes)
 
-    # First sort the values
-    left = left[left_columns].sort_values(key=left_on, ascending=True).to_list()
-    right = right[right_columns].sort_values(key=right_on, ascending=True).to_list()
-    left_len, right_len = len(left), len(right)
-    left_i = right_i = 0
+    # both join columns are kept when their names differ, each one being None for the rows missing on its side
+    both_keys = left_on != right_on
+    # the left join column is None on the rows only found on the right
+    sorted_by = ((new_columns[0],), True) if not both_keys or how in ('inner', 'left') else None
+    if left._is_sorted((left_on,)) and right._is_sorted((right_on,)):
+        # inputs sorted by their join column are merged in a single pass, without sorting nor hashing
+        matches = _merge_runs(_runs(left.column_values[left_on].values()),
+                              _runs(right.column_values[right_on].values()))
+    else:
+        # rows are matched on the positions of each key, grouped by the kernel of the backend, and output by key
+        left_groups = left.column_values[left_on].group_positions()
+        right_groups = right.column_values[right_on].group_positions()
+        keys = list(left_groups)
+        keys.extend([key for key in right_groups if key not in left_groups])
+        try:
+            keys = sorted(keys)
+        except TypeError:
+            sorted_by = None
+        matches = [(key, left_groups.get(key), right_groups.get(key)) for key in keys]
 
-    # Does not count the on columns
-    left_column_count = len(left_columns) - 1
-    right_column_count = len(right_columns) - 1
+    left_rows = _value_rows(left, left_columns[1:])
+    right_rows = _value_rows(right, right_columns[1:])
+    left_missing = (None,) * (len(left_columns) - 1)
+    right_missing = (None,) * (len(right_columns) - 1)
 
     new_values = []
-    left_added = False
-    right_added = False
-
-    def get_tuple(join_id, left_values, right_values):
-        left_ = left_values if is_iterable(left_values) else [left_values]
-        right_ = right_values if is_iterable(right_values) else [right_values]
-        if len(left_) < left_column_count and len(left_) == 1:
-            left_ *= left_column_count
-
-        if len(right_) < right_column_count and len(right_) == 1:
-            right_ *= right_column_count
-
-        return (join_id, *left_, *right_)
-
-    while (left_i < left_len) & (right_i < right_len):
-        left_id = left[left_i][0]
-        right_id = right[right_i][0]
-        if left_id < right_id and how in ['left', 'outer'] and not left_added:
-            # append the line only on a left join
-            new_values.append(get_tuple(left_id, left[left_i][1:], None))
-            left_added = False
-            left_i += 1
-
-        elif left_id > right_id and how in ['right', 'outer'] and not right_added:
-            # append the line only on a right join
-            new_values.append(get_tuple(right_id, None, right[right_i][1:]))
-            right_added = False
-            right_i += 1
-
-        elif left_id == right_id:
-            # append the line whatever the join method
-            new_values.append(get_tuple(left_id, left[left_i][1:], right[right_i][1:]))
-            left_added = True
-            right_added = True
-            right_i += 1
+    for key, left_positions, right_positions in matches:
+        if left_positions is not None and right_positions is not None:
+            join_key = (key, key) if both_keys else (key,)
+            new_values.extend([(*join_key, *left_rows[i], *right_rows[j])
+                               for i in left_positions for j in right_positions])
+        elif left_positions is not None and how in ('left', 'outer'):
+            join_key = (key, None) if both_keys else (key,)
+            new_values.extend([(*join_key, *left_rows[i], *right_missing) for i in left_positions])
+        elif right_positions is not None and how in ('right', 'outer'):
+            join_key = (None, key) if both_keys else (key,)
+            new_values.extend([(*join_key, *left_missing, *right_rows[j]) for j in right_positions])
+
+    return MappedTable(values=new_values, columns=new_columns)._with_order(sorted_by)
+
+
+def _runs(keys: Sequence) -> List[tuple]:
+    """(key, positions) of each run of equal sorted keys"""
+    runs = []
+    start = 0
+    for end in range(1, len(keys) + 1):
+        if end == len(keys) or keys[end] != keys[start]:
+            runs.append((keys[start], range(start, end)))
+            start = end
+    return runs
 
+
+def _merge_runs(left_runs: List[tuple], right_runs: List[tuple]) -> Iterator[tuple]:
+    """(key, left positions, right positions) of each key of two lists of runs sorted by key, positions being None
+    on the side missing the key"""
+    i = j = 0
+    while i < len(left_runs) or j < len(right_runs):
+        if j == len(right_runs) or (i < len(left_runs) and left_runs[i][0] < right_runs[j][0]):
+            yield left_runs[i][0], left_runs[i][1], None
+            i += 1
+        elif i == len(left_runs) or right_runs[j][0] < left_runs[i][0]:
+            yield right_runs[j][0], None, right_runs[j][1]
+            j += 1
         else:
-            if left_id < right_id:
-                left_i += 1
-            else:
-                right_i += 1
+            yield left_runs[i][0], left_runs[i][1], right_runs[j][1]
+            i += 1
+            j += 1
+
+
+def _value_rows(table: MappedTable, columns: list) -> list:
+    """Rows of the values of some columns"""
+    if not columns:
+        return [()] * len(table)
+    return list(zip(*[table.column_values[col].values() for col in columns]))
+
+
+@instrument
+def merge_asof(left: MappedTable, right: MappedTable, on=None, left_on=None, right_on=None,
+               direction: str = 'backward', allow_exact_matches: bool = True, tolerance=None,
+               suffixes=('_x', '_y')) -> MappedTable:
+    """Join each row of left with the row of right whose key is the nearest, rather than equal.
+
+    Both tables are sorted by their key, which is a no-op for sorted inputs, and matched in a single pass.
+
+    Parameters
+    ----------
+    left: MappedTable
+    right: MappedTable
+    on:
+        Name of the key column of both tables, typically a time column
+    left_on:
+        Name of the key column of left, when on is None
+    right_on:
+        Name of the key column of right, when on is None
+    direction: str
+        'backward' matches the last right key lower than or equal to the left key, 'forward' the first right key
+        greater than or equal to it, and 'nearest' the closest of both
+    allow_exact_matches: bool
+        If False, right keys equal to the left key are not matched
+    tolerance:
+        Maximum distance between matched keys, None for no limit
+    suffixes:
+        Suffixes of the columns found in both tables
+
+    Returns
+    -------
+    MappedTable
+    Rows of left sorted by key, followed by the columns of the matched right rows, filled with None when no right
+    row matches
+    """
+    assert isinstance(left, MappedTable) and isinstance(right, MappedTable), \
+        'left and right should be instance of MappedTable'
+    assert on is not None or (left_on is not None and right_on is not None), \
+        'either `on` argument or left_on and right_on should not be None'
+    directions = {'backward', 'forward', 'nearest'}
+    assert direction in directions, 'direction should be one of {}, got {} instead'.format(directions, direction)
+    if on is not None:
+        left_on = right_on = on
+    assert left_on in left.columns, '{} not found in columns of left'.format(left_on)
+    assert right_on in right.columns, '{} not found in columns of right'.format(right_on)
+
+    left_columns, right_columns, new_columns = _merge_columns(left.columns, right.columns, left_on, right_on,
+                                                               suffixes)
+    left = left.sort_values(left_on)
+    right = right.sort_values(right_on)
+    left_keys = left.column_values[left_on].values()
+    right_keys = right.column_values[right_on].values()
+
+    def distance(position, key):
+        return abs(right_keys[position] - key)
+
+    # positions of the matched right rows, found in a single pass as both keys are sorted
+    matches = []
+    low = 0
+    high = 0
+    for key in left_keys:
+        # right_keys[:low] < key <= right_keys[low:] and right_keys[:high] <= key < right_keys[high:]
+        while low < len(right_keys) and right_keys[low] < key:
+            low += 1
+        high = max(high, low)
+        while high < len(right_keys) and right_keys[high] <= key:
+            high += 1
+        backward = (high if allow_exact_matches else low) - 1
+        forward = low if allow_exact_matches else high
+        backward = backward if backward >= 0 else None
+        forward = forward if forward < len(right_keys) else None
+
+        if direction == 'backward':
+            match = backward
+        elif direction == 'forward':
+            match = forward
+        elif backward is None or forward is None:
+            match = forward if backward is None else backward
+        else:
+            match = backward if distance(backward, key) <= distance(forward, key) else forward
+
+        if match is not None and tolerance is not None and distance(match, key) > tolerance:
+            match = None
+        matches.append(match)
 
-    return MappedTable(values=new_values, columns=new_columns)
+    values = [left.column_values[column].values() for column in left_columns]
+    if left_on != right_on:
+        values.insert(1, [None if match is None else right_keys[match] for match in matches])
+    for column in right_columns[1:]:
+        column = right.column_values[column].values()
+        values.append([None if match is None else column[match] for match in matches])
+    table = MappedTable(values=values, columns=new_columns, index=left.index, axis=1)
+    return table._with_order(((left_on,), True))
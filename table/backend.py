@@ -0,0 +1,187 @@
+"""Pluggable compute backends of the numeric kernels.
+
+The typed array of a numeric column is built as an :class:`array.array`, see :meth:`MappedSequence.array`, and
+memoized aside the tuple of its values. The pure Python backend works on these arrays and always works. The numpy
+backend views them as ndarrays, without copying them, and dispatches reductions, comparisons, sorts and key grouping
+to vectorized kernels. Both backends return plain Python objects, so that results do not depend on the backend,
+except for the last digits of float sums which depend on the summation order.
+
+The backend is selected with :func:`set_backend`, or with the SIMPLETABLE_BACKEND environment variable set to
+'python', 'numpy' or 'auto' (numpy when it is importable, the default).
+"""
+import operator
+import os
+from array import array
+from typing import Optional, Sequence, List, Dict, Any
+from .dtypes import INT, FLOAT
+
+OPERATORS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+
+# typecode of the array.array of the values of each numeric dtype tag
+_TYPECODES = {INT: 'q', FLOAT: 'd'}
+
+
+def typed_array(values: Sequence, dtype: str) -> Optional[array]:
+    """array.array of the values of an int or float column without None, None for other columns. The ints of float
+    columns are converted to floats in the array, the values of the column being unchanged."""
+    typecode = _TYPECODES.get(dtype)
+    if typecode is None or None in values:
+        return None
+    try:
+        return array(typecode, values)
+    except (TypeError, OverflowError):
+        # values that do not match a declared dtype, or ints out of the range of int64
+        return None
+
+
+class PythonBackend:
+    """Kernels written in pure Python, working on the array.array of numeric columns"""
+
+    name = 'python'
+
+    def view(self, data: array):
+        """Array of the backend sharing the memory of data"""
+        return data
+
+    def to_array(self, values: Sequence, dtype: str):
+        """Typed array of the values of an int or float column without None, None otherwise"""
+        data = typed_array(values, dtype)
+        return None if data is None else self.view(data)
+
+    def reduce(self, func: str, values: Sequence, data=None):
+        """Reduce the values that are not None with one of sum, mean, min or max"""
+        if data is None:
+            data = [value for value in values if value is not None]
+        if len(data) == 0:
+            return 0 if func == 'sum' else None
+        if func == 'sum':
+            return sum(data)
+        elif func == 'mean':
+            return sum(data) / len(data)
+        elif func == 'min':
+            return min(data)
+        elif func == 'max':
+            return max(data)
+        raise ValueError('func should be one of sum, mean, min or max, got {} instead'.format(func))
+
+    def compare(self, values: Sequence, op: str, other: Any, data=None) -> List[bool]:
+        """Element-wise comparison with a scalar. None values only match equality with None."""
+        func = OPERATORS[op]
+        if op in ('==', '!='):
+            return [func(value, other) for value in values]
+        return [value is not None and func(value, other) for value in values]
+
+    def argsort(self, values: Sequence, ascending: bool = True, data=None) -> List[int]:
+        """Stable argsort"""
+        return sorted(range(len(values)), key=values.__getitem__, reverse=not ascending)
+
+    def lexsort(self, columns: Sequence[Sequence], ascending: bool = True, arrays=None) -> List[int]:
+        """Stable argsort on several columns, the first one being the primary key"""
+        keys = list(zip(*columns))
+        return sorted(range(len(keys)), key=keys.__getitem__, reverse=not ascending)
+
+    def group_positions(self, values: Sequence, data=None) -> Dict[Any, List[int]]:
+        """Positions of each distinct value, in order of first occurrence"""
+        groups = {}
+        for position, value in enumerate(values):
+            group = groups.get(value)
+            if group is None:
+                groups[value] = [position]
+            else:
+                group.append(position)
+        return groups
+
+
+class NumpyBackend(PythonBackend):
+    """Vectorized kernels, working on read-only ndarray views of the numeric columns. Other columns use the Python
+    kernels."""
+
+    name = 'numpy'
+
+    def __init__(self):
+        import numpy
+        self.np = numpy
+
+    def view(self, data: array):
+        view = self.np.frombuffer(data, dtype=self.np.int64 if data.typecode == 'q' else self.np.float64)
+        # values of sequences are immutable
+        view.flags.writeable = False
+        return view
+
+    def reduce(self, func: str, values: Sequence, data=None):
+        if data is None:
+            return super().reduce(func, values)
+        if len(data) == 0:
+            return 0 if func == 'sum' else None
+        if func in ('sum', 'mean', 'min', 'max'):
+            return getattr(data, func)().item()
+        raise ValueError('func should be one of sum, mean, min or max, got {} instead'.format(func))
+
+    def compare(self, values: Sequence, op: str, other: Any, data=None) -> List[bool]:
+        if data is None or type(other) not in (int, float):
+            return super().compare(values, op, other)
+        return OPERATORS[op](data, other).tolist()
+
+    def argsort(self, values: Sequence, ascending: bool = True, data=None) -> List[int]:
+        if data is None:
+            return super().argsort(values, ascending)
+        if ascending:
+            return self.np.argsort(data, kind='stable').tolist()
+        # stable descending order: sort the reversed array and map positions back
+        positions = self.np.argsort(data[::-1], kind='stable')[::-1]
+        return (len(data) - 1 - positions).tolist()
+
+    def lexsort(self, columns: Sequence[Sequence], ascending: bool = True, arrays=None) -> List[int]:
+        if arrays is None or any([data is None for data in arrays]):
+            return super().lexsort(columns, ascending)
+        if ascending:
+            # numpy.lexsort uses the last key as the primary key
+            return self.np.lexsort(arrays[::-1]).tolist()
+        reversed_positions = self.np.lexsort([data[::-1] for data in arrays[::-1]])[::-1]
+        return (len(arrays[0]) - 1 - reversed_positions).tolist()
+
+    def group_positions(self, values: Sequence, data=None) -> Dict[Any, List[int]]:
+        if data is None:
+            return super().group_positions(values)
+        np = self.np
+        keys, first, inverse = np.unique(data, return_index=True, return_inverse=True)
+        order = np.argsort(inverse, kind='stable')
+        bounds = np.cumsum(np.bincount(inverse, minlength=len(keys)))[:-1]
+        groups = np.split(order, bounds)
+        return {keys[i].item(): groups[i].tolist() for i in np.argsort(first, kind='stable')}
+
+
+_backend = None
+
+
+def _create(name: str):
+    if name == 'python':
+        return PythonBackend()
+    elif name == 'numpy':
+        return NumpyBackend()
+    elif name == 'auto':
+        try:
+            return NumpyBackend()
+        except ImportError:
+            return PythonBackend()
+    raise ValueError('backend should be one of python, numpy or auto, got {} instead'.format(name))
+
+
+def set_backend(name: str):
+    """Select the compute backend: 'python', 'numpy' or 'auto'"""
+    global _backend
+    _backend = _create(name)
+
+
+def get_backend() -> PythonBackend:
+    if _backend is None:
+        set_backend(os.environ.get('SIMPLETABLE_BACKEND', 'auto'))
+    return _backend
@@ -0,0 +1,223 @@
+"""Benchmark suite of the main MappedTable operations.
+
+Run with `python -m table.bench`, see `python -m table.bench --help` for the options. Results can be saved as JSON
+with `--output` and compared with a previous run with `--compare` to detect regressions. `--import-time` checks the
+time of `import table` in a fresh interpreter against IMPORT_BUDGET.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+from .api import concat, merge, read_excel
+from .mapped_sequence import MappedSequence
+from .mapped_table import MappedTable
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+# seconds allowed for `import table` in a fresh interpreter
+IMPORT_BUDGET = 0.25
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GAPMINDER_PATH = os.path.join(ROOT, 'gapminder.xlsx')
+
+
+def numeric_rows(length: int, width: int = 4, seed: int = 0) -> Tuple[List[tuple], List[str]]:
+    """Rows of an integer ID followed by random floats"""
+    generator = random.Random(seed)
+    columns = ['ID', *['x{}'.format(i) for i in range(width - 1)]]
+    rows = [(i, *[generator.random() for _ in range(width - 1)]) for i in range(length)]
+    return rows, columns
+
+
+def string_rows(length: int) -> Tuple[List[tuple], List[str]]:
+    """Rows of the gapminder sheet replicated up to length rows, with an ID column"""
+    table = MappedTable.from_excel(GAPMINDER_PATH)
+    source = [tuple(row) for row in table.row_values]
+    rows = [(i, *source[i % len(source)]) for i in range(length)]
+    return rows, ['ID', *table.columns]
+
+
+def write_workbook(path, rows: List[tuple], columns: List[str]):
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(columns)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+
+
+def _cases(length: int, workdir: str, max_excel_rows: int) -> Dict[str, Tuple[Callable, Callable]]:
+    """Return the benchmark cases for a given number of rows, as name: (setup, function of the setup result)"""
+    narrow_rows, narrow_columns = numeric_rows(length)
+    wide_rows, wide_columns = numeric_rows(max(length // 10, 1), width=50)
+    gap_rows, gap_columns = string_rows(length)
+    narrow = MappedTable(narrow_rows, columns=narrow_columns)
+    gapminder = MappedTable(gap_rows, columns=gap_columns)
+    narrow_by_columns = [list(column) for column in zip(*narrow_rows)]
+    # the right side of merges only holds every other ID
+    right = narrow[::2, ['ID', 'x0']]
+    half = length // 2
+
+    def keep(value):
+        return lambda: value
+
+    cases = {
+        'init_axis0': (keep(narrow_rows), lambda rows: MappedTable(rows, columns=narrow_columns)),
+        'init_axis1': (keep(narrow_by_columns), lambda values: MappedTable(values, columns=narrow_columns, axis=1)),
+        'init_wide': (keep(wide_rows), lambda rows: MappedTable(rows, columns=wide_columns)),
+        'init_strings': (keep(gap_rows), lambda rows: MappedTable(rows, columns=gap_columns)),
+        'getitem_column': (keep(narrow), lambda table: table['x0']),
+        'getitem_columns': (keep(narrow), lambda table: table[['ID', 'x0']]),
+        'getitem_slice': (keep(narrow), lambda table: table[half:]),
+        'getitem_cell': (keep(narrow), lambda table: table[half, 'x0']),
+        'where_func': (keep(narrow), lambda table: table.where(lambda row: row['x0'] > 0.5)),
+        'where_equal': (keep(gapminder), lambda table: table.where(continent='Asia')),
+        'sort_values': (keep(narrow), lambda table: table.sort_values('x0')),
+        'sort_strings': (keep(gapminder), lambda table: table.sort_values('country')),
+        'concat_axis0': (keep(narrow), lambda table: concat(table[:half], table[half:], axis=0)),
+        'concat_axis1': (keep(narrow), lambda table: concat(table, MappedSequence(range(length), name='y'), axis=1)),
+        'eval': (keep(narrow), lambda table: table.eval('x0 * 2 + x1')),
+        'apply_rows': (keep(narrow), lambda table: table.apply(lambda row: row['x0'] * 2 + row['x1'], axis=1)),
+        'apply_batch': (keep(narrow), lambda table: table.apply(
+            lambda batch: [a * 2 + b for a, b in zip(batch['x0'], batch['x1'])], axis=1, batch=True)),
+        'pivot': (keep(gapminder), lambda table: table.pivot('continent', 'year', 'lifeExp')),
+        # refresh of a pivot after appending 1% of new rows, to compare with pivot
+        'pivot_append': (lambda: (gapminder.pivot('continent', 'year', 'lifeExp', incremental=True),
+                                  gapminder[:max(length // 100, 1)]),
+                         lambda arguments: (arguments[0].append(arguments[1]), arguments[0].table)),
+        'melt': (keep(gapminder), lambda table: table.melt(['ID', 'country', 'continent', 'year'])),
+        'format_text': (keep(narrow), str),
+        'format_html': (keep(narrow), lambda table: table._repr_html_()),
+    }
+    for how in ('inner', 'left', 'right', 'outer'):
+        cases['merge_' + how] = (keep((narrow, right)),
+                                 lambda tables, how=how: merge(*tables, on='ID', how=how))
+
+    if length <= max_excel_rows:
+        path = os.path.join(workdir, 'bench_{}.xlsx'.format(length))
+
+        def excel_setup():
+            if not os.path.exists(path):
+                write_workbook(path, gap_rows, gap_columns)
+            return path
+
+        cases['from_excel'] = (excel_setup, read_excel)
+    return cases
+
+
+def measure(setup: Callable, func: Callable, repeat: int) -> Dict[str, float]:
+    """Best wall time over repeat runs, then peak memory allocated during one traced run"""
+    argument = setup()
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func(argument)
+        timings.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func(argument)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': min(timings), 'mean_seconds': sum(timings) / len(timings), 'peak_bytes': peak}
+
+
+def run(sizes=DEFAULT_SIZES, repeat: int = 3, only: Optional[List[str]] = None, max_excel_rows: int = 10000,
+        verbose: bool = True) -> dict:
+    """Run the benchmarks and return the results as a JSON serializable dictionary"""
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'repeat': repeat,
+        'results': {},
+    }
+    with tempfile.TemporaryDirectory(prefix='simpletable_bench_') as workdir:
+        for length in sizes:
+            for name, (setup, func) in _cases(length, workdir, max_excel_rows).items():
+                if only and not any([pattern in name for pattern in only]):
+                    continue
+                result = measure(setup, func, repeat)
+                results['results']['{}[{}]'.format(name, length)] = result
+                if verbose:
+                    print('{:<28}{:>12.6f} s{:>14.1f} KiB'.format('{}[{}]'.format(name, length), result['seconds'],
+                                                                  result['peak_bytes'] / 1024))
+    return results
+
+
+def import_time(repeat: int = 3, module: str = 'table') -> float:
+    """Best cumulative time of importing module in a fresh interpreter, as reported by `python -X importtime`"""
+    timings = []
+    for _ in range(repeat):
+        process = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+                                 stderr=subprocess.PIPE, universal_newlines=True, check=True, cwd=ROOT)
+        for line in process.stderr.splitlines():
+            # import time: self [us] | cumulative | imported package
+            fields = line.split('|')
+            if len(fields) == 3 and fields[2].strip() == module:
+                timings.append(int(fields[1]) / 1e6)
+    return min(timings)
+
+
+def compare(results: dict, baseline: dict, threshold: float = 1.2, verbose: bool = False) -> List[str]:
+    """Return the names of the benchmarks that are slower than the baseline by more than threshold. If verbose, the
+    ratio of each benchmark to the baseline is printed."""
+    regressions = []
+    for name, result in results['results'].items():
+        reference = baseline['results'].get(name)
+        if reference is None or reference['seconds'] == 0:
+            continue
+        ratio = result['seconds'] / reference['seconds']
+        if verbose:
+            flag = ' <- regression' if ratio > threshold else ''
+            print('{:<28}{:>8.2f}x{}'.format(name, ratio, flag))
+        if ratio > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m table.bench', description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=float, nargs='+', default=DEFAULT_SIZES,
+                        help='numbers of rows of the synthetic tables, e.g. 1e3 1e6')
+    parser.add_argument('--repeat', type=int, default=3, help='number of timed runs of each benchmark')
+    parser.add_argument('--only', nargs='+', help='only run the benchmarks whose name contains one of these')
+    parser.add_argument('--max-excel-rows', type=float, default=1e4,
+                        help='largest size for which from_excel is benchmarked')
+    parser.add_argument('--output', help='path of the JSON file where results are saved')
+    parser.add_argument('--compare', help='path of a previous JSON result to compare with')
+    parser.add_argument('--threshold', type=float, default=1.2, help='slowdown ratio reported as a regression')
+    parser.add_argument('--import-time', action='store_true',
+                        help='only check the time of `import table` against IMPORT_BUDGET')
+    args = parser.parse_args(argv)
+
+    if args.import_time:
+        seconds = import_time(args.repeat)
+        print('{:<28}{:>12.6f} s (budget {} s)'.format('import table', seconds, IMPORT_BUDGET))
+        return int(seconds > IMPORT_BUDGET)
+
+    results = run(sizes=[int(size) for size in args.sizes], repeat=args.repeat, only=args.only,
+                  max_excel_rows=int(args.max_excel_rows))
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if compare(results, baseline, args.threshold, verbose=True):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+from typing import Sequence, Optional, Mapping, Callable, Iterable, Any, Union
+from .mapped_sequence import MappedSequence
+from .mapped_table import MappedTable
+
+
+class TableBuilder:
+    """Growable container used to build a :class:`MappedTable` row by row.
+
+    Values are appended to one list per column, so that appending a row is amortized O(1). When the builder is
+    frozen, each list is converted once into the values of a column, without building any row.
+    """
+
+    __slots__ = ['_columns', '_converters', '_buffers', '_offset', '_chunksize', '_sink']
+
+    def __init__(self, columns: Sequence[str], converters: Optional[Mapping[str, Callable]] = None,
+                 chunksize: Optional[int] = None, sink: Optional[Callable[[MappedTable], Any]] = None):
+        """
+
+        Parameters
+        ----------
+        columns: Sequence[str]
+            List of the names of the columns
+        converters: Optional[Mapping[str, Callable]]
+            Converter applied to the non None values of each column, for instance {'year': int}
+        chunksize: Optional[int]
+            If set, the buffers are flushed to `sink` each time they hold `chunksize` rows.
+        sink: Optional[Callable[[MappedTable], Any]]
+            Callable receiving each flushed chunk, for instance `list.append` or `DataModel.insert_table`.
+        """
+        assert chunksize is None or sink is not None, 'a sink should be provided along with chunksize'
+        self._columns = tuple(columns)
+        if converters is not None:
+            assert all([col in self._columns for col in converters]), \
+                'converters keys should be in columns, expected {}, got {}'.format(self._columns, tuple(converters))
+        self._converters = converters
+        self._buffers = [[] for _ in self._columns]
+        # number of rows already flushed, used to keep a continuous index across chunks
+        self._offset = 0
+        self._chunksize = chunksize
+        self._sink = sink
+
+    @property
+    def columns(self):
+        return self._columns
+
+    def __len__(self):
+        return len(self._buffers[0]) if self._buffers else 0
+
+    def _convert(self, column, values: Iterable) -> Iterable:
+        if self._converters is None or column not in self._converters:
+            return values
+        converter = self._converters[column]
+        return (None if value is None else converter(value) for value in values)
+
+    def append_row(self, row: Union[Sequence, Mapping]):
+        """Append a single row given as a sequence ordered as the columns, or as a mapping of column to value."""
+        if isinstance(row, (Mapping, MappedSequence)):
+            values = [row.get(col) for col in self._columns]
+        else:
+            values = row
+            assert len(values) == len(self._columns), \
+                'row should have the same length as columns, got {} and {}'.format(len(values), len(self._columns))
+
+        if self._converters is not None:
+            values = [value if value is None or col not in self._converters else self._converters[col](value)
+                      for col, value in zip(self._columns, values)]
+        for buffer, value in zip(self._buffers, values):
+            buffer.append(value)
+        self._check_flush()
+
+    def append_rows(self, rows: Iterable):
+        """Append several rows, see :meth:`append_row`."""
+        for row in rows:
+            self.append_row(row)
+
+    def append_table(self, table: MappedTable):
+        """Append all rows of a table. Missing columns are filled with None and extra columns are ignored."""
+        assert isinstance(table, MappedTable), 'table should be an instance of MappedTable'
+        columns = [column.values() for column in table.reindex(self._columns).values]
+        # with a chunksize, rows are appended by slices filling the buffers up to chunksize, each one being flushed
+        length = len(table)
+        start = 0
+        while start < length:
+            stop = length if self._chunksize is None else min(length, start + self._chunksize - len(self))
+            for col, buffer, values in zip(self._columns, self._buffers, columns):
+                buffer.extend(self._convert(col, values[start:stop]))
+            start = stop
+            self._check_flush()
+
+    def _check_flush(self):
+        if self._chunksize is not None and len(self) >= self._chunksize:
+            self.flush()
+
+    def freeze(self) -> MappedTable:
+        """Build a MappedTable from the buffered rows and reset the builder.
+
+        Each buffer is copied once into the tuple of its column and then released, no row being built.
+        """
+        buffers = self._buffers
+        length = len(self)
+        index = range(self._offset, self._offset + length)
+        self._buffers = [[] for _ in self._columns]
+        self._offset += length
+        return MappedTable(values=buffers, columns=self._columns, index=index, axis=1)
+
+    def flush(self) -> Optional[MappedTable]:
+        """Send the buffered rows to the sink as one chunk."""
+        if self._sink is None or len(self) == 0:
+            return None
+        chunk = self.freeze()
+        self._sink(chunk)
+        return chunk
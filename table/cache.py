@@ -0,0 +1,102 @@
+"""Global accounting of the memoized results of :class:`MappedSequence`.
+
+When a budget is set with :func:`set_budget`, each memoized result is registered with its estimated cost in bytes,
+and the least recently used results of all sequences are evicted as soon as the total cost exceeds the budget.
+Without a budget, memoized results live as long as their sequence and nothing is registered.
+"""
+import sys
+import weakref
+from collections import OrderedDict
+from typing import Optional, Any
+
+# Maximum number of bytes held by memoized results, None for no limit
+BUDGET = None
+# (id of the sequence, name of the method) -> (weak reference to the sequence, cost)
+_entries = OrderedDict()
+_total = 0
+
+
+def entry_cost(value: Any) -> int:
+    """Estimated number of bytes held by a memoized value, not counting the values shared with the sequence"""
+    size = sys.getsizeof(value)
+    # tuples of pairs, such as items(), also own one tuple per item
+    if isinstance(value, (tuple, list)) and value and type(value[0]) is tuple:
+        size += sys.getsizeof(value[0]) * len(value)
+    return size
+
+
+def set_budget(nbytes: Optional[int]):
+    """Set the maximum number of bytes held by memoized results of all sequences, None to disable the limit.
+
+    Results memoized before a budget is set are not accounted for.
+    """
+    global BUDGET
+    BUDGET = nbytes
+    if nbytes is None:
+        clear_registry()
+    else:
+        _evict()
+
+
+def usage() -> int:
+    """Total cost of the registered memoized results"""
+    return _total
+
+
+def _forget(key):
+    global _total
+    entry = _entries.pop(key, None)
+    if entry is not None:
+        _total -= entry[1]
+
+
+def register(sequence, name: str, value: Any):
+    """Account for a new memoized result and evict the least recently used ones if the budget is exceeded"""
+    global _total
+    key = (id(sequence), name)
+    _forget(key)
+    # the entry is dropped when the sequence is garbage collected
+    reference = weakref.ref(sequence, lambda _, key=key: _forget(key))
+    cost = entry_cost(value)
+    _entries[key] = (reference, cost)
+    _total += cost
+    _evict()
+
+
+def touch(sequence, name: str):
+    """Mark a memoized result as recently used"""
+    key = (id(sequence), name)
+    if key in _entries:
+        _entries.move_to_end(key)
+
+
+def unregister(sequence):
+    """Forget all memoized results of a sequence"""
+    for name in list(sequence._cache):
+        _forget((id(sequence), name))
+
+
+def _evict():
+    global _total
+    while BUDGET is not None and _total > BUDGET and _entries:
+        (_, name), (reference, cost) = _entries.popitem(last=False)
+        _total -= cost
+        sequence = reference()
+        if sequence is not None:
+            sequence._cache.pop(name, None)
+
+
+def clear_registry():
+    """Forget all registered results, without dropping them from the sequences"""
+    global _total
+    _entries.clear()
+    _total = 0
+
+
+def clear():
+    """Drop all registered memoized results from their sequences"""
+    for (_, name), (reference, _) in list(_entries.items()):
+        sequence = reference()
+        if sequence is not None:
+            sequence._cache.pop(name, None)
+    clear_registry()
@@ -0,0 +1,73 @@
+"""Column type tags.
+
+Each column carries a dtype tag, inferred once from the types of its values in a single pass, or declared by the
+caller, for instance with the schema argument of :class:`MappedTable`. None values are ignored by the inference.
+
+- 'int', 'float', 'bool' and 'str' for columns holding a single one of these types, 'float' for ints mixed with
+  floats
+- 'datetime' for dates, times and datetimes
+- 'category' for string-like values drawn from a small set, only when declared
+- 'object' for anything else, including columns holding only None
+"""
+import datetime
+from typing import Iterable, Any
+
+INT = 'int'
+FLOAT = 'float'
+BOOL = 'bool'
+STR = 'str'
+DATETIME = 'datetime'
+CATEGORY = 'category'
+OBJECT = 'object'
+
+DTYPES = (INT, FLOAT, BOOL, STR, DATETIME, CATEGORY, OBJECT)
+NUMERIC = (INT, FLOAT, BOOL)
+# values of these dtypes are never sequences of other values
+SCALAR = (INT, FLOAT, BOOL, STR, DATETIME, CATEGORY)
+
+_TYPES = {
+    int: INT,
+    float: FLOAT,
+    bool: BOOL,
+    str: STR,
+    datetime.datetime: DATETIME,
+    datetime.date: DATETIME,
+    datetime.time: DATETIME,
+}
+_NONE_TYPE = type(None)
+
+# SQLite column type of each dtype tag, the other tags having no declared type
+SQLITE_TYPES = {
+    INT: 'INTEGER',
+    BOOL: 'INTEGER',
+    FLOAT: 'REAL',
+    STR: 'TEXT',
+    CATEGORY: 'TEXT',
+    DATETIME: 'TIMESTAMP',
+}
+
+
+def infer_dtype(values: Iterable[Any]) -> str:
+    """Infer the dtype tag of values in a single pass over their types"""
+    types = set(map(type, values))
+    types.discard(_NONE_TYPE)
+    if len(types) == 1:
+        return _TYPES.get(types.pop(), OBJECT)
+    elif types == {int, float}:
+        return FLOAT
+    elif types and all([_TYPES.get(value_type) == DATETIME for value_type in types]):
+        return DATETIME
+    return OBJECT
+
+
+def check_dtype(dtype: str) -> str:
+    """Check that dtype is a known tag, or a python type mapped to one, and return the tag"""
+    if isinstance(dtype, type):
+        dtype = _TYPES.get(dtype, OBJECT)
+    assert dtype in DTYPES, 'dtype should be one of {}, got {} instead'.format(DTYPES, dtype)
+    return dtype
+
+
+def sqlite_type(dtype) -> str:
+    """SQLite column type of a dtype tag or of a python type"""
+    return SQLITE_TYPES.get(check_dtype(dtype), 'NONE')
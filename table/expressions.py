@@ -0,0 +1,146 @@
+"""Compiler of column expressions, such as `table.eval("a * 2 + b")`.
+
+An expression is a Python expression over column names. Names that are not identifiers are quoted with backticks,
+as in "`sepal length (cm)` * 2". Expressions are parsed once, checked against a small set of allowed nodes, and
+compiled into a single list comprehension looping over the referenced columns together, so that no row object is
+built. When a referenced value is None, the result of the row is None.
+
+Compiled functions are cached by expression, columns and null pattern.
+"""
+import ast
+import functools
+import math
+import re
+import sys
+from typing import Dict, List, Sequence, Tuple
+
+# functions that may be called in expressions
+FUNCTIONS = {
+    'abs': abs,
+    'round': round,
+    'min': min,
+    'max': max,
+    'int': int,
+    'float': float,
+    'str': str,
+    'bool': bool,
+    'len': len,
+    'sqrt': math.sqrt,
+    'exp': math.exp,
+    'log': math.log,
+    'floor': math.floor,
+    'ceil': math.ceil,
+}
+
+_ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.BoolOp, ast.Compare, ast.IfExp, ast.Call, ast.Name, ast.Load,
+    ast.Constant, ast.Tuple, ast.List, ast.operator, ast.unaryop, ast.boolop, ast.cmpop,
+    # constants of python < 3.8
+    *([ast.Num, ast.Str, ast.NameConstant] if sys.version_info < (3, 8) else []),
+)
+_QUOTED = re.compile(r'`([^`]*)`')
+
+
+class ExpressionError(ValueError):
+    """Raised when an expression cannot be parsed or uses a construct that is not supported"""
+
+
+def _quote(expression: str) -> Tuple[str, Dict[str, str]]:
+    """Replace the backtick quoted names by identifiers, returning the new expression and the identifier names"""
+    names = {}
+
+    def replace(match):
+        identifier = '_quoted_{}'.format(len(names))
+        names[identifier] = match.group(1)
+        return identifier
+
+    return _QUOTED.sub(replace, expression), names
+
+
+def parse(expression: str, columns: Sequence) -> Tuple[ast.Expression, List]:
+    """Parse and check an expression, returning its tree and the referenced columns in order of first use"""
+    source, quoted = _quote(expression)
+    try:
+        tree = ast.parse(source.strip(), mode='eval')
+    except SyntaxError as error:
+        raise ExpressionError('invalid expression {!r}: {}'.format(expression, error.msg)) from None
+
+    referenced = []
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ExpressionError('{} is not supported in expressions, got {!r}'.format(type(node).__name__,
+                                                                                       expression))
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS or node.keywords:
+                raise ExpressionError('only calls of {} with positional arguments are supported, got {!r}'.format(
+                    tuple(FUNCTIONS), expression))
+        elif isinstance(node, ast.Name) and node.id not in FUNCTIONS:
+            column = quoted.get(node.id, node.id)
+            if column not in columns:
+                raise KeyError(column)
+            if column not in referenced:
+                referenced.append(column)
+    return tree, referenced
+
+
+class _Rename(ast.NodeTransformer):
+    """Replace the names of the columns by the loop variables"""
+
+    def __init__(self, variables: Dict[str, str], quoted: Dict[str, str]):
+        self.variables = variables
+        self.quoted = quoted
+
+    def visit_Name(self, node: ast.Name):
+        column = self.quoted.get(node.id, node.id)
+        if column in self.variables:
+            return ast.copy_location(ast.Name(id=self.variables[column], ctx=ast.Load()), node)
+        return node
+
+
+def _name(identifier: str, ctx=ast.Load) -> ast.Name:
+    return ast.Name(id=identifier, ctx=ctx())
+
+
+@functools.lru_cache(maxsize=256)
+def _compile(expression: str, columns: Tuple, nullable: Tuple[bool, ...]):
+    """Compile an expression into a list comprehension over the referenced columns _c0, _c1..."""
+    _, quoted = _quote(expression)
+    tree, referenced = parse(expression, columns)
+    variables = {column: '_v{}'.format(i) for i, column in enumerate(referenced)}
+    value = _Rename(variables, quoted).visit(tree).body
+
+    loop_variables = [variables[column] for column in referenced]
+    nulls = [ast.Compare(left=_name(variable), ops=[ast.Is()], comparators=[ast.Constant(value=None)])
+             for variable, flag in zip(loop_variables, nullable) if flag]
+    if nulls:
+        test = nulls[0] if len(nulls) == 1 else ast.BoolOp(op=ast.Or(), values=nulls)
+        value = ast.IfExp(test=test, body=ast.Constant(value=None), orelse=value)
+
+    arguments = [_name('_c{}'.format(i)) for i in range(len(referenced))]
+    if len(referenced) == 0:
+        target, iterator = _name('_', ast.Store), ast.Call(func=_name('range'), args=[_name('_length')], keywords=[])
+    elif len(referenced) == 1:
+        target, iterator = _name(loop_variables[0], ast.Store), arguments[0]
+    else:
+        target = ast.Tuple(elts=[_name(variable, ast.Store) for variable in loop_variables], ctx=ast.Store())
+        iterator = ast.Call(func=_name('zip'), args=arguments, keywords=[])
+    loop = ast.ListComp(elt=value, generators=[ast.comprehension(target=target, iter=iterator, ifs=[], is_async=0)])
+    tree = ast.fix_missing_locations(ast.Expression(body=loop))
+    return compile(tree, '<expression {!r}>'.format(expression), 'eval')
+
+
+@functools.lru_cache(maxsize=256)
+def _references(expression: str, columns: Tuple) -> List:
+    return parse(expression, columns)[1]
+
+
+def evaluate(expression: str, table) -> list:
+    """Evaluate an expression on each row of a table, returning the list of results"""
+    names = tuple(table.columns.values())
+    columns = [table.column_values[column] for column in _references(expression, names)]
+    nullable = tuple([column.null_count() > 0 for column in columns])
+    code = _compile(expression, names, nullable)
+    namespace = dict(FUNCTIONS, _length=len(table))
+    for i, column in enumerate(columns):
+        namespace['_c{}'.format(i)] = column.values()
+    return eval(code, namespace)
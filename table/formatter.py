@@ -1,60 +1,134 @@
-from functools import partial
-from typing import Optional, Any, TYPE_CHECKING, Union
+import io
+from abc import ABC, abstractmethod
+from typing import Optional, Any, TYPE_CHECKING, List, Tuple, Sequence
+from .dtypes import infer_dtype, FLOAT, STR, CATEGORY
 
 if TYPE_CHECKING:
     from .mapped_table import MappedTable
 
 
-class HtmlFormatter:
-    def __init__(self):
+def _preview_positions(length: int, max_count: int) -> Tuple[List[int], Optional[int]]:
+    """Return the head and tail positions to display, and where the ellipsis goes when some are hidden"""
+    # hiding a single row or column would not save anything
+    if length <= max_count + 1:
+        return list(range(length)), None
+    half = max_count // 2
+    return list(range(half)) + list(range(length - half, length)), half
+
+
+def _insert(sequence: Sequence, position: Optional[int], value: Any) -> list:
+    sequence = list(sequence)
+    if position is not None:
+        sequence.insert(position, value)
+    return sequence
+
+
+class TableFormatter(ABC):
+    """Base class of the table renderers.
+
+    Only the head and tail rows, and the first and last columns, are read from the table storage, so that the cost of
+    rendering does not depend on the size of the table.
+    """
+
+    def __init__(self, max_rows: int = 10, max_cols: int = 20):
+        self.max_rows = max_rows
+        self.max_cols = max_cols
         self.float_format = '{:.5f}'
         self.default_format = '{}'
-        self.html_table_format = \
-            '<div><table>\
-                <thead>\
-                        {}\
-                </thead>\
-                <tbody>\
-                        {}\
-                </tbody>\
-            </table></div>'
-
-    def write_cell(self, value: Any, kind: str, tags: Optional[str] = None, cell_format: Optional[str] = None):
-        if tags is not None:
-            start_tag = f'<{kind} {tags}>'
-        else:
-            start_tag = f'<{kind}>'
+        self.ellipsis = '...'
 
-        if isinstance(value, float):
-            cell_value = self.float_format.format(value)
-        else:
-            cell_value = self.default_format.format(value)
-        if cell_format is not None:
-            cell_value = f'<{cell_format}>{cell_value}</{cell_format}>'
+    def format_value(self, value: Any, dtype: Optional[str] = None) -> str:
+        # ints of float columns are displayed as floats
+        if isinstance(value, float) or (dtype == FLOAT and type(value) is int):
+            return self.float_format.format(value)
+        return self.default_format.format(value)
 
-        return f"{start_tag}{cell_value}</{kind}>"
+    def preview_dtypes(self, table: 'MappedTable', col_positions: List[int], rows: List[tuple]) -> List[str]:
+        """dtype of the displayed columns, inferred from the displayed values when the columns are not stored"""
+        if table._column_values is not None:
+            columns = table._column_values.values()
+            return [columns[j].dtype for j in col_positions]
+        return [infer_dtype(column) for column in zip(*rows)] if rows else [None] * len(col_positions)
 
-    def format_sequence(self, row, kind: str, cell_format: Optional[str] = None) -> str:
-        formatter = lambda x: self.write_cell(value=x, kind=kind, cell_format=cell_format)
-        formatted = '\n'.join(map(formatter, row))
-        return formatted
+    def preview(self, table: 'MappedTable') -> Tuple[list, list, List[list], List[str]]:
+        """Return the displayed header, index and rows as strings, ellipsis included, and the dtypes of the
+        displayed columns"""
+        row_positions, row_split = _preview_positions(table.shape[0], self.max_rows)
+        col_positions, col_split = _preview_positions(table.shape[1], self.max_cols)
+        columns = table.columns.values()
+        index = table.index.values()
 
-    def format_row(self, row, index):
-        return self.format_sequence((f'<b>{index}</b>', *row), kind='td')
+        header = _insert([self.default_format.format(columns[j]) for j in col_positions], col_split, self.ellipsis)
+        labels = _insert([self.default_format.format(index[i]) for i in row_positions], row_split, self.ellipsis)
+        values = table._get_rows(row_positions, col_positions)
+        dtypes = self.preview_dtypes(table, col_positions, values)
+        rows = [_insert(map(self.format_value, row, dtypes), col_split, self.ellipsis) for row in values]
+        if row_split is not None:
+            rows.insert(row_split, [self.ellipsis] * len(header))
+        return header, labels, rows, _insert(dtypes, col_split, None)
 
-    def format_header(self, header):
-        return self.format_sequence(('', *header), kind='td', cell_format='b')
+    @abstractmethod
+    def format_table(self, table: 'MappedTable') -> str:
+        """Render the preview of table"""
 
-    def format_table(self, table: 'MappedTable'):
-        header = self.format_header(table.columns)
 
-        if len(table) > 11:
-            rows = [self.format_row(row, index) for row, index in zip(table.row_values[:5], table.index[:5])]
-            inter = self.format_sequence(('...',) * (len(table.columns) + 1), kind='td')
-            rows += [inter]
-            rows += [self.format_row(row, index) for row, index in zip(table.row_values[-5:], table.index[-5:])]
+class HtmlFormatter(TableFormatter):
+    def write_cell(self, buffer: io.StringIO, value: str, kind: str, cell_format: Optional[str] = None):
+        buffer.write(f'<{kind}>')
+        if cell_format is not None:
+            buffer.write(f'<{cell_format}>{value}</{cell_format}>')
         else:
-            rows = [self.format_row(row, index) for index, row in zip(table.index, table.row_values)]
+            buffer.write(value)
+        buffer.write(f'</{kind}>')
+
+    def write_row(self, buffer: io.StringIO, row: Sequence[str], kind: str = 'td', cell_format: Optional[str] = None,
+                  label: Optional[str] = None):
+        """Write a row of cells, preceded by a bold label cell when label is given"""
+        buffer.write('<tr>')
+        if label is not None:
+            self.write_cell(buffer, label, kind=kind, cell_format='b')
+        for value in row:
+            self.write_cell(buffer, value, kind=kind, cell_format=cell_format)
+        buffer.write('</tr>\n')
+
+    def format_table(self, table: 'MappedTable') -> str:
+        header, labels, rows, _ = self.preview(table)
+        buffer = io.StringIO()
+        buffer.write('<div><table>\n<thead>\n')
+        self.write_row(buffer, header, cell_format='b', label='')
+        buffer.write('</thead>\n<tbody>\n')
+        for label, row in zip(labels, rows):
+            self.write_row(buffer, row, label=label)
+        buffer.write('</tbody>\n</table></div>')
+        return buffer.getvalue()
+
+
+class TextFormatter(TableFormatter):
+    def __init__(self, max_rows: int = 10, max_cols: int = 20):
+        super().__init__(max_rows=max_rows, max_cols=max_cols)
+        self.float_format = '{:.6g}'
+        self.separator = '  '
+
+    def format_table(self, table: 'MappedTable') -> str:
+        header, labels, rows, dtypes = self.preview(table)
+        index_width = max(map(len, labels), default=0)
+        widths = [len(value) for value in header]
+        for row in rows:
+            widths = [max(width, len(value)) for width, value in zip(widths, row)]
+        # text is aligned on the left, and numbers on the right
+        justify = [str.ljust if dtype in (STR, CATEGORY) else str.rjust for dtype in dtypes]
 
-        rows = self.format_sequence(rows, kind='tr')
-        return self.html_table_format.format(header, rows)
+        buffer = io.StringIO()
+        buffer.write(' ' * index_width)
+        for value, width, align in zip(header, widths, justify):
+            buffer.write(self.separator)
+            buffer.write(align(value, width))
+        for label, row in zip(labels, rows):
+            buffer.write('\n')
+            buffer.write(label.ljust(index_width))
+            for value, width, align in zip(row, widths, justify):
+                buffer.write(self.separator)
+                buffer.write(align(value, width))
+        if len(labels) < table.shape[0] or len(header) < table.shape[1]:
+            buffer.write('\n\n[{} rows x {} columns]'.format(*table.shape))
+        return buffer.getvalue()
@@ -0,0 +1,175 @@
+"""Group-by of the rows of a :class:`MappedTable`, by columns or by levels of the index.
+
+Usage::
+
+    table.groupby('continent').agg({'lifeExp': 'mean', 'pop': ['sum', 'max']})
+    table.set_index(['continent', 'country']).groupby(level='continent').sum()
+    # aggregates updated when rows are appended, see views
+    view = table.groupby('continent').materialize({'pop': 'sum'})
+"""
+from typing import Callable, Dict, Iterator, List, Tuple, Union, TYPE_CHECKING
+from .aggregation import get_aggregation
+from .mapped_sequence import MappedSequence
+from .multi_index import level_names
+from .utils import is_scalar
+
+if TYPE_CHECKING:
+    from .views import GroupView
+
+
+class GroupBy:
+    """Rows of a table grouped by key, built by :meth:`MappedTable.groupby`
+
+    Groups are computed once, on first use, from the grouping kernel of the backend for a single column, or from the
+    codes of the levels of the index.
+    """
+
+    def __init__(self, table, by=None, level=None, sort: bool = True):
+        assert (by is None) != (level is None), 'either by or level should be given'
+        self.table = table
+        self.sort = sort
+        # levels as given, see materialize
+        self._level = level
+        if by is not None:
+            self.by = [by] if is_scalar(by) else list(by)
+            assert all([col in table.columns for col in self.by]), \
+                'by should be in columns, expected {}, got {}'.format(table.columns, by)
+            self.level = None
+            # name of the index of the results
+            self.name = self.by[0] if len(self.by) == 1 else tuple(self.by)
+        else:
+            self.by = None
+            multi_index = table.index.multi_index()
+            if multi_index is None:
+                assert level in (0, -1, table.index.name), \
+                    'level should be 0 or the name of the index, got {} instead'.format(level)
+                self.level = (0,)
+                self.name = table.index.name
+            else:
+                names = level_names(table.index.name, multi_index.nlevels)
+                self.level = multi_index.level_numbers(level, names)
+                self.name = names[self.level[0]] if len(self.level) == 1 else tuple([names[i] for i in self.level])
+        self._groups = None
+
+    @property
+    def groups(self) -> Dict:
+        """Positions of the rows of each group. Keys are tuples when grouping by several columns or levels."""
+        if self._groups is None:
+            table = self.table
+            if self.by is not None and len(self.by) == 1:
+                groups = table.column_values[self.by[0]].group_positions()
+            elif self.by is not None:
+                groups = {}
+                for position, key in enumerate(table._row_keys(self.by)):
+                    group = groups.get(key)
+                    if group is None:
+                        groups[key] = [position]
+                    else:
+                        group.append(position)
+            elif table.index.multi_index() is None:
+                groups = table.index.group_positions()
+            else:
+                groups = table.index.multi_index().groups(self.level)
+                if len(self.level) == 1:
+                    groups = {key[0]: positions for key, positions in groups.items()}
+            if self.sort:
+                # avoid importing at module level, which would create a circular import
+                from .mapped_table import _sorted_keys
+                groups = {key: groups[key] for key in _sorted_keys(groups)}
+            self._groups = groups
+        return self._groups
+
+    def __len__(self):
+        return len(self.groups)
+
+    def __iter__(self) -> Iterator[Tuple]:
+        """Iterate over the pairs (key, table of the rows of the group)"""
+        for key, positions in self.groups.items():
+            yield key, self.table._take(positions)
+
+    def _value_columns(self) -> list:
+        return [col for col in self.table.columns if self.by is None or col not in self.by]
+
+    def _specs(self, func) -> List[Tuple]:
+        """(column, aggregation, name of the result column) of each aggregation"""
+        if isinstance(func, dict):
+            items = list(func.items())
+        else:
+            items = [(col, func) for col in self._value_columns()]
+        specs = []
+        for col, funcs in items:
+            assert col in self.table.columns, 'columns should be in columns, expected {}, got {}'.format(
+                self.table.columns, col)
+            if type(funcs) is list:
+                specs.extend([(col, item, (col, _func_name(item))) for item in funcs])
+            else:
+                specs.append((col, funcs, col))
+        return specs
+
+    def agg(self, func: Union[str, Callable, list, dict]):
+        """Aggregate the values of each group.
+
+        Parameters
+        ----------
+        func: Union[str, Callable, list, dict]
+            Name of an aggregation (see :mod:`aggregation`) or callable applied on the list of values of a group,
+            applied on all columns that are not keys. A list of aggregations names the result columns
+            (column, aggregation). A dictionary gives the aggregation, or list of aggregations, of some columns.
+
+        Returns
+        -------
+        MappedTable
+        One row per group, indexed by the keys of the groups
+        """
+        from .mapped_table import MappedTable
+        if type(func) is list:
+            func = {col: func for col in self._value_columns()}
+        specs = self._specs(func)
+        groups = list(self.groups.values())
+        new_values = []
+        for col, agg_func, _ in specs:
+            column = self.table.column_values[col]
+            agg_func = get_aggregation(agg_func, column.dtype)
+            values = column.values()
+            new_values.append([agg_func([values[i] for i in positions]) for positions in groups])
+        index = MappedSequence(list(self.groups), name=self.name)
+        return MappedTable(values=new_values, columns=[name for _, _, name in specs], index=index, axis=1)
+
+    aggregate = agg
+
+    def materialize(self, func: Union[str, Callable, list, dict]) -> 'GroupView':
+        """Aggregate the values of each group into a view updated incrementally when rows are appended to it, see
+        :mod:`views`. The arguments are those of :meth:`agg`, and `view.table` is laid out as its result."""
+        from .views import GroupView
+        return GroupView(self.table, by=self.by, level=self._level, func=func, sort=self.sort)
+
+    def size(self) -> MappedSequence:
+        """Number of rows of each group"""
+        return MappedSequence([len(positions) for positions in self.groups.values()], keys=list(self.groups),
+                              name='size')
+
+    def sum(self):
+        return self.agg('sum')
+
+    def mean(self):
+        return self.agg('mean')
+
+    def std(self):
+        return self.agg('std')
+
+    def median(self):
+        return self.agg('median')
+
+    def min(self):
+        return self.agg('min')
+
+    def max(self):
+        return self.agg('max')
+
+    def count(self):
+        """Number of values that are not None of each column in each group"""
+        return self.agg('count')
+
+
+def _func_name(func: Union[str, Callable]) -> str:
+    return func if isinstance(func, str) else getattr(func, '__name__', repr(func))
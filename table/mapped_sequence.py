@@ -1,25 +1,80 @@
-from collections import Sequence, OrderedDict
-from typing import Union, Tuple, Any
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import Union, Tuple, Any, Optional, Callable
 import types
 import functools
-from .utils import is_scalar
+import weakref
+from .utils import is_scalar, getsizeof
+from . import cache, profiling
+from .backend import get_backend
+from .stats import ColumnStats, column_stats
+from .dtypes import infer_dtype, check_dtype, SCALAR, OBJECT, BOOL, INT, FLOAT, STR, CATEGORY
+from .multi_index import MultiIndex, from_keys
+
+
+# dtypes whose digests differ whenever the values differ, see MappedSequence._digest
+_EXACT_DTYPES = (INT, FLOAT, BOOL, STR, CATEGORY)
+# marker of missing cache entries, as None is a valid memoized value
+_MISSING = object()
+
+
+class _Positions(dict):
+    """Position of each key of a keys tuple, shared by the sequences of the same keys object"""
+    __slots__ = ['key_tuple', '__weakref__']
+
+
+# id of a keys tuple -> its positions, kept as long as a sequence memoizes them. Tuples can not be weakly referenced,
+# the positions hold their keys instead, so that the id is not reused while the entry lives.
+_shared_positions = weakref.WeakValueDictionary()
 
 
 def memoize(func):
-    """Memoize decorator for instance methods that take no arguments."""""
+    """Memoize decorator for instance methods that take no arguments.
+
+    Results are kept in the per-instance _cache. When a cache budget is set (see :mod:`cache`), results are also
+    registered globally and the least recently used ones are evicted once the budget is exceeded.
+    """""
+    name = func.__name__
 
     @functools.wraps(func)
     def inner(self):
         """Return memoized values"""
-
-        if self._cache.get(func.__name__) is None:
-            self._cache[func.__name__] = func(self)
-            # print(inner.memo)
-        return self._cache.get(func.__name__)
+        value = self._cache.get(name, _MISSING)
+        if value is _MISSING:
+            if profiling.ENABLED:
+                profiling.count('cache_misses')
+            value = self._cache[name] = func(self)
+            if cache.BUDGET is not None:
+                cache.register(self, name, value)
+        else:
+            if profiling.ENABLED:
+                profiling.count('cache_hits')
+            if cache.BUDGET is not None:
+                cache.touch(self, name)
+        return value
 
     return inner
 
 
+def _map_chunks(func: Callable, columns: list, chunksize: Optional[int], make_batch: Callable) -> list:
+    """Call func on batches of chunksize rows of columns, built by make_batch from the list of column chunks, and
+    concatenate the results"""
+    length = len(columns[0]) if columns else 0
+    chunksize = chunksize or max(length, 1)
+    results = []
+    for start in range(0, length, chunksize):
+        chunk_results = func(make_batch([column[start:start + chunksize] for column in columns]))
+        if hasattr(chunk_results, 'tolist'):
+            # numpy arrays
+            chunk_results = chunk_results.tolist()
+        chunk_results = list(chunk_results)
+        assert len(chunk_results) == min(chunksize, length - start), \
+            'func should return one result per row, got {} results for {} rows'.format(
+                len(chunk_results), min(chunksize, length - start))
+        results.extend(chunk_results)
+    return results
+
+
 class MappedSequence(Sequence):
     """
     A generic container for immutable data that can be accessed either by
@@ -33,15 +88,14 @@ class MappedSequence(Sequence):
         A sequence of values.
     :param keys:
         A sequence of keys.
+    :param dtype:
+        Type tag of the values (see :mod:`dtypes`). If None, it is inferred on first use.
     """
-    __slots__ = ['_values', '_keys', '_name', '_cache', '_scalar']
+    __slots__ = ['_values', '_keys', '_name', '_cache', '_dtype', '__weakref__']
 
-    def __init__(self, values, keys=None, name=None):
+    def __init__(self, values, keys=None, name=None, dtype: Optional[str] = None):
         self._values = tuple(values)
-        if all([is_scalar(value) for value in self._values]):
-            self._scalar = True
-        else:
-            self._scalar = False
+        self._dtype = None if dtype is None else check_dtype(dtype)
 
         if keys is not None:
             assert len(values) == len(keys), 'values and keys should have the same length, got {} and {}'.format(
@@ -64,7 +118,8 @@ class MappedSequence(Sequence):
         return {
             '_values': self._values,
             '_keys': self._keys,
-            '_name': self._name
+            '_name': self._name,
+            '_dtype': self._dtype,
         }
 
     def __setstate__(self, data):
@@ -76,6 +131,8 @@ class MappedSequence(Sequence):
         self._values = data['_values']
         self._keys = data['_keys']
         self._name = data['_name']
+        self._dtype = data.get('_dtype')
+        self._cache = dict()
 
     def __unicode__(self):
         """
@@ -84,8 +141,8 @@ class MappedSequence(Sequence):
         if len(self) <= 10:
             sample = ', '.join(repr(d) for d in self.values())
         else:
-            sample = u', '.join(repr(d) for d in self.values()[:3])
-            sample += ', ...,' + ', '.join(repr(d) for d in self.values()[-3:])
+            sample = u', '.join(repr(d) for d in self._values[:3])
+            sample += ', ...,' + ', '.join(repr(d) for d in self._values[-3:])
 
         return u'{}: ({})'.format(self._name, sample)
 
@@ -98,9 +155,9 @@ class MappedSequence(Sequence):
 
     def __repr__(self):
         if len(self) > 11:
-            rows = [f"{index}\t{value}" for value, index in zip(self.values()[:5], self.keys()[:5])]
+            rows = [f"{index}\t{value}" for value, index in zip(self._values[:5], self.keys()[:5])]
             rows += ['...\t...']
-            rows += [f"{index}\t{value}" for value, index in zip(self.values()[-5:], self.keys()[-5:])]
+            rows += [f"{index}\t{value}" for value, index in zip(self._values[-5:], self.keys()[-5:])]
         else:
             rows = [f"{index}\t{value}" for value, index in zip(self.values(), self.keys())]
         rows = '\n'.join(rows)
@@ -108,7 +165,7 @@ class MappedSequence(Sequence):
         return rows + '\n' + footer
 
     def _get_sequence_from_indices(self, indices):
-        values = self.values()
+        values = self._values
         keys = self.keys()
 
         # if the list has only one item, it should return a sequence anyway
@@ -123,11 +180,12 @@ class MappedSequence(Sequence):
                 new_keys.append(keys[i])
                 new_values.append(values[i])
 
-        return MappedSequence(new_values, new_keys, name=self._name)
+        return MappedSequence(new_values, new_keys, name=self._name, dtype=self._dtype)
 
     def __getitem__(self, item) -> Union['MappedSequence', Any]:
         """
-        Retrieve values from this array by index, list of index, slice or key.
+        Retrieve values from this array by index, list of index, slice or key. When the keys are tuples of several
+        levels, a partial key giving the labels of the first levels retrieves the values of all matching keys.
         """
         if isinstance(item, slice):
             indices = range(*item.indices(len(self)))
@@ -135,23 +193,28 @@ class MappedSequence(Sequence):
 
         elif type(item) is list or isinstance(item, MappedSequence):
 
-            item_in_keys = [k in self.keys() for k in item]
+            positions = self._positions()
+            item_in_keys = [k in positions for k in item]
             # in the case the list contains numerical index that does not match the keys
-            if all([type(k) is int and k not in self.keys() for k in item]):
+            if all([type(k) is int and k not in positions for k in item]):
                 return self._get_sequence_from_indices(item)
             # in the case the list contains directly the keys of the sequence
             elif all(item_in_keys):
-                keys = self.keys()
-                indices = [keys.index(k) for k in item]
+                indices = [positions[k] for k in item]
                 return self._get_sequence_from_indices(indices)
             else:
                 raise KeyError
 
         # Note: can't use isinstance because bool is a subclass of int
-        elif type(item) is int and item not in self.keys():
-            return self.values()[item]
+        elif type(item) is int and item not in self._positions():
+            return self._values[item]
         else:
-            return self.dict()[item]
+            position = self._positions().get(item)
+            if position is None:
+                if self.multi_index() is None:
+                    raise KeyError(item)
+                return self.xs(item)
+            return self._values[position]
 
     def __setitem__(self, key, value):
         """
@@ -163,11 +226,10 @@ class MappedSequence(Sequence):
         """
         Iterate over values.
         """
-        return iter(self.values())
+        return iter(self._values)
 
-    @memoize
     def __len__(self):
-        return len(self.values())
+        return len(self._values)
 
     def __eq__(self, other):
         """
@@ -175,6 +237,14 @@ class MappedSequence(Sequence):
         """
         if not isinstance(other, Sequence):
             return False
+        if len(self) != len(other):
+            return False
+        # digests are only compared when both are already computed, as computing them costs a pass over the values
+        if isinstance(other, MappedSequence) and '_digest' in self._cache and '_digest' in other._cache \
+                and self.dtype == other.dtype:
+            (digest, exact), (other_digest, other_exact) = self._digest(), other._digest()
+            if exact and other_exact and digest != other_digest:
+                return False
 
         return self.values() == tuple(other)
 
@@ -188,16 +258,52 @@ class MappedSequence(Sequence):
         """
         Lower than test with other sequences
         """
-        return self._values < other.values()
+        return self.values() < other.values()
 
     def __gt__(self, other: 'MappedSequence'):
         """
         Greater than test with other sequences
         """
-        return self._values > other.values()
+        return self.values() > other.values()
 
     def __contains__(self, value):
-        return self.values().__contains__(value)
+        return self._values.__contains__(value)
+
+    def clear_cache(self):
+        """Drop the memoized results"""
+        if cache.BUDGET is not None:
+            cache.unregister(self)
+        self._cache.clear()
+
+    def cache_info(self) -> dict:
+        """Estimated cost in bytes of each memoized result"""
+        return {name: cache.entry_cost(value) for name, value in self._cache.items()}
+
+    def _memory_usage(self, deep: bool = True, seen=None) -> Tuple[int, int, int]:
+        return (getsizeof(self._values, seen, deep), getsizeof(self._keys, seen, deep),
+                getsizeof(self._cache, seen, deep))
+
+    def memory_usage(self, deep: bool = True) -> 'MappedSequence':
+        """
+        Memory used by the values, the keys and the cache of the sequence, in bytes.
+
+        :param deep:
+            If False, only the containers are measured, otherwise the size of the objects they hold is included.
+            Objects shared between values and keys are only counted once.
+        """
+        return MappedSequence(self._memory_usage(deep, set()), keys=('values', 'keys', 'cache'), name=self._name)
+
+    @property
+    def dtype(self) -> str:
+        """Type tag of the values, inferred in a single pass on first use"""
+        if self._dtype is None:
+            self._dtype = infer_dtype(self._values)
+        return self._dtype
+
+    @property
+    def _scalar(self) -> bool:
+        """Whether no value is itself a sequence, only checked value by value for object columns"""
+        return self.dtype in SCALAR or all([is_scalar(value) for value in self._values])
 
     def keys(self) -> tuple:
         """
@@ -211,11 +317,66 @@ class MappedSequence(Sequence):
         """
         return self._values
 
-    def __hash__(self):
-        """Hashed value correspond"""
-        return hash(self._values)
+    @memoize
+    def _monotonic(self) -> Tuple[bool, bool]:
+        """Whether the values are non-decreasing and non-increasing. Values that cannot be compared are neither."""
+        values = self._values
+        try:
+            increasing = all(a <= b for a, b in zip(values, values[1:]))
+            decreasing = all(a >= b for a, b in zip(values, values[1:]))
+        except TypeError:
+            return False, False
+        return increasing, decreasing
+
+    @memoize
+    def stats(self) -> ColumnStats:
+        """Statistics of the values (count, null count, min, max, distinct count and sortedness), computed once and
+        cached"""
+        return column_stats(self)
+
+    def is_sorted(self, ascending: bool = True) -> bool:
+        """Whether the values are sorted, checked once in a single pass and cached"""
+        return self._monotonic()[0 if ascending else 1]
 
     @memoize
+    def _digest(self) -> Tuple[int, bool]:
+        """Stable digest of the dtype and of the values, and whether different digests imply different values.
+
+        Values are encoded by their repr, floats being normalized so that 1 and 1.0, or 0.0 and -0.0, are encoded
+        alike. The repr of int, bool, str and float values is canonical, so that the digest of their dtypes is exact.
+        """
+        # hashlib is only imported when used, as it is slow to import
+        import hashlib
+        dtype = self.dtype
+        values = self._values
+        if dtype == FLOAT:
+            values = tuple([None if value is None else value + 0. for value in values])
+        text = repr((dtype, values))
+        digest = hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=8).digest()
+        return int.from_bytes(digest, 'big', signed=True), dtype in _EXACT_DTYPES
+
+    def digest(self) -> int:
+        """Content digest of the dtype and of the values, computed once and cached.
+
+        The digest is a blake2b hash of a canonical encoding of the values, which is the same across processes for
+        values whose repr does not depend on the process, such as numbers, strings and dates.
+        """
+        return self._digest()[0]
+
+    @memoize
+    def _hash(self) -> Optional[int]:
+        try:
+            return hash(self._values)
+        except TypeError:
+            return None
+
+    def __hash__(self):
+        """Hash of the values, computed once and cached"""
+        value = self._hash()
+        if value is None:
+            raise TypeError('unhashable values in MappedSequence {}'.format(self._name))
+        return value
+
     def items(self) -> Tuple[Tuple[Any, Any]]:
         """
         Equivalent to :meth:`collections.OrderedDict.items`.
@@ -230,15 +391,60 @@ class MappedSequence(Sequence):
         """
         Equivalent to :meth:`collections.OrderedDict.get`.
         """
-        try:
-            return self.dict()[key]
-        except KeyError:
-            if default:
-                return default
-            else:
-                return None
+        position = self._positions().get(key)
+        if position is None:
+            return default
+        return self._values[position]
+
+    @memoize
+    def _positions(self) -> dict:
+        """
+        Position of each key, used for lookups by key. Unlike :meth:`dict`, it does not hold a copy of the values.
+
+        The positions are built once per keys object, so that all the columns of a table share those of the index.
+        With duplicate keys, the position of the first occurrence is kept.
+        """
+        keys = self._keys
+        positions = _shared_positions.get(id(keys))
+        if positions is None or positions.key_tuple is not keys:
+            positions = _Positions()
+            positions.key_tuple = keys
+            for position, key in enumerate(keys):
+                positions.setdefault(key, position)
+            _shared_positions[id(keys)] = positions
+        return positions
 
     @memoize
+    def multi_index(self) -> Optional[MultiIndex]:
+        """Levels of the keys when they are tuples of the same length, None otherwise. Built once and cached."""
+        return from_keys(self._keys)
+
+    def xs(self, key, level=None, drop_level: bool = True) -> 'MappedSequence':
+        """Values of the keys matching a partial key, see :meth:`MultiIndex.get_locs`
+
+        Parameters
+        ----------
+        key:
+            Label, or tuple of labels
+        level:
+            Position of the level, or list of positions of the levels, of the labels of key. By default, key gives
+            the labels of the first levels.
+        drop_level: bool
+            Remove the levels of key from the keys of the result, unless key gives all levels
+        """
+        multi_index = self.multi_index()
+        assert multi_index is not None, 'keys should be tuples of several levels'
+        levels = None if level is None else multi_index.level_numbers(level)
+        positions = multi_index.get_locs(key, levels)
+        if levels is None:
+            levels = range(len(key) if type(key) is tuple else 1)
+        values = self._values
+        if drop_level and len(levels) < multi_index.nlevels:
+            keys = multi_index.droplevel(levels, positions)
+        else:
+            keys = [self._keys[i] for i in positions]
+        return MappedSequence([values[i] for i in positions], keys=keys, name=self._name, dtype=self._dtype)
+
     def dict(self):
         """
         Retrieve the contents of this sequence as an
@@ -251,8 +457,108 @@ class MappedSequence(Sequence):
 
     @memoize
     def unique(self) -> tuple:
-        """Retrieve unique set of values in the mapped_sequence"""
-        return tuple(set(self._values))
+        """Retrieve unique values in the mapped_sequence, in order of first occurrence"""
+        return tuple(dict.fromkeys(self._values))
+
+    @memoize
+    def _array(self):
+        """Typed array of the values viewed by the current backend, None if the values are not all numeric"""
+        backend = get_backend()
+        return backend.name, backend.to_array(self._values, self.dtype)
+
+    def array(self):
+        """Typed array of the values (array.array or numpy.ndarray, depending on the backend) of int and float
+        columns without None, None for other columns.
+
+        The values stay stored as a tuple, the typed array being memoized aside.
+        """
+        name, data = self._array()
+        if name != get_backend().name:
+            # the backend changed since the array was memoized
+            self._cache.pop('_array', None)
+            name, data = self._array()
+        return data
+
+    def sum(self):
+        """Sum of the values that are not None"""
+        return get_backend().reduce('sum', self._values, self.array())
+
+    def mean(self):
+        """Mean of the values that are not None"""
+        return get_backend().reduce('mean', self._values, self.array())
+
+    def min(self):
+        """Minimum of the values that are not None"""
+        return get_backend().reduce('min', self._values, self.array())
+
+    def max(self):
+        """Maximum of the values that are not None"""
+        return get_backend().reduce('max', self._values, self.array())
+
+    def compare(self, op: str, other) -> 'MappedSequence':
+        """Element-wise comparison with a scalar
+
+        Parameters
+        ----------
+        op: str
+            One of '==', '!=', '<', '<=', '>', '>='. None values are never ordered, and only equal None.
+        other:
+            Scalar compared to the values
+
+        Returns
+        -------
+        MappedSequence
+        Booleans with the same keys
+        """
+        mask = get_backend().compare(self._values, op, other, self.array())
+        return MappedSequence(mask, keys=self._keys, name=self._name)
+
+    def argsort(self, ascending: bool = True) -> list:
+        """Positions that sort the values, equal values keeping their order. None values are placed last, and object
+        values of different types are grouped by type name."""
+        data = self.array()
+        if data is not None or (self.null_count() == 0 and self.dtype != OBJECT):
+            return get_backend().argsort(self._values, ascending, data)
+
+        if self.dtype == OBJECT:
+            def sort_key(position):
+                value = self._values[position]
+                return type(value).__name__, value
+        else:
+            sort_key = self._values.__getitem__
+        positions = [i for i, value in enumerate(self._values) if value is not None]
+        try:
+            positions.sort(key=sort_key, reverse=not ascending)
+        except TypeError:
+            positions.sort(key=lambda position: repr(self._values[position]), reverse=not ascending)
+        return positions + [i for i, value in enumerate(self._values) if value is None]
+
+    def group_positions(self) -> dict:
+        """Positions of each distinct value, in order of first occurrence"""
+        return get_backend().group_positions(self._values, self.array())
+
+    def value_counts(self, normalize: bool = False, sort: bool = True) -> 'MappedSequence':
+        """Count the occurrences of each value
+
+        Parameters
+        ----------
+        normalize: bool
+            Return proportions instead of counts
+        sort: bool
+            Sort by descending count, otherwise values are in order of first occurrence
+
+        Returns
+        -------
+        MappedSequence
+        Counts indexed by the values
+        """
+        items = [(key, len(positions)) for key, positions in self.group_positions().items()]
+        if sort:
+            items.sort(key=lambda item: item[1], reverse=True)
+        if normalize:
+            total = len(self._values)
+            items = [(key, count / total) for key, count in items]
+        return MappedSequence([count for _, count in items], keys=[key for key, _ in items], name=self._name)
 
     def reindex(self, index):
         """Reindex
@@ -268,7 +574,7 @@ class MappedSequence(Sequence):
         if self._scalar:
             return MappedSequence(
                 values=tuple(self.get(value, None) for value in index),
-                keys=index, name=self.name
+                keys=index, name=self.name, dtype=self._dtype
             )
         else:
             raise KeyError
@@ -276,13 +582,76 @@ class MappedSequence(Sequence):
     def to_list(self):
         return list(self.values())
 
+    @memoize
+    def null_count(self) -> int:
+        """Number of None values"""
+        return self._values.count(None)
+
+    @memoize
+    def null_mask(self) -> bytes:
+        """Null bitmap holding one byte per value, set to 1 when the value is None"""
+        if self.null_count() == 0:
+            return bytes(len(self._values))
+        return bytes([value is None for value in self._values])
+
     def isnone(self):
-        new_values = [value is None for value in self.values()]
-        return MappedSequence(values=new_values, keys=self.keys(), name=self.name)
+        new_values = [bool(flag) for flag in self.null_mask()]
+        return MappedSequence(values=new_values, keys=self.keys(), name=self.name, dtype=BOOL)
+
+    def notnone(self):
+        new_values = [not flag for flag in self.null_mask()]
+        return MappedSequence(values=new_values, keys=self.keys(), name=self.name, dtype=BOOL)
 
-    def fillnone(self, value):
-        return MappedSequence([value if item is None else item for item in self.values()],
-                              keys=self.keys(), name=self.name)
+    def fillnone(self, value=None, method: Optional[str] = None):
+        """Fill None values
+
+        Parameters
+        ----------
+        value:
+            Value replacing None
+        method: Optional[str]
+            'ffill' to propagate the last value that is not None forward, 'bfill' to use the next one instead.
+        """
+        assert method in (None, 'ffill', 'bfill'), 'method should be None, ffill or bfill, got {}'.format(method)
+        if self.null_count() == 0:
+            return self
+        if method is None:
+            new_values = [value if item is None else item for item in self._values]
+        else:
+            values = self._values if method == 'ffill' else reversed(self._values)
+            new_values = []
+            last = None
+            for item in values:
+                if item is None:
+                    item = last
+                else:
+                    last = item
+                new_values.append(item)
+            if method == 'bfill':
+                new_values.reverse()
+        return MappedSequence(new_values, keys=self.keys(), name=self.name)
+
+    def map(self, func: Callable, batch: bool = False, chunksize: Optional[int] = None) -> 'MappedSequence':
+        """Apply func on the values
+
+        Parameters
+        ----------
+        func: Callable
+            Function of a value, or of a chunk of values when batch is True
+        batch: bool
+            If True, func is called on tuples of up to chunksize consecutive values and should return as many results
+        chunksize: Optional[int]
+            Number of values of each chunk, all values by default
+
+        Returns
+        -------
+        MappedSequence
+        Results indexed by the keys of the sequence
+        """
+        if not batch:
+            return MappedSequence([func(value) for value in self._values], keys=self._keys, name=self._name)
+        return MappedSequence(_map_chunks(func, [self._values], chunksize, lambda chunks: chunks[0]),
+                              keys=self._keys, name=self._name)
 
     def where(self, target_or_func):
         def compare(x):
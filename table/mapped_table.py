@@ -1,20 +1,29 @@
 import types
-from typing import Iterable, Optional, Union, List, Sequence
-from functools import partial
-from openpyxl import load_workbook
-from .mapped_sequence import MappedSequence
-from .aggregation import mean_aggregate
-from .formatter import HtmlFormatter
-from .utils import is_iterable, is_scalar
+from typing import Iterable, Optional, Union, List, Sequence, Callable, Tuple, Any, Mapping, TYPE_CHECKING
+from itertools import chain, repeat
+from .mapped_sequence import MappedSequence, _map_chunks
+from .aggregation import get_aggregation
+from .backend import get_backend
+from .formatter import HtmlFormatter, TextFormatter
+from .profiling import instrument
+from .stats import ColumnStats, may_match, all_match
+from .dtypes import check_dtype
+from .multi_index import MultiIndex, level_names, drop_names
+from . import profiling
+from .utils import is_iterable, is_scalar, Interner, getsizeof, REFERENCE_SIZE
+
+if TYPE_CHECKING:
+    from .groupby import GroupBy
+    from .views import PivotView
 
 
 class MappedTable:
     """A generic container for immutable 2-dimensional data"""
 
-    __slots__ = ['_column_values', '_row_values', '_index', '_columns']
+    __slots__ = ['_column_values', '_row_values', '_index', '_columns', '_sorted_by', '_schema']
 
     def __init__(self, values: Sequence[Sequence], columns: Sequence[str], index: Optional[Iterable] = None,
-                 axis=0):
+                 axis=0, schema: Optional[Union[Mapping, Sequence[Optional[str]]]] = None):
         """
 
         Parameters
@@ -22,19 +31,29 @@ class MappedTable:
         values: Iterable[Iterable]
             Typically 2D-nested list of rows
         columns: Iterable
-            List of the names of the columns
+            List of the names of the columns. Tuples of the same length are the keys of several levels, see
+            :meth:`xs`. The name of a MappedSequence of columns is kept, such as the tuple of the names of its levels.
         index : Optional[Iterable]
-            List of the names of the rows
+            List of the names of the rows, keeping the name of a MappedSequence like columns
         axis: int
             Orientation of the values. If axis = 0, values are Iterable of rows. If axis = 1, values are Iterable of
             columns.
+        schema: Optional[Union[Mapping, Sequence[Optional[str]]]]
+            dtype tags of the columns (see :mod:`dtypes`), as a mapping from column names or as a sequence aligned with
+            the columns. The dtype of the columns that are not declared, or declared as None, is inferred on first use.
         """
         # index and columns are also used as keys to ease slicing.
-        self._columns = MappedSequence(columns, columns)
+        # They are converted to tuples once, so that all rows and columns share the same keys object.
+        columns_name = columns.name if isinstance(columns, MappedSequence) else None
+        index_name = index.name if isinstance(index, MappedSequence) else None
+        columns = tuple(columns)
+        self._columns = MappedSequence(columns, columns, name=columns_name)
+        self._schema = _schema_dtypes(columns, schema)
 
         if axis == 0:
             if index is None:
                 index = range(len(values))
+            index = tuple(index)
             row_values = [MappedSequence(value, keys=columns, name=idx) for idx, value in zip(index, values)]
             row_values = MappedSequence(row_values, keys=index)
             column_values = None
@@ -42,20 +61,44 @@ class MappedTable:
         else:
             if index is None:
                 index = range(len(values[0]))
-            column_values = [MappedSequence(value, keys=index, name=col) for col, value in zip(columns, values)]
+            index = tuple(index)
+            # columns that are already sequences of this index are shared, along with their memoized results
+            dtypes = self._schema or (None,) * len(columns)
+            column_values = [value if type(value) is MappedSequence and value.name == col and value.keys() == index
+                             and dtype in (None, value._dtype)
+                             else MappedSequence(value, keys=index, name=col, dtype=dtype)
+                             for col, value, dtype in zip(columns, values, dtypes)]
             column_values = MappedSequence(column_values, keys=columns)
             row_values = None
 
-        self._index = MappedSequence(index, index)
+        self._index = MappedSequence(index, index, name=index_name)
 
         # Store as MappedSequence of columns
         self._column_values = column_values
         # Store as MappedSequence of rows
         self._row_values = row_values
+        # (columns, ascending) the rows are known to be sorted by, see sorted_by
+        self._sorted_by = None
+
+    def __getstate__(self):
+        """
+        Return state values to be pickled.
+        """
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __setstate__(self, data):
+        """
+        Restore pickled state.
+        """
+        self._sorted_by = None
+        self._schema = None
+        for slot, value in data.items():
+            setattr(self, slot, value)
 
     @classmethod
+    @instrument
     def from_excel(cls, file_path, header: Optional[Union[int, Iterable[int]]] = 0,
-                   sheetname: Optional[str] = None, skiprows: Optional[int] = None):
+                   sheetname: Optional[Union[str, int]] = None, skiprows: Optional[int] = None, intern: bool = True):
         """
 
         Parameters
@@ -63,29 +106,47 @@ class MappedTable:
         file_path: path to excel file
         header: Optional[Union[int, Iterable[int]]]
             If header is None, the columns are defined as a sequence of integers.
-        sheetname: Optional[str]
-            Name of the sheet to parse. If None, the first will used instead.
+        sheetname: Optional[Union[str, int]]
+            Name or position of the sheet to parse. If None, the first will used instead.
         skiprows: Optional[int]
+        intern: bool
+            Share a single object between equal values, which reduces memory when values are repeated.
 
         Returns
         -------
 
         """
         # Get workbook
-        workbook = load_workbook(file_path, data_only=True)
-        # Handle sheetname
-        # By default, parse the first sheet in the excel
-        if sheetname is None:
-            sheetname = workbook.sheetnames[0]
-        sheet = workbook[sheetname]
+        from openpyxl import load_workbook
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            # Handle sheetname
+            # By default, parse the first sheet in the excel
+            if sheetname is None:
+                sheetname = 0
+            if type(sheetname) is int:
+                sheetname = workbook.sheetnames[sheetname]
+            return cls._from_sheet(workbook[sheetname], header=header, skiprows=skiprows, intern=intern)
+        finally:
+            workbook.close()
 
+    @classmethod
+    def _from_sheet(cls, sheet, header: Optional[Union[int, Iterable[int]]] = 0, skiprows: Optional[int] = None,
+                    intern: bool = True):
+        """Parse an openpyxl worksheet, see :meth:`from_excel`. The rows of the sheet are read only once."""
         # Read all rows of the sheet
-
         if skiprows is None:
             skiprows = 0
         else:
             skiprows += 1
-        values = [row for n, row in enumerate(sheet.iter_rows(values_only=True, min_row=skiprows))]
+        # repeated values are stored as separate objects by openpyxl, deduplicate them
+        interner = Interner() if intern else None
+        values = [row if interner is None else tuple(map(interner, row))
+                  for row in sheet.iter_rows(values_only=True, min_row=skiprows)]
+        # read-only worksheets omit the trailing empty cells of a row when the sheet does not record its dimensions,
+        # pad all rows, header rows included, to the widest row
+        width = max([len(row) for row in values], default=0)
+        values = [row if len(row) == width else row + (None,) * (width - len(row)) for row in values]
 
         # Handle header
         # If none, the header is simply a numeric index
@@ -94,15 +155,11 @@ class MappedTable:
 
         elif is_iterable(header):
             # header is a list of tuple
-            columns = list(
-                zip(*[row for row in sheet.iter_rows(min_row=min(header) + skiprows, max_row=max(header) + 1 + skiprows,
-                                                     values_only=True)])
-            )
-            values = values[max(header):]
+            columns = list(zip(*values[min(header):max(header) + 1]))
+            values = values[max(header) + 1:]
 
         elif type(header) == int:
-            columns = [row for row in
-                       sheet.iter_rows(min_row=header + skiprows, max_row=header + 1 + skiprows, values_only=True)][0]
+            columns = values[header]
             values = values[header + 1:]
 
         else:
@@ -118,6 +175,40 @@ class MappedTable:
     def columns(self):
         return self._columns
 
+    @property
+    def sorted_by(self) -> Optional[Tuple[tuple, bool]]:
+        """Columns the rows are known to be sorted by and whether the order is ascending, or None if unknown.
+
+        The order is set by :meth:`sort_values` and kept by the operations that preserve it, such as row slicing,
+        :meth:`where`, projections and concatenations of ordered tables.
+        """
+        return self._sorted_by
+
+    def _with_order(self, sorted_by: Optional[Tuple[tuple, bool]]) -> 'MappedTable':
+        """Set the known order of the rows, keeping only the leading sort columns that are still in the table"""
+        if sorted_by is not None:
+            keys = []
+            for key in sorted_by[0]:
+                if key not in self.columns:
+                    break
+                keys.append(key)
+            sorted_by = (tuple(keys), sorted_by[1]) if keys else None
+        self._sorted_by = sorted_by
+        return self
+
+    def _is_sorted(self, keys: tuple, ascending: bool = True) -> bool:
+        """Whether the rows are known, or checked in a single pass for one column, to be sorted by keys"""
+        if self._sorted_by is not None:
+            sorted_keys, sorted_ascending = self._sorted_by
+            if sorted_ascending == ascending and sorted_keys[:len(keys)] == keys:
+                return True
+        return len(keys) == 1 and self.column_values[keys[0]].is_sorted(ascending)
+
+    @property
+    def dtypes(self) -> MappedSequence:
+        """dtype tag of each column, see :mod:`dtypes`"""
+        return MappedSequence([column.dtype for column in self.column_values], keys=self.columns.values())
+
     @property
     def values(self) -> 'MappedSequence':
         return self.column_values
@@ -126,17 +217,24 @@ class MappedTable:
     def row_values(self) -> 'MappedSequence[MappedSequence]':
         if self._row_values is None:
             # if row values is None, then _column_values holds the data
-            row_values = [MappedSequence(value, keys=self.columns, name=idx) for idx, *value in
+            if profiling.ENABLED:
+                profiling.count('transposes')
+            columns = self.columns.values()
+            row_values = [MappedSequence(value, keys=columns, name=idx) for idx, *value in
                           zip(self.index, *self._column_values)]
-            self._row_values = MappedSequence(row_values, keys=self.index)
+            self._row_values = MappedSequence(row_values, keys=self.index.values())
         return self._row_values
 
     @property
     def column_values(self):
         if self._column_values is None:
-            column_values = [MappedSequence(value, keys=self.index, name=col) for col, *value in
-                             zip(self.columns, *self._row_values)]
-            self._column_values = MappedSequence(column_values, keys=self.columns)
+            if profiling.ENABLED:
+                profiling.count('transposes')
+            index = self.index.values()
+            dtypes = self._schema or (None,) * len(self.columns)
+            column_values = [MappedSequence(value, keys=index, name=col, dtype=dtype) for (col, dtype), *value in
+                             zip(zip(self.columns, dtypes), *self._row_values)]
+            self._column_values = MappedSequence(column_values, keys=self.columns.values())
         return self._column_values
 
     @property
@@ -148,10 +246,9 @@ class MappedTable:
 
     def __str__(self):
         """
-        Print an ascii sample of the contents of this sequence.
+        Print an ascii sample of the contents of this table.
         """
-
-        return self.values.__str__()
+        return TextFormatter().format_table(self)
 
     def __repr__(self):
         return self.__str__()
@@ -160,6 +257,14 @@ class MappedTable:
         formatter = HtmlFormatter()
         return formatter.format_table(self)
 
+    def _get_rows(self, positions: Sequence[int], column_positions: Sequence[int]) -> List[tuple]:
+        """Read some cells from whichever orientation is stored, without transposing the table"""
+        if self._column_values is not None:
+            columns = [self._column_values.values()[j].values() for j in column_positions]
+            return [tuple(column[i] for column in columns) for i in positions]
+        rows = self._row_values.values()
+        return [tuple(rows[i].values()[j] for j in column_positions) for i in positions]
+
     def __getitem__(self, item):
         # 1-dimensional item
         if type(item) is slice:
@@ -167,13 +272,15 @@ class MappedTable:
             new_index = self.index[item]
             new_values = [value[item] for value in self.values]
             if isinstance(new_index, MappedSequence):
-                return MappedTable(values=new_values, index=new_index, columns=self.columns, axis=1)
+                table = MappedTable(values=new_values, index=new_index, columns=self.columns, axis=1)
+                return table._with_order(self._sorted_by if (item.step or 1) > 0 else None)
             else:
                 return MappedSequence(values=new_values, keys=self.columns, name=new_index)
         elif type(item) is list:
             # Get the corresponding columns
             values = self.values[item]  # getting MappedSequence
-            return MappedTable(values=values, columns=values.keys(), index=self.index, axis=1)
+            table = MappedTable(values=values, columns=values.keys(), index=self.index, axis=1)
+            return table._with_order(self._sorted_by)
 
         elif type(item) is tuple and len(item) == 2:
             new_columns = self.columns[item[1]]
@@ -184,7 +291,9 @@ class MappedTable:
             # When slicing multiple columns and multiple rows
             if sequence_colums and sequence_index:
                 new_values = [value[item[0]] for value in subset]
-                return MappedTable(values=new_values, columns=new_columns, index=new_index, axis=1)
+                table = MappedTable(values=new_values, columns=new_columns, index=new_index, axis=1)
+                ordered = type(item[0]) is slice and (item[0].step or 1) > 0
+                return table._with_order(self._sorted_by if ordered else None)
             # When slicing multiple columns but one rows
             elif sequence_colums and not sequence_index:
                 new_values = [value[item[0]] for value in subset]
@@ -200,9 +309,19 @@ class MappedTable:
                 raise KeyError
 
         else:
+            # partial keys of multi-level columns select all their sub-columns, integers remain positions
+            if (is_scalar(item) or type(item) is tuple) and type(item) is not int \
+                    and item not in self.columns._positions() and self.columns.multi_index() is not None:
+                try:
+                    return self.xs(item, axis=1)
+                except KeyError:
+                    pass
             return self.values[item]
 
     def __getattr__(self, k):
+        # private attributes are looked up before the slots are set, for instance when unpickling
+        if k.startswith('_'):
+            raise AttributeError(k)
         if k in self.columns:
             return self[k]
         else:
@@ -212,14 +331,114 @@ class MappedTable:
         return len(self.index)
 
     def __eq__(self, other: 'MappedTable') -> bool:
-        result = self.columns == other.columns
-        result &= self.values == other.values
-        return result
+        if not isinstance(other, MappedTable):
+            return False
+        # cheap checks first, then the digests of the columns when they are cached, and only then the cells
+        if self.shape != other.shape or self.columns != other.columns:
+            return False
+        columns, other_columns = self.column_values.values(), other.column_values.values()
+        if [column.dtype for column in columns] != [column.dtype for column in other_columns]:
+            return False
+        for column, other_column in zip(columns, other_columns):
+            # digests are only compared when both are already computed, as computing them costs more than comparing
+            if '_digest' not in column._cache or '_digest' not in other_column._cache:
+                continue
+            (digest, exact), (other_digest, other_exact) = column._digest(), other_column._digest()
+            if exact and other_exact and digest != other_digest:
+                return False
+        return all([column.values() == other_column.values() for column, other_column in zip(columns, other_columns)])
+
+    def fingerprint(self) -> int:
+        """Content fingerprint of the table, combining the shape, the columns and the cached digests of the index and
+        of each column.
+
+        Tables sharing columns, such as projections, reuse their digests, so that a fingerprint is cheap to compute
+        once the digests are known. Equal tables have equal fingerprints, and fingerprints are stable across processes,
+        see :meth:`MappedSequence.digest`.
+        """
+        import hashlib
+        columns = self.column_values.values()
+        text = repr((self.shape, self.columns.values(), [column.dtype for column in columns], self.index.digest(),
+                     [column.digest() for column in columns]))
+        digest = hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=8).digest()
+        return int.from_bytes(digest, 'big', signed=True)
+
+    def memory_usage(self, deep: bool = True) -> 'MappedTable':
+        """
+        Memory used by the table in bytes, broken down per storage component.
+
+        Parameters
+        ----------
+        deep: bool
+            If False, only the containers are measured, otherwise the size of the objects they hold is included.
+            Objects shared between several components, such as values held by both rows and columns, are counted
+            once, in the first component where they are found.
+
+        Returns
+        -------
+        MappedTable
+        One row per column of the table, then <index> and <columns> for the keys of the table and <rows> for the row
+        orientation, when it is stored. The columns are the values, keys, cache and total sizes. When only the rows
+        are stored, the values of a column are the references to its fields held by the rows and the objects they
+        refer to, <rows> holding the rest of the rows.
+        """
+        seen = set()
+        new_values = []
+        new_index = []
+        # keys shared by all rows and columns are attributed to the index and columns
+        index_usage = self._index._memory_usage(deep, seen)
+        columns_usage = self._columns._memory_usage(deep, seen)
+        if self._column_values is not None:
+            for column in self._column_values:
+                new_values.append(column._memory_usage(deep, seen))
+                new_index.append(column.name)
+        else:
+            rows = [row._values for row in self._row_values]
+            for j, col in enumerate(self.columns):
+                values_usage = sum([REFERENCE_SIZE + (getsizeof(row[j], seen, deep) if deep else 0) for row in rows])
+                new_values.append((values_usage, 0, 0))
+                new_index.append(col)
+
+        new_values.append(index_usage)
+        new_index.append('<index>')
+        if self._column_values is not None:
+            # the container of the columns
+            columns_usage = [a + b for a, b in zip(columns_usage, self._column_values._memory_usage(deep, seen))]
+        new_values.append(columns_usage)
+        new_index.append('<columns>')
+
+        if self._row_values is not None:
+            rows_usage = [0, 0, 0]
+            for row in self._row_values:
+                rows_usage = [a + b for a, b in zip(rows_usage, row._memory_usage(deep, seen))]
+            rows_usage = [a + b for a, b in zip(rows_usage, self._row_values._memory_usage(deep, seen))]
+            if self._column_values is None:
+                # the references to the fields are attributed to the columns
+                rows_usage[0] -= REFERENCE_SIZE * len(rows) * len(self.columns)
+            new_values.append(rows_usage)
+            new_index.append('<rows>')
+
+        new_values = [(*usage, sum(usage)) for usage in new_values]
+        return MappedTable(values=new_values, columns=['values', 'keys', 'cache', 'total'], index=new_index)
+
+    def compact(self) -> 'MappedTable':
+        """
+        Drop the row orientation when the column one is also stored, and clear the caches of all sequences.
+
+        The table is modified in place, without changing its content, and returned.
+        """
+        if self._column_values is not None and self._row_values is not None:
+            self._row_values = None
+        storage = self._column_values if self._column_values is not None else self._row_values
+        for sequence in (self._index, self._columns, storage, *storage):
+            sequence.clear_cache()
+        return self
 
     @property
     def shape(self):
         return len(self.index), len(self.columns)
 
+    @instrument
     def sort_values(self, key: Union[int, str, Iterable[str]], ascending: bool = True) -> 'MappedTable':
         """
 
@@ -236,36 +455,219 @@ class MappedTable:
         MappedTable
         Sorted table
         """
-        values_as_rows = self.to_list()
-        sort_key = partial(MappedSequence.__getitem__, item=key)
-        sorted_values = sorted(values_as_rows, key=sort_key, reverse=not ascending)
-        new_index = tuple(value.name for value in sorted_values)
-        return MappedTable(values=sorted_values, index=new_index, columns=self.columns)
+        if is_scalar(key):
+            if type(key) is int and key not in self.columns:
+                key = self.columns.values()[key]
+            keys = (key,)
+        else:
+            keys = tuple(key)
+        # already sorted tables are returned as is, as a stable sort would not move any row
+        if self._is_sorted(keys, ascending):
+            return self
+
+        if len(keys) == 1:
+            positions = self.column_values[keys[0]].argsort(ascending)
+        else:
+            columns = self.column_values[list(keys)]
+            positions = get_backend().lexsort([column.values() for column in columns], ascending,
+                                              [column.array() for column in columns])
+        return self._take(positions)._with_order((keys, ascending))
 
     def _get_empty_sequence(self, ):
         return (None,) * self.shape[0]
 
+    @instrument
+    def eval(self, expression: str) -> MappedSequence:
+        """Evaluate an expression over the columns, such as "a * 2 + b", on each row.
+
+        The expression is compiled once into a single loop over the referenced columns, see :mod:`expressions` for
+        the supported syntax. Column names that are not identifiers are quoted with backticks.
+
+        Returns
+        -------
+        MappedSequence
+        Results indexed by the index of the table
+        """
+        from .expressions import evaluate
+        return MappedSequence(evaluate(expression, self), keys=self.index.values())
+
+    @instrument
+    def assign(self, **kwargs) -> 'MappedTable':
+        """Add or replace columns, each one given by name=value, the new columns being appended.
+
+        Values can be an expression string evaluated with :meth:`eval`, a callable of the table returning a sequence,
+        a sequence with one value per row, or a scalar repeated on each row. Values may refer to the columns assigned
+        before them.
+
+        Returns
+        -------
+        MappedTable
+        """
+        from .expressions import evaluate
+        table = self
+        for name, value in kwargs.items():
+            if isinstance(value, str):
+                value = evaluate(value, table)
+            elif callable(value):
+                value = value(table)
+            if isinstance(value, MappedSequence) and value.keys() != table.index.values():
+                value = value.reindex(table.index.values())
+            elif is_scalar(value):
+                value = (value,) * len(table)
+            assert len(value) == len(table), 'values of {} should have one value per row, got {} for {} rows'.format(
+                name, len(value), len(table))
+
+            columns = table.columns.values()
+            values = list(table.column_values.values())
+            column = MappedSequence(value, keys=table.index.values(), name=name)
+            if name in columns:
+                values[columns.index(name)] = column
+            else:
+                columns += (name,)
+                values.append(column)
+            sorted_by = table._sorted_by
+            if sorted_by is not None and name in sorted_by[0]:
+                # keep the sort columns before the replaced one
+                sorted_by = (sorted_by[0][:sorted_by[0].index(name)], sorted_by[1])
+            table = MappedTable(values=values, columns=columns, index=table.index, axis=1)._with_order(
+                sorted_by if sorted_by is None or sorted_by[0] else None)
+        return table
+
+    @instrument
+    def apply(self, func: Callable, axis: int = 0, batch: bool = False, chunksize: Optional[int] = None,
+              arrays: bool = False) -> Union[MappedSequence, 'MappedTable']:
+        """Apply func on each column or on each row.
+
+        Parameters
+        ----------
+        func: Callable
+            Function of a column (axis=0), of a row (axis=1), or of a batch of rows (axis=1 and batch=True)
+        axis: int
+            0 to apply func on the columns, 1 on the rows
+        batch: bool
+            Only for axis=1. If True, func is called with a dictionary of column chunks of up to chunksize rows,
+            instead of once per row, and should return one result per row of the chunk.
+        chunksize: Optional[int]
+            Number of rows of each batch, all rows by default
+        arrays: bool
+            If True, the chunks of numeric columns are typed arrays of the backend (numpy arrays or array.array)
+            instead of tuples
+
+        Returns
+        -------
+        Union[MappedSequence, MappedTable]
+        Results indexed by the columns (axis=0) or by the index (axis=1). On axis=0, when func returns a sequence
+        with one value per row for each column, the results are returned as a table.
+        """
+        assert axis in (0, 1), 'axis should be 0 or 1, got {} instead'.format(axis)
+        if axis == 0:
+            results = [func(column) for column in self.column_values]
+            if results and all([is_iterable(result) and len(result) == len(self) for result in results]):
+                return MappedTable(values=results, columns=self.columns, index=self.index, axis=1)
+            return MappedSequence(results, keys=self.columns.values())
+
+        if not batch:
+            return MappedSequence([func(row) for row in self.row_values], keys=self.index.values())
+
+        columns = list(self.column_values.values())
+        buffers = []
+        for column in columns:
+            data = column.array() if arrays else None
+            buffers.append(column.values() if data is None else data)
+        names = self.columns.values()
+        results = _map_chunks(func, buffers, chunksize, lambda chunks: dict(zip(names, chunks)))
+        return MappedSequence(results, keys=self.index.values())
+
+    @instrument
     def reindex(self, columns):
         values = [self.values.get(value, self._get_empty_sequence()) for value in columns]
         return MappedTable(values=values, index=self.index, columns=columns, axis=1)
 
+    @instrument
     def to_list(self):
         return list(self.row_values)
 
+    @instrument
     def to_dict(self):
         return dict(self.column_values)
 
-    def where(self, func=None, **kwargs):
-        def compare(x):
-            return x[items] == values
+    @instrument
+    def to_csv(self, path_or_buffer=None, index: bool = False, header: bool = True, chunksize: int = 10000,
+               **kwargs):
+        """Write the table as comma separated values, see :func:`table.writers.to_csv`"""
+        from .writers import to_csv
+        return to_csv(self, path_or_buffer, index=index, header=header, chunksize=chunksize, **kwargs)
+
+    @instrument
+    def to_excel(self, path, sheetname: str = 'Sheet1', index: bool = False, header: bool = True):
+        """Write the table to a new excel file, see :func:`table.writers.to_excel`"""
+        from .writers import to_excel
+        to_excel(self, path, sheetname=sheetname, index=index, header=header)
+
+    @instrument
+    def filter(self, predicates: Iterable[Tuple[Any, str, Any]]) -> 'MappedTable':
+        """Rows satisfying all predicates.
 
+        The statistics of the columns (see :meth:`describe`) are computed once and checked first: when a predicate
+        cannot match any row, an empty table is returned without scanning the columns, and predicates matched by all
+        rows are skipped.
+
+        Parameters
+        ----------
+        predicates: Iterable[Tuple[Any, str, Any]]
+            Predicates as (column, operator, value), operator being one of '==', '!=', '<', '<=', '>' or '>='.
+            None values are never ordered, and only equal None.
+
+        Returns
+        -------
+        MappedTable
+        """
+        return self._filter(predicates, compute_stats=True)
+
+    def _filter(self, predicates: Iterable[Tuple[Any, str, Any]], compute_stats: bool = True) -> 'MappedTable':
+        masks = []
+        for key, op, value in predicates:
+            if key not in self.columns:
+                raise KeyError(key)
+            column = self.column_values[key]
+            if compute_stats or 'stats' in column._cache:
+                column_stats = column.stats()
+                if not may_match(column_stats, op, value):
+                    return self._take([])
+                if all_match(column_stats, op, value):
+                    continue
+            masks.append(column.compare(op, value).values())
+
+        if not masks:
+            return self._take(range(len(self)))
+        elif len(masks) == 1:
+            positions = [i for i, flag in enumerate(masks[0]) if flag]
+        else:
+            positions = [i for i, flags in enumerate(zip(*masks)) if all(flags)]
+        return self._take(positions)
+
+    @instrument
+    def describe(self) -> 'MappedTable':
+        """Statistics of each column, computed once and cached with the columns.
+
+        Returns
+        -------
+        MappedTable
+        One row per column, with the count, null_count, min, max, distinct, increasing and decreasing columns
+        described in :class:`table.stats.ColumnStats`
+        """
+        rows = [tuple(column.stats()) for column in self.column_values]
+        return MappedTable(values=rows, columns=ColumnStats._fields, index=self.columns)
+
+    @instrument
+    def where(self, func=None, **kwargs):
         if func is None:
-            items = list(kwargs.keys())
-            values = tuple(kwargs.values())
             item_in_columns = [key in self.columns for key in kwargs.keys()]
             if not all(item_in_columns):
                 raise KeyError
-            func = compare
+            # statistics are only used when already computed, as computing them costs more than the comparisons
+            return self._filter([(key, '==', value) for key, value in kwargs.items()], compute_stats=False)
+
         new_keys = []
         new_values = []
         for value in self.row_values:
@@ -273,23 +675,400 @@ class MappedTable:
                 new_keys.append(value.name)
                 new_values.append(value)
 
-        return MappedTable(values=new_values, index=new_keys, columns=self.columns)
+        return MappedTable(values=new_values, index=new_keys, columns=self.columns)._with_order(self._sorted_by)
 
     def unique(self):
         return set(self.row_values)
 
+    def _take(self, positions: Sequence[int], index: Optional[Sequence] = None) -> 'MappedTable':
+        """Build a new table from the rows at the given positions, read column by column, with a new index if given.
+
+        The order of the rows is kept, which is only valid for increasing positions: other callers reset it.
+        """
+        if index is None:
+            keys = self.index.values()
+            index = [keys[i] for i in positions]
+            if self.index.name is not None:
+                index = MappedSequence(index, name=self.index.name)
+        columns = self.column_values.values()
+        new_values = [[values[i] for i in positions] for values in map(MappedSequence.values, columns)]
+        table = MappedTable(values=new_values, columns=self.columns, index=index, axis=1,
+                            schema=[column._dtype for column in columns])
+        return table._with_order(self._sorted_by)
+
+    def _levels(self, axis: int) -> Tuple[MappedSequence, 'MultiIndex', tuple]:
+        """Keys of the index (axis=0) or of the columns (axis=1), their levels and the names of their levels"""
+        assert axis in (0, 1), 'axis should be 0 or 1, got {} instead'.format(axis)
+        keys = self.index if axis == 0 else self.columns
+        multi_index = keys.multi_index()
+        assert multi_index is not None, 'the {} should be tuples of several levels'.format(
+            'index' if axis == 0 else 'columns')
+        return keys, multi_index, level_names(keys.name, multi_index.nlevels)
+
+    @instrument
+    def xs(self, key, axis: int = 0, level=None, drop_level: bool = True) -> 'MappedTable':
+        """Select the rows (axis=0) or the columns (axis=1) matching a partial key of a multi-level index or columns.
+
+        Labels are looked up in the hash of their level, so that no key is compared. `table['2020']` is the same as
+        `table.xs('2020', axis=1)` when '2020' is not a column.
+
+        Parameters
+        ----------
+        key:
+            Label, or tuple of labels
+        axis: int
+            0 to select rows, 1 to select columns
+        level:
+            Level, or list of levels, of the labels of key, given by name or position. By default, key gives the
+            labels of the first levels.
+        drop_level: bool
+            Remove the levels of key from the keys of the result, unless key gives all levels
+
+        Returns
+        -------
+        MappedTable
+        """
+        keys, multi_index, names = self._levels(axis)
+        if level is None:
+            levels = tuple(range(len(key) if type(key) is tuple else 1))
+        else:
+            levels = multi_index.level_numbers(level, names)
+        positions = multi_index.get_locs(key, levels)
+        if drop_level and len(levels) < multi_index.nlevels:
+            new_keys = MappedSequence(multi_index.droplevel(levels, positions), name=drop_names(names, levels))
+        else:
+            new_keys = MappedSequence([keys.values()[i] for i in positions], name=keys.name)
+
+        if axis == 0:
+            return self._take(positions, index=new_keys)
+        columns = self.column_values.values()
+        new_values = [columns[i] for i in positions]
+        return MappedTable(values=new_values, columns=new_keys, index=self.index, axis=1,
+                           schema=[column._dtype for column in new_values])
+
+    @instrument
+    def set_index(self, keys) -> 'MappedTable':
+        """Move columns to the index. Several columns make an index of tuples, whose levels are named after them.
+
+        Parameters
+        ----------
+        keys:
+            Column or list of columns
+        """
+        keys = [keys] if is_scalar(keys) else list(keys)
+        assert all([key in self.columns for key in keys]), \
+            'keys should be in columns, expected {}, got {}'.format(self.columns, keys)
+        column_values = self.column_values
+        if len(keys) == 1:
+            new_index = MappedSequence(column_values[keys[0]].values(), name=keys[0])
+        else:
+            new_index = MappedSequence(list(zip(*[column_values[key].values() for key in keys])), name=tuple(keys))
+        new_values = [column for column in column_values if column.name not in keys]
+        return MappedTable(values=new_values, columns=[column.name for column in new_values], index=new_index,
+                           axis=1)._with_order(self._sorted_by)
+
+    @instrument
+    def reset_index(self, drop: bool = False) -> 'MappedTable':
+        """Replace the index by a range, moving its levels to the first columns unless drop is True. Levels without
+        name are named 'index' for a single level, or 'level_<position>'."""
+        columns = list(self.column_values)
+        new_columns = list(self.columns)
+        if not drop:
+            multi_index = self.index.multi_index()
+            if multi_index is None:
+                levels = [self.index.values()]
+                names = ['index' if self.index.name is None else self.index.name]
+            else:
+                levels = [multi_index.get_level_values(level) for level in range(multi_index.nlevels)]
+                names = ['level_{}'.format(level) if name is None else name
+                         for level, name in enumerate(level_names(self.index.name, multi_index.nlevels))]
+            columns = [*levels, *columns]
+            new_columns = [*names, *new_columns]
+        return MappedTable(values=columns, columns=new_columns, index=range(len(self)), axis=1)
+
+    @instrument
+    def unstack(self, level=-1, fill_value=None) -> 'MappedTable':
+        """Move a level of the index to the columns.
+
+        The rows of the result are the distinct keys of the remaining levels, and the columns are the pairs (column,
+        label) of each column and each label of the level, in order of first occurrence. Values are placed column by
+        column from the codes of the levels.
+
+        Parameters
+        ----------
+        level:
+            Name or position of the level of the index, the last one by default
+        fill_value:
+            Value of the combinations missing from the index
+        """
+        _, multi_index, names = self._levels(0)
+        level = multi_index.level_number(level, names)
+        labels = multi_index.levels[level]
+        label_codes = multi_index.codes[level]
+        kept = tuple([other for other in range(multi_index.nlevels) if other != level])
+        groups = multi_index._positions(kept)
+        # new row of each position
+        rows = [0] * len(self)
+        for row, positions in enumerate(groups.values()):
+            for position in positions:
+                rows[position] = row
+        if len(set(zip(rows, label_codes))) < len(self):
+            raise ValueError('the index holds duplicated keys, cannot unstack level {}'.format(level))
+
+        new_values = []
+        new_columns = []
+        for column in self.column_values:
+            values = column.values()
+            cells = [[fill_value] * len(groups) for _ in labels]
+            for row, code, value in zip(rows, label_codes, values):
+                cells[code][row] = value
+            new_values.extend(cells)
+            prefix = column.name if type(column.name) is tuple else (column.name,)
+            new_columns.extend([(*prefix, label) for label in labels])
+
+        first_positions = [positions[0] for positions in groups.values()]
+        new_index = MappedSequence(multi_index.droplevel([level], first_positions), name=drop_names(names, [level]))
+        columns_names = level_names(self.columns.name, 1 if not new_columns else len(new_columns[0]) - 1)
+        return MappedTable(values=new_values, index=new_index, axis=1,
+                           columns=MappedSequence(new_columns, name=(*columns_names, names[level])))
+
+    @instrument
+    def stack(self, level=-1, dropnone: bool = True) -> 'MappedTable':
+        """Move a level of the columns to the index.
+
+        Each row is repeated once per label of the level, the new index being (key, label), and the columns of the
+        result are the distinct keys of the remaining levels. Values are interleaved column by column.
+
+        Parameters
+        ----------
+        level:
+            Name or position of the level of the columns, the last one by default
+        dropnone: bool
+            Remove the rows holding only None values
+        """
+        _, multi_index, names = self._levels(1)
+        level = multi_index.level_number(level, names)
+        labels = multi_index.levels[level]
+        kept = tuple([other for other in range(multi_index.nlevels) if other != level])
+        groups = multi_index._positions(kept)
+        label_codes = multi_index.codes[level]
+        columns = self.column_values.values()
+        missing = (None,) * len(self)
+
+        new_values = []
+        for positions in groups.values():
+            by_label = [missing] * len(labels)
+            for position in positions:
+                by_label[label_codes[position]] = columns[position].values()
+            new_values.append(list(chain.from_iterable(zip(*by_label))))
+
+        first_positions = [positions[0] for positions in groups.values()]
+        new_columns = MappedSequence(multi_index.droplevel([level], first_positions), name=drop_names(names, [level]))
+        index = self.index.values()
+        new_index = [(*(key if type(key) is tuple else (key,)), label) for key in index for label in labels]
+        index_names = level_names(self.index.name, len(new_index[0]) - 1 if new_index else 1)
+        table = MappedTable(values=new_values, columns=new_columns, axis=1,
+                            index=MappedSequence(new_index, name=(*index_names, names[level])))
+        return table.dropnone(how='all') if dropnone else table
+
+    def groupby(self, by=None, level=None, sort: bool = True) -> 'GroupBy':
+        """Group the rows by the values of some columns or by the labels of some levels of the index.
+
+        Parameters
+        ----------
+        by:
+            Column or list of columns
+        level:
+            Name or position of a level of the index, or list of levels, instead of by
+        sort: bool
+            Sort the groups by key, otherwise they are in order of first occurrence
+
+        Returns
+        -------
+        GroupBy
+        """
+        from .groupby import GroupBy
+        return GroupBy(self, by=by, level=level, sort=sort)
+
+    def _row_keys(self, subset=None) -> Iterable:
+        """Hashable key of each row, restricted to the subset of columns"""
+        if subset is None:
+            subset = self.columns
+        elif is_scalar(subset):
+            subset = [subset]
+        assert all([col in self.columns for col in subset]), \
+            'subset should be in columns, expected {}, got {}'.format(self.columns, subset)
+        values = [self.column_values[col].values() for col in subset]
+        return values[0] if len(values) == 1 else zip(*values)
+
+    def _kept_positions(self, subset=None, keep='first') -> List[int]:
+        """Position of the first or last occurrence of each distinct row, in the original order"""
+        assert keep in ('first', 'last'), 'keep should be either first or last, got {} instead'.format(keep)
+        seen = {}
+        for position, key in enumerate(self._row_keys(subset)):
+            if keep == 'last' or key not in seen:
+                seen[key] = position
+        positions = list(seen.values())
+        if keep == 'last':
+            positions.sort()
+        return positions
+
+    @instrument
+    def duplicated(self, subset=None, keep: Union[str, bool] = 'first') -> MappedSequence:
+        """Flag the rows that are duplicates of another row.
+
+        Parameters
+        ----------
+        subset:
+            Column or list of columns used to identify duplicates, all columns by default.
+        keep: Union[str, bool]
+            'first' or 'last' to leave the first or last occurrence unflagged, False to flag all occurrences.
+
+        Returns
+        -------
+        MappedSequence
+        Booleans indexed as the table.
+        """
+        if keep is False:
+            counts = {}
+            keys = list(self._row_keys(subset))
+            for key in keys:
+                counts[key] = counts.get(key, 0) + 1
+            new_values = [counts[key] > 1 for key in keys]
+        else:
+            new_values = [True] * len(self)
+            for position in self._kept_positions(subset, keep):
+                new_values[position] = False
+        return MappedSequence(new_values, keys=self.index.values())
+
+    @instrument
+    def drop_duplicates(self, subset=None, keep: str = 'first') -> 'MappedTable':
+        """Remove duplicated rows, keeping the index and the order of the rows that are kept.
+
+        Parameters
+        ----------
+        subset:
+            Column or list of columns used to identify duplicates, all columns by default.
+        keep: str
+            'first' or 'last', the occurrence to keep.
+        """
+        return self._take(self._kept_positions(subset, keep))
+
+    @instrument
+    def value_counts(self, subset=None, normalize: bool = False, sort: bool = True,
+                     ascending: bool = False) -> 'MappedTable':
+        """Count the occurrences of each distinct row.
+
+        Parameters
+        ----------
+        subset:
+            Column or list of columns used to identify distinct rows, all columns by default.
+        normalize: bool
+            Return proportions instead of counts
+        sort: bool
+            Sort by count, otherwise rows are in order of first occurrence
+        ascending: bool
+            Sort in ascending order
+
+        Returns
+        -------
+        MappedTable
+        Table with one row per distinct value of the subset and a count (or proportion) column.
+        """
+        if subset is None:
+            subset = list(self.columns)
+        elif is_scalar(subset):
+            subset = [subset]
+        counts = {}
+        for key in self._row_keys(subset):
+            counts[key] = counts.get(key, 0) + 1
+
+        items = list(counts.items())
+        if sort:
+            # sorted is stable: ties stay in order of first occurrence
+            items.sort(key=lambda item: item[1], reverse=not ascending)
+        if len(subset) == 1:
+            new_values = [[key for key, _ in items]]
+        else:
+            new_values = [list(values) for values in zip(*[key for key, _ in items])] or [[] for _ in subset]
+        if normalize:
+            total = len(self)
+            new_values.append([count / total for _, count in items])
+            name = 'proportion'
+        else:
+            new_values.append([count for _, count in items])
+            name = 'count'
+        return MappedTable(values=new_values, columns=[*subset, name], index=range(len(items)), axis=1)
+
+    @instrument
     def isnone(self):
-        new_values = [value.isnone() for value in self.row_values]
-        return MappedTable(values=new_values, index=self.index, columns=self.columns, axis=0)
+        new_values = [column.isnone() for column in self.column_values]
+        return MappedTable(values=new_values, index=self.index, columns=self.columns, axis=1)
+
+    @instrument
+    def notnone(self):
+        new_values = [column.notnone() for column in self.column_values]
+        return MappedTable(values=new_values, index=self.index, columns=self.columns, axis=1)
+
+    def null_count(self) -> MappedSequence:
+        """Number of None values of each column"""
+        return MappedSequence([column.null_count() for column in self.column_values], keys=self.columns)
 
-    def dropnone(self):
-        new_values = [value for value in self.row_values if not any(value.isnone())]
-        return MappedTable(values=new_values, index=self.index, columns=self.columns, axis=0)
+    @instrument
+    def dropnone(self, subset=None, how: str = 'any'):
+        """Remove rows holding None values
 
-    def fillnone(self, value):
-        return MappedTable([column.fillnone(value) for column in self._column_values],
-                           index=self.index, columns=self.columns, axis=1)
+        Parameters
+        ----------
+        subset:
+            Column or list of columns where None values are looked for, all columns by default.
+        how: str
+            'any' to drop rows holding at least one None, 'all' to drop rows holding only None values.
+        """
+        assert how in ('any', 'all'), 'how should be either any or all, got {} instead'.format(how)
+        if subset is None:
+            subset = self.columns
+        elif is_scalar(subset):
+            subset = [subset]
+        columns = [self.column_values[col] for col in subset]
+        # columns without None are skipped
+        masks = [column.null_mask() for column in columns if column.null_count()]
+        if not masks or (how == 'all' and len(masks) < len(columns)):
+            return self
 
+        if len(masks) == 1:
+            positions = [i for i, flag in enumerate(masks[0]) if not flag]
+        elif how == 'any':
+            positions = [i for i, flags in enumerate(zip(*masks)) if not any(flags)]
+        else:
+            positions = [i for i, flags in enumerate(zip(*masks)) if not all(flags)]
+        return self._take(positions)
+
+    @instrument
+    def fillnone(self, value=None, method: Optional[str] = None):
+        """Fill None values column by column
+
+        Parameters
+        ----------
+        value:
+            Value replacing None, or dictionary of the value of each column. Columns missing from the dictionary
+            are left as is.
+        method: Optional[str]
+            'ffill' to propagate the last value that is not None forward, 'bfill' to use the next one instead.
+        """
+        new_values = []
+        for column in self.column_values:
+            if isinstance(value, dict):
+                if column.name in value:
+                    column = column.fillnone(value[column.name], method=method)
+                elif method is not None:
+                    column = column.fillnone(method=method)
+            else:
+                column = column.fillnone(value, method=method)
+            new_values.append(column)
+        return MappedTable(new_values, index=self.index, columns=self.columns, axis=1)
+
+    @instrument
     def melt(self, id_vars, value_name=None, var_name=None):
         if value_name is None:
             value_name = 'value'
@@ -303,38 +1082,155 @@ class MappedTable:
         else:
             assert all([col in self.columns for col in id_vars]), \
                 'id_vars should be in columns, expected {}, got {}'.format(self.columns, id_vars)
+            id_vars = list(id_vars)
         column_to_melt = [col for col in self.columns if col not in id_vars]
-        new_values = []
-        for row in self.row_values:
-            for col in column_to_melt:
-                new_values.append((*row[id_vars], col, row[col]))
+        length = len(self)
+        column_values = self.column_values
+        # id columns are repeated once per melted column, melted columns are concatenated
+        new_values = [column_values[col].values() * len(column_to_melt) for col in id_vars]
+        new_values.append(list(chain.from_iterable(repeat(col, length) for col in column_to_melt)))
+        new_values.append(list(chain.from_iterable(column_values[col].values() for col in column_to_melt)))
 
         new_columns = id_vars + [var_name, value_name]
-        return MappedTable(new_values, columns=new_columns)
-
-    def pivot(self, index: Union[str, List[str]], column, value, agg_func='mean'):
-        unique_columns = self[column].unique()
-        unique_index = self[index].unique()
-        # define aggregation function
-        if agg_func == 'mean':
-            agg_func = mean_aggregate
+        return MappedTable(new_values, columns=new_columns, index=range(length * len(column_to_melt)), axis=1)
+
+    @instrument
+    def pivot(self, index: Union[str, List[str]], column, value, agg_func='mean', incremental: bool = False):
+        return self.pivot_table(index=index, columns=column, values=value, agg_func=agg_func, incremental=incremental)
+
+    @instrument
+    def pivot_table(self, index: Union[str, List[str]], columns, values: Optional[Union[str, List[str]]] = None,
+                    agg_func: Union[str, Callable] = 'mean', fill_value=None, margins: bool = False,
+                    margins_name: str = 'All', incremental: bool = False) -> Union['MappedTable', 'PivotView']:
+        """Aggregate values in a table indexed by the unique values of index and columns, built in one hash pass.
+
+        Parameters
+        ----------
+        index: Union[str, List[str]]
+            Column or list of columns whose unique values are the rows of the result
+        columns:
+            Column or list of columns whose unique values are the columns of the result
+        values: Optional[Union[str, List[str]]]
+            Column or list of columns to aggregate, all remaining columns by default. When several columns are
+            aggregated, the columns of the result are tuples (value, column).
+        agg_func: Union[str, Callable]
+            Name of the aggregation (see :mod:`aggregation`) or callable applied on the list of values
+        fill_value:
+            Value of the combinations of index and columns that are missing
+        margins: bool
+            Add a row and a column aggregating all values of each column and row
+        margins_name: str
+            Name of the margins row and column
+        incremental: bool
+            Return a :class:`~table.views.PivotView` instead, keeping the state of each aggregation so that the pivot
+            is updated in O(batch) when rows are appended
+
+        Returns
+        -------
+        MappedTable
+        """
+        if incremental:
+            from .views import PivotView
+            return PivotView(self, index=index, columns=columns, values=values, agg_func=agg_func,
+                             fill_value=fill_value, margins=margins, margins_name=margins_name)
+        index_vars, column_vars, value_vars = self._pivot_vars(index, columns, values)
+        agg_funcs = [get_aggregation(agg_func, self.column_values[col].dtype) for col in value_vars]
+        groups, row_margins, column_margins, total = self._pivot_groups(index_vars, column_vars, value_vars, margins)
+        return _pivot_layout(index_vars, column_vars, value_vars, groups, row_margins, column_margins, total,
+                             lambda group, i: agg_funcs[i](group[i]), fill_value, margins, margins_name)
+
+    def _pivot_vars(self, index, columns, values) -> Tuple[list, list, list]:
+        """Lists of the index, columns and values variables of a pivot table"""
+        index_vars = [index] if is_scalar(index) else list(index)
+        column_vars = [columns] if is_scalar(columns) else list(columns)
+        if values is None:
+            value_vars = [col for col in self.columns if col not in index_vars and col not in column_vars]
         else:
-            pass
+            value_vars = [values] if is_scalar(values) else list(values)
+        return index_vars, column_vars, value_vars
 
-        new_values = []
-        for index_value in unique_index:
-            if is_iterable(index):
-                query = dict(zip(index, index_value))
-                new_row = [*index_value]
-            else:
-                query = {index: index_value}
-                new_row = [index_value]
-            for column_value in unique_columns:
-                # retrieve data corresponding to both index and column
-                # TODO when multiple aggregation, return with a new column
-                #  'agg' containing values for each aggregation function
-                data = self.where(**query, **{column: column_value})[value]
-                new_row.append(agg_func(data))
-            new_values.append(new_row)
-
-        return MappedTable(values=new_values, columns=[index, *unique_columns], axis=0)
+    def _pivot_groups(self, index_vars: list, column_vars: list, value_vars: list, margins: bool
+                      ) -> Tuple[dict, dict, dict, list]:
+        """Lists of the values of each (index, column) key, of each index key and of each column key, in one pass
+        over the rows. The lists of the index and column keys, and the list of all values, are only filled for the
+        margins."""
+        groups = {}
+        row_margins = {}
+        column_margins = {}
+        total = [[] for _ in value_vars]
+        value_columns = [self.column_values[col].values() for col in value_vars]
+        for index_key, column_key, *cell in zip(self._row_keys(index_vars), self._row_keys(column_vars),
+                                                *value_columns):
+            group = groups.get((index_key, column_key))
+            if group is None:
+                group = groups[(index_key, column_key)] = [[] for _ in value_vars]
+                row_margins.setdefault(index_key, [[] for _ in value_vars])
+                column_margins.setdefault(column_key, [[] for _ in value_vars])
+            for i, value in enumerate(cell):
+                group[i].append(value)
+                if margins:
+                    row_margins[index_key][i].append(value)
+                    column_margins[column_key][i].append(value)
+                    total[i].append(value)
+        return groups, row_margins, column_margins, total
+
+
+def _pivot_layout(index_vars: list, column_vars: list, value_vars: list, groups: dict, row_margins: dict,
+                  column_margins: dict, total, aggregate: Callable, fill_value, margins: bool,
+                  margins_name: str) -> MappedTable:
+    """Table of a pivot, aggregate(group, i) being the aggregate of the i-th value of a group of groups, row_margins,
+    column_margins or of total"""
+    index_keys = _sorted_keys(row_margins)
+    column_keys = _sorted_keys(column_margins)
+
+    new_values = []
+    for index_key in index_keys:
+        new_row = [index_key] if len(index_vars) == 1 else list(index_key)
+        for i in range(len(value_vars)):
+            for column_key in column_keys:
+                group = groups.get((index_key, column_key))
+                new_row.append(fill_value if group is None else aggregate(group, i))
+            if margins:
+                new_row.append(aggregate(row_margins[index_key], i))
+        new_values.append(new_row)
+
+    if margins:
+        new_row = [margins_name] + [''] * (len(index_vars) - 1)
+        for i in range(len(value_vars)):
+            for column_key in column_keys:
+                new_row.append(aggregate(column_margins[column_key], i))
+            new_row.append(aggregate(total, i))
+        new_values.append(new_row)
+        column_keys.append(margins_name if len(column_vars) == 1
+                           else (margins_name, *[''] * (len(column_vars) - 1)))
+
+    if len(value_vars) == 1:
+        new_columns = [*index_vars, *column_keys]
+    else:
+        # tuple keys of several columns are flattened, so that the levels of the columns are (value, *columns)
+        new_columns = [*index_vars, *[(value, *(column_key if len(column_vars) > 1 else (column_key,)))
+                                      for value in value_vars for column_key in column_keys]]
+    return MappedTable(values=new_values, columns=new_columns, axis=0)
+
+
+def _schema_dtypes(columns: tuple, schema: Optional[Union[Mapping, Sequence[Optional[str]]]]
+                   ) -> Optional[Tuple[Optional[str], ...]]:
+    """dtype tag of each column declared by schema, None for undeclared columns, or None without schema"""
+    if schema is None:
+        return None
+    if isinstance(schema, Mapping):
+        unknown = [column for column in schema if column not in columns]
+        assert not unknown, 'schema columns {} not found in columns'.format(unknown)
+        schema = [schema.get(column) for column in columns]
+    assert len(schema) == len(columns), 'schema and columns should have the same length, got {} and {}'.format(
+        len(schema), len(columns))
+    dtypes = tuple([None if dtype is None else check_dtype(dtype) for dtype in schema])
+    return dtypes if any([dtype is not None for dtype in dtypes]) else None
+
+
+def _sorted_keys(keys: Iterable) -> list:
+    """Sort keys when they are comparable, otherwise keep the order of first occurrence"""
+    try:
+        return sorted(keys)
+    except TypeError:
+        return list(keys)
@@ -0,0 +1,158 @@
+"""Multi-level view of tuple keys.
+
+The columns read from several header rows, or an index made of several columns, are tuples. A :class:`MultiIndex`
+splits them into levels: each level holds its distinct labels in order of first occurrence, a hash of the code of
+each label, and the array of the codes of all keys. Partial keys, that give the labels of the first levels only or of
+some chosen levels, are then matched with dictionary lookups instead of comparing each tuple.
+
+A MultiIndex is built once per sequence of keys and cached, see :meth:`MappedSequence.multi_index`.
+"""
+from array import array
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+
+class MultiIndex:
+    """Levels, label hashes and code arrays of a sequence of tuples of the same length
+
+    Levels are given by position. Their names are held by the sequence of the keys, see :func:`level_names`.
+
+    Parameters
+    ----------
+    keys: Sequence[tuple]
+        Tuples of nlevels labels
+    """
+
+    def __init__(self, keys: Sequence[tuple]):
+        nlevels = len(keys[0])
+        assert all([len(key) == nlevels for key in keys]), 'keys should be tuples of the same length'
+        # label -> code of each level
+        self._codes_of = [{} for _ in range(nlevels)]
+        codes = [array('q') for _ in range(nlevels)]
+        for key in keys:
+            for label, codes_of, level_codes in zip(key, self._codes_of, codes):
+                code = codes_of.get(label)
+                if code is None:
+                    code = codes_of[label] = len(codes_of)
+                level_codes.append(code)
+        self.codes = tuple(codes)
+        self.levels = tuple([tuple(codes_of) for codes_of in self._codes_of])
+        self._length = len(keys)
+        # positions of the keys grouped by the codes of some levels, built on first use, see _positions
+        self._groups = {}
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def nlevels(self) -> int:
+        return len(self.levels)
+
+    def level_number(self, level: Union[int, Any], names: Optional[tuple] = None) -> int:
+        """Position of a level given by name or by position, negative positions counting from the last level"""
+        if names is not None and type(level) is not int and level in names:
+            return names.index(level)
+        assert type(level) is int and -self.nlevels <= level < self.nlevels, \
+            'level should be a level name or a position, expected one of {}, got {}'.format(names, level)
+        return level % self.nlevels
+
+    def level_numbers(self, level, names: Optional[tuple] = None) -> Tuple[int, ...]:
+        """Positions of a level or of a list of levels"""
+        if type(level) not in (list, tuple):
+            level = [level]
+        return tuple([self.level_number(item, names) for item in level])
+
+    def get_level_values(self, level: int) -> tuple:
+        """Label of each key on a level"""
+        labels = self.levels[level]
+        return tuple([labels[code] for code in self.codes[level]])
+
+    def _positions(self, levels: Tuple[int, ...]) -> Dict[tuple, List[int]]:
+        """Positions of the keys grouped by their codes on some levels, in increasing order"""
+        groups = self._groups.get(levels)
+        if groups is None:
+            groups = self._groups[levels] = {}
+            if len(levels) == 1:
+                for position, code in enumerate(self.codes[levels[0]]):
+                    groups.setdefault((code,), []).append(position)
+            else:
+                for position, key in enumerate(zip(*[self.codes[level] for level in levels])):
+                    groups.setdefault(key, []).append(position)
+        return groups
+
+    def groups(self, levels: Tuple[int, ...]) -> Dict[tuple, List[int]]:
+        """Positions of the keys grouped by their labels on some levels, in order of first occurrence"""
+        labels = [self.levels[level] for level in levels]
+        return {tuple([level_labels[code] for level_labels, code in zip(labels, codes)]): positions
+                for codes, positions in self._positions(levels).items()}
+
+    def get_locs(self, key, levels: Optional[Tuple[int, ...]] = None) -> List[int]:
+        """Positions of the keys matching a partial key, in increasing order.
+
+        Parameters
+        ----------
+        key:
+            Label, or tuple of labels
+        levels: Optional[Tuple[int, ...]]
+            Levels of the labels of key. By default, key gives the labels of the first levels.
+
+        Raises
+        ------
+        KeyError
+            If no key matches
+        """
+        if type(key) is not tuple:
+            key = (key,)
+        if len(key) > self.nlevels:
+            raise KeyError(key)
+        if levels is None:
+            levels = tuple(range(len(key)))
+        assert len(levels) == len(key), 'key should give one label per level, got {} for levels {}'.format(key, levels)
+        try:
+            codes = tuple([self._codes_of[level][label] for level, label in zip(levels, key)])
+        except (KeyError, TypeError):
+            raise KeyError(key) from None
+        positions = self._positions(levels).get(codes)
+        if positions is None:
+            raise KeyError(key)
+        return positions
+
+    def droplevel(self, levels: Sequence[int], positions: Optional[Sequence[int]] = None) -> list:
+        """Keys at positions, all keys by default, without some levels. Keys are tuples when several levels remain,
+        and labels otherwise."""
+        kept = [level for level in range(self.nlevels) if level not in levels]
+        assert kept, 'at least one level should remain'
+        if positions is None:
+            positions = range(self._length)
+        columns = [[self.levels[level][self.codes[level][i]] for i in positions] for level in kept]
+        if len(kept) == 1:
+            return columns[0]
+        return list(zip(*columns))
+
+
+def from_keys(keys: Sequence) -> Optional[MultiIndex]:
+    """MultiIndex of keys that are tuples of the same length, None otherwise.
+
+    Keys that are not tuples, such as the index columns of a pivot table, are labels of the first level, the other
+    levels being ''.
+    """
+    nlevels = 0
+    for key in keys:
+        if type(key) is tuple:
+            if nlevels and len(key) != nlevels:
+                return None
+            nlevels = len(key)
+    if nlevels < 2:
+        return None
+    padding = ('',) * (nlevels - 1)
+    return MultiIndex([key if type(key) is tuple else (key, *padding) for key in keys])
+
+
+def level_names(name, nlevels: int) -> tuple:
+    """Names of the levels of an index or of columns named name, which is the tuple of the names of the levels"""
+    return name if type(name) is tuple and len(name) == nlevels else (None,) * nlevels
+
+
+def drop_names(names: tuple, levels: Sequence[int]):
+    """Name of the remaining levels, a tuple when several levels remain"""
+    kept = [name for level, name in enumerate(names) if level not in levels]
+    return kept[0] if len(kept) == 1 else tuple(kept)
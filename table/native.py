@@ -0,0 +1,54 @@
+"""Native binary format: tables are pickled column by column, which is much faster to load than an excel file."""
+import pickle
+from typing import Union, Dict, Any
+from .mapped_sequence import MappedSequence
+from .mapped_table import MappedTable
+
+FORMAT_VERSION = 1
+
+
+def _dump_table(table: MappedTable) -> dict:
+    return {
+        'columns': table.columns.values(),
+        'index': table.index.values(),
+        'values': [column.values() for column in table.column_values],
+        'dtypes': [column.dtype for column in table.column_values],
+        # names of the levels of the index and of the columns
+        'names': (table.index.name, table.columns.name),
+    }
+
+
+def _load_table(data: dict) -> MappedTable:
+    # the stored dtypes are declared, so that they are not inferred again
+    index_name, columns_name = data.get('names', (None, None))
+    return MappedTable(values=data['values'], columns=MappedSequence(data['columns'], name=columns_name),
+                       index=MappedSequence(data['index'], name=index_name), axis=1, schema=data.get('dtypes'))
+
+
+def write_native(tables: Union[MappedTable, Dict[Any, MappedTable]], file):
+    """Write a table, or a dictionary of tables, to a path or a binary file object"""
+    if isinstance(tables, MappedTable):
+        payload = {'version': FORMAT_VERSION, 'table': _dump_table(tables)}
+    else:
+        payload = {'version': FORMAT_VERSION, 'tables': {name: _dump_table(table) for name, table in tables.items()}}
+
+    if hasattr(file, 'write'):
+        pickle.dump(payload, file, protocol=pickle.HIGHEST_PROTOCOL)
+    else:
+        with open(file, 'wb') as stream:
+            pickle.dump(payload, stream, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def read_native(file) -> Union[MappedTable, Dict[Any, MappedTable]]:
+    """Read a table, or a dictionary of tables, written by :func:`write_native`"""
+    if hasattr(file, 'read'):
+        payload = pickle.load(file)
+    else:
+        with open(file, 'rb') as stream:
+            payload = pickle.load(stream)
+    if payload.get('version') != FORMAT_VERSION:
+        raise ValueError('unsupported native format version {}'.format(payload.get('version')))
+
+    if 'table' in payload:
+        return _load_table(payload['table'])
+    return {name: _load_table(data) for name, data in payload['tables'].items()}
@@ -0,0 +1,145 @@
+"""On-disk cache of parsed files.
+
+Entries are keyed by the fingerprint of the source file (path, size, modification time and content hash) and by the
+parsing options, and are stored in the native binary format followed by a checksum of it. Entries that cannot be
+read back, because they are truncated or corrupted, are removed and the file is parsed again. The least recently used
+entries are evicted when the total size of the cache directory exceeds its maximum size.
+"""
+import hashlib
+import io
+import os
+import tempfile
+from typing import Callable, Union, Dict, Any
+from .mapped_table import MappedTable
+from .native import read_native, write_native
+
+# Default maximum size of a cache directory, in bytes
+DEFAULT_MAX_SIZE = 512 * 1024 ** 2
+EXTENSION = '.stc'
+# size in bytes of the checksum ending each entry
+CHECKSUM_SIZE = 20
+
+
+def file_digest(file_path, chunk_size: int = 1024 ** 2) -> str:
+    """Hash of the content of a file"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(file_path, **options) -> str:
+    """Key of a parsed file, derived from the file fingerprint and the parsing options"""
+    stat = os.stat(file_path)
+    fingerprint = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns, file_digest(file_path),
+                   sorted(options.items(), key=lambda item: item[0]))
+    return hashlib.blake2b(repr(fingerprint).encode(), digest_size=20).hexdigest()
+
+
+class _ChecksumWriter:
+    """Binary file object that updates a checksum of the data written to file"""
+
+    def __init__(self, file):
+        self.file = file
+        self.checksum = hashlib.blake2b(digest_size=CHECKSUM_SIZE)
+
+    def write(self, data) -> int:
+        self.checksum.update(data)
+        return self.file.write(data)
+
+
+def write_entry(result: Union[MappedTable, Dict[Any, MappedTable]], file):
+    """Write result in the native format to a binary file object, followed by its checksum"""
+    writer = _ChecksumWriter(file)
+    write_native(result, writer)
+    file.write(writer.checksum.digest())
+
+
+def read_entry(path) -> Union[MappedTable, Dict[Any, MappedTable]]:
+    """Read an entry written by :func:`write_entry`
+
+    Raises
+    ------
+    ValueError
+        If the checksum does not match the content of the entry
+    """
+    with open(path, 'rb') as file:
+        data = file.read()
+    content = memoryview(data)[:-CHECKSUM_SIZE]
+    checksum = hashlib.blake2b(content, digest_size=CHECKSUM_SIZE).digest()
+    if len(data) < CHECKSUM_SIZE or checksum != data[-CHECKSUM_SIZE:]:
+        raise ValueError('corrupted cache entry {}'.format(path))
+    return read_native(io.BytesIO(content))
+
+
+def evict(cache_dir, max_size: int = DEFAULT_MAX_SIZE):
+    """Remove the least recently used entries until the cache directory is smaller than max_size"""
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith(EXTENSION):
+            path = os.path.join(cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+
+    total = sum([size for _, size, _ in entries])
+    # the modification time of entries is updated on each hit
+    for _, size, path in sorted(entries):
+        if total <= max_size:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total -= size
+
+
+def cached_read(reader: Callable, file_path, cache_dir, max_size: int = DEFAULT_MAX_SIZE,
+                **options) -> Union[MappedTable, Dict[Any, MappedTable]]:
+    """Return reader(file_path, **options), loading it from cache_dir when the file and options did not change.
+
+    Parameters
+    ----------
+    reader: Callable
+        Function parsing the file, for instance :meth:`MappedTable.from_excel`
+    file_path:
+        Path of the parsed file
+    cache_dir:
+        Directory of the cache entries, created if needed
+    max_size: int
+        Maximum size of the cache directory in bytes
+    options:
+        Parsing options, passed to the reader and part of the key
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, cache_key(file_path, **options) + EXTENSION)
+    try:
+        result = read_entry(path)
+    except FileNotFoundError:
+        pass
+    except Exception:
+        # truncated or corrupted entries are parsed again, unpickling them may raise about any exception
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    else:
+        # mark the entry as recently used
+        os.utime(path)
+        return result
+
+    result = reader(file_path, **options)
+    # write to a temporary file first, so that concurrent readers never see a partial entry
+    fd, temporary = tempfile.mkstemp(suffix='.tmp', dir=cache_dir)
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            write_entry(result, file)
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+    evict(cache_dir, max_size)
+    return result
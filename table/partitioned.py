@@ -0,0 +1,577 @@
+import heapq
+import os
+import pickle
+import weakref
+from itertools import islice
+from typing import Iterable, Iterator, Optional, Union, List, Sequence, Dict, Tuple, Any
+from . import writers
+from .api import _merge_columns
+from .mapped_sequence import MappedSequence
+from .mapped_table import MappedTable
+from .ordered_set import OrderedSet
+from .stats import ColumnStats, may_match, key_range, overlaps
+from .utils import is_scalar
+
+# Default number of rows per chunk
+DEFAULT_CHUNKSIZE = 100000
+# Default maximum number of cells a PartitionedTable keeps in memory before spilling chunks to disk.
+# None means that chunks are never spilled.
+MEMORY_BUDGET = None
+
+
+def set_memory_budget(cells: Optional[int]):
+    """Set the default memory budget, expressed in number of cells, of the partitioned tables created afterwards."""
+    global MEMORY_BUDGET
+    MEMORY_BUDGET = cells
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _append_frame(path, frame):
+    """Append a pickled frame to a spill file"""
+    with open(path, 'ab') as file:
+        pickle.dump(frame, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _iter_frames(path) -> Iterator:
+    """Iterate over the pickled frames of a spill file"""
+    with open(path, 'rb') as file:
+        while True:
+            try:
+                yield pickle.load(file)
+            except EOFError:
+                return
+
+
+class _SpillDirectory:
+    """Temporary directory of spill files, removed with its content once no table, chunk or row store refers to it"""
+
+    __slots__ = ['path', '_finalizer', '__weakref__']
+
+    def __init__(self):
+        import shutil
+        import tempfile
+        self.path = tempfile.mkdtemp(prefix='simpletable_')
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self.path, True)
+
+
+def _new_spill_file(directory: Union[str, _SpillDirectory]) -> str:
+    import tempfile
+    if isinstance(directory, _SpillDirectory):
+        directory = directory.path
+    fd, path = tempfile.mkstemp(suffix='.chunk', dir=directory)
+    os.close(fd)
+    return path
+
+
+class _RowStore:
+    """Append only store of rows, kept in memory or spilled as blocks of rows to a temporary file"""
+
+    __slots__ = ['_rows', '_path', '_block_size', '_directory']
+
+    def __init__(self, directory=None, block_size=10000):
+        self._rows = []
+        self._block_size = block_size
+        self._path = None if directory is None else _new_spill_file(directory)
+        # keeps a temporary spill directory alive as long as the store
+        self._directory = directory
+
+    def append(self, row):
+        self._rows.append(row)
+        if self._path is not None and len(self._rows) >= self._block_size:
+            self._flush()
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def _flush(self):
+        if self._rows:
+            _append_frame(self._path, self._rows)
+            self._rows = []
+
+    def __iter__(self):
+        if self._path is None:
+            yield from self._rows
+        else:
+            self._flush()
+            for block in _iter_frames(self._path):
+                yield from block
+
+    def release(self):
+        self._rows = []
+        if self._path is not None:
+            _remove(self._path)
+
+
+def _tables_from_rows(rows: Iterable[tuple], columns: Sequence, chunksize: int) -> Iterator[MappedTable]:
+    """Group rows formatted as (index, *values) into tables of at most chunksize rows"""
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, chunksize))
+        if not batch:
+            return
+        index, *values = zip(*batch)
+        yield MappedTable(values=values, columns=columns, index=index, axis=1)
+
+
+def _iter_rows(table: MappedTable) -> Iterator[tuple]:
+    """Iterate over the rows of a table formatted as (index, *values)"""
+    return zip(table.index, *table.column_values)
+
+
+def _null_last(value, ascending: bool) -> tuple:
+    """Sort key placing None values last in both orders, as :meth:`MappedSequence.argsort` does"""
+    return (value is None) if ascending else (value is not None), value
+
+
+class Chunk:
+    """Row range of a :class:`PartitionedTable`, held either in memory or spilled to a temporary file."""
+
+    __slots__ = ['_table', '_path', '_columns', '_length', '_stats', '_finalizer', '_directory', '__weakref__']
+
+    def __init__(self, table: MappedTable):
+        self._table = table
+        self._path = None
+        self._directory = None
+        self._columns = tuple(table.columns)
+        self._length = len(table)
+        self._stats = None
+        self._finalizer = None
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def columns(self):
+        return self._columns
+
+    @property
+    def cells(self):
+        return self._length * len(self._columns)
+
+    @property
+    def spilled(self):
+        return self._table is None
+
+    def stats(self) -> Dict[Any, ColumnStats]:
+        """Statistics of each column, computed once and kept when the chunk is spilled"""
+        if self._stats is None:
+            self._stats = dict(zip(self._columns, [column.stats() for column in self.load().column_values]))
+        return self._stats
+
+    def spill(self, directory):
+        """Write the chunk to a temporary file of directory and release the table from memory. The statistics of the
+        columns are computed first, so that the chunk can be skipped without reading it back."""
+        if self._table is None:
+            return
+        self.stats()
+        table = self._table
+        self._path = _new_spill_file(directory)
+        _append_frame(self._path, (tuple(table.index), [column.values() for column in table.column_values]))
+        # remove the file once the chunk is garbage collected, the temporary directory being kept alive until then
+        self._finalizer = weakref.finalize(self, _remove, self._path)
+        self._directory = directory
+        self._table = None
+
+    def load(self) -> MappedTable:
+        """Return the table of the chunk, reading it from disk if it was spilled"""
+        if self._table is not None:
+            return self._table
+        index, values = next(_iter_frames(self._path))
+        return MappedTable(values=values, columns=self._columns, index=index, axis=1)
+
+
+class PartitionedTable:
+    """A table made of a list of row-range chunks that can live either in memory or spilled to temporary files.
+
+    Operations are executed chunk by chunk, so that only one chunk at a time needs to be loaded in memory. Chunks are
+    spilled to disk, oldest first, as soon as the number of cells held in memory exceeds the memory budget.
+    """
+
+    __slots__ = ['_chunks', '_columns', '_memory_budget', '_spill_dir']
+
+    def __init__(self, chunks: Iterable[Union[MappedTable, Chunk]], columns: Optional[Sequence] = None,
+                 memory_budget: Optional[int] = None, spill_dir: Optional[str] = None):
+        """
+
+        Parameters
+        ----------
+        chunks: Iterable[Union[MappedTable, Chunk]]
+            Tables holding consecutive ranges of rows. All chunks should share the same columns.
+        columns: Optional[Sequence]
+            List of the names of the columns. If None, the columns of the first chunk are used.
+        memory_budget: Optional[int]
+            Maximum number of cells kept in memory. If None, the module default MEMORY_BUDGET is used.
+        spill_dir: Optional[str]
+            Directory of the spilled chunks. If None, a temporary directory is created on first spill.
+        """
+        self._chunks = []
+        self._columns = None if columns is None else tuple(columns)
+        self._memory_budget = MEMORY_BUDGET if memory_budget is None else memory_budget
+        self._spill_dir = spill_dir
+        for chunk in chunks:
+            self._add(chunk)
+        assert self._columns is not None, 'columns should be provided when there is no chunk'
+
+    @classmethod
+    def from_table(cls, table: MappedTable, chunksize: int = DEFAULT_CHUNKSIZE, **kwargs) -> 'PartitionedTable':
+        """Split a table in chunks of chunksize rows"""
+        chunks = (table[start:start + chunksize] for start in range(0, len(table), chunksize))
+        return cls(chunks, columns=table.columns, **kwargs)
+
+    def _add(self, chunk: Union[MappedTable, Chunk]):
+        if not isinstance(chunk, Chunk):
+            chunk = Chunk(chunk)
+        if self._columns is None:
+            self._columns = chunk.columns
+        assert chunk.columns == self._columns, \
+            'all chunks should have the same columns, expected {}, got {}'.format(self._columns, chunk.columns)
+        if len(chunk) == 0:
+            return
+        self._chunks.append(chunk)
+        self._enforce_budget()
+
+    def _enforce_budget(self):
+        if self._memory_budget is None:
+            return
+        in_memory = sum([chunk.cells for chunk in self._chunks if not chunk.spilled])
+        for chunk in self._chunks:
+            if in_memory <= self._memory_budget:
+                break
+            if not chunk.spilled:
+                in_memory -= chunk.cells
+                chunk.spill(self._spill_directory())
+
+    def _derive(self, tables: Iterable[MappedTable], columns=None) -> 'PartitionedTable':
+        """Build a new partitioned table sharing the settings of self"""
+        return PartitionedTable(tables, columns=self._columns if columns is None else columns,
+                                memory_budget=self._memory_budget, spill_dir=self._spill_dir)
+
+    def _map(self, method, *args, **kwargs) -> Iterator[MappedTable]:
+        for table in self.iter_tables():
+            yield getattr(table, method)(*args, **kwargs)
+
+    def _spill_directory(self) -> Union[str, '_SpillDirectory']:
+        """Directory given as spill_dir, or temporary directory created on first use and shared with the derived
+        tables. The temporary directory is removed once no table, chunk or row store refers to it anymore."""
+        if self._spill_dir is None:
+            self._spill_dir = _SpillDirectory()
+        return self._spill_dir
+
+    @property
+    def spill_dir(self) -> str:
+        directory = self._spill_directory()
+        return directory.path if isinstance(directory, _SpillDirectory) else directory
+
+    @property
+    def columns(self):
+        return self._columns
+
+    @property
+    def chunks(self) -> List[Chunk]:
+        return list(self._chunks)
+
+    @property
+    def shape(self):
+        return len(self), len(self._columns)
+
+    def __len__(self):
+        return sum([len(chunk) for chunk in self._chunks])
+
+    def __repr__(self):
+        spilled = sum([chunk.spilled for chunk in self._chunks])
+        return 'PartitionedTable(shape={}, chunks={}, spilled={})'.format(self.shape, len(self._chunks), spilled)
+
+    def iter_tables(self) -> Iterator[MappedTable]:
+        """Iterate over the chunks as MappedTable, loading spilled chunks one at a time"""
+        for chunk in self._chunks:
+            yield chunk.load()
+
+    def to_table(self) -> MappedTable:
+        """Collect all chunks in a single MappedTable"""
+        index = []
+        values = [[] for _ in self._columns]
+        for table in self.iter_tables():
+            index.extend(table.index)
+            for buffer, column in zip(values, table.column_values):
+                buffer.extend(column)
+        return MappedTable(values=values, columns=self._columns, index=index, axis=1)
+
+    def to_csv(self, path_or_buffer=None, index: bool = False, header: bool = True, chunksize: int = 10000,
+               **kwargs):
+        """Write the chunks one after the other as comma separated values"""
+        return writers.to_csv(self.iter_tables(), path_or_buffer, index=index, header=header, chunksize=chunksize,
+                              **kwargs)
+
+    def to_excel(self, path, sheetname: str = 'Sheet1', index: bool = False, header: bool = True):
+        """Write the chunks one after the other to a new excel file"""
+        writers.to_excel(self.iter_tables(), path, sheetname=sheetname, index=index, header=header)
+
+    def __getitem__(self, item):
+        if type(item) is list:
+            return self.select(item)
+        else:
+            return self.select([item])
+
+    def select(self, columns: Sequence) -> 'PartitionedTable':
+        """Select a subset of the columns"""
+        assert all([col in self._columns for col in columns]), \
+            'columns should be in {}, got {}'.format(self._columns, columns)
+        return self._derive(self._map('__getitem__', list(columns)), columns=columns)
+
+    def where(self, func=None, **kwargs) -> 'PartitionedTable':
+        """Filter the rows chunk by chunk, see :meth:`MappedTable.where`. Equality filters skip the chunks that cannot
+        match, see :meth:`filter`."""
+        if func is None:
+            return self.filter([(key, '==', value) for key, value in kwargs.items()])
+        return self._derive(self._map('where', func, **kwargs))
+
+    def filter(self, predicates: Iterable[Tuple[Any, str, Any]]) -> 'PartitionedTable':
+        """Filter the rows chunk by chunk, see :meth:`MappedTable.filter`. Chunks whose statistics show that they
+        cannot match are skipped without being loaded."""
+        predicates = list(predicates)
+        for key, _, _ in predicates:
+            if key not in self._columns:
+                raise KeyError(key)
+
+        def iter_chunks():
+            for chunk in self._chunks:
+                stats = chunk.stats()
+                if all([may_match(stats[key], op, value) for key, op, value in predicates]):
+                    yield chunk.load().filter(predicates)
+
+        return self._derive(iter_chunks())
+
+    def describe(self) -> MappedTable:
+        """Statistics of each chunk and column, as computed when the chunks were built or spilled
+
+        Returns
+        -------
+        MappedTable
+        One row per chunk and column, with the chunk position and column name followed by the fields of
+        :class:`table.stats.ColumnStats`
+        """
+        rows = [(i, column, *stats) for i, chunk in enumerate(self._chunks) for column, stats in chunk.stats().items()]
+        return MappedTable(values=rows, columns=('chunk', 'column', *ColumnStats._fields))
+
+    def fillnone(self, value) -> 'PartitionedTable':
+        return self._derive(self._map('fillnone', value))
+
+    def melt(self, id_vars, value_name=None, var_name=None) -> 'PartitionedTable':
+        id_vars = [id_vars] if is_scalar(id_vars) else list(id_vars)
+        columns = id_vars + ['variable' if var_name is None else var_name,
+                             'value' if value_name is None else value_name]
+        return self._derive(self._map('melt', id_vars, value_name=value_name, var_name=var_name), columns=columns)
+
+    def concat(self, *others: Union['PartitionedTable', MappedTable]) -> 'PartitionedTable':
+        """Vertical stack of self and others. Chunks are reindexed on the union of the columns when needed."""
+        columns = OrderedSet(self._columns)
+        for other in others:
+            columns = columns.union(OrderedSet(other.columns))
+        columns = tuple(columns)
+
+        def iter_chunks():
+            for other in (self, *others):
+                chunks = other._chunks if isinstance(other, PartitionedTable) else [Chunk(other)]
+                for chunk in chunks:
+                    # chunks sharing the columns are reused as is, spilled or not
+                    yield chunk if chunk.columns == columns else chunk.load().reindex(columns)
+
+        return self._derive(iter_chunks(), columns=columns)
+
+    def aggregate(self, func: str, columns: Optional[Sequence] = None) -> MappedSequence:
+        """Aggregate each column, ignoring None values.
+
+        Parameters
+        ----------
+        func: str
+            One of 'count', 'sum', 'min', 'max' or 'mean'.
+        columns: Optional[Sequence]
+            Columns to aggregate, all by default.
+
+        Returns
+        -------
+        MappedSequence
+        Aggregated values indexed by the columns.
+        """
+        funcs = {'count', 'sum', 'min', 'max', 'mean'}
+        assert func in funcs, 'func should be one of {}, got {} instead'.format(funcs, func)
+        columns = self._columns if columns is None else tuple(columns)
+        counts = dict.fromkeys(columns, 0)
+        results = dict.fromkeys(columns)
+
+        # combine partial results computed on each chunk
+        for table in self.iter_tables():
+            for col in columns:
+                values = [value for value in table[col] if value is not None]
+                if not values:
+                    continue
+                counts[col] += len(values)
+                if func in ('sum', 'mean'):
+                    partial = sum(values)
+                    results[col] = partial if results[col] is None else results[col] + partial
+                elif func == 'min':
+                    partial = min(values)
+                    results[col] = partial if results[col] is None else min(results[col], partial)
+                elif func == 'max':
+                    partial = max(values)
+                    results[col] = partial if results[col] is None else max(results[col], partial)
+
+        if func == 'count':
+            new_values = [counts[col] for col in columns]
+        elif func == 'mean':
+            new_values = [results[col] / counts[col] if counts[col] else None for col in columns]
+        else:
+            new_values = [results[col] for col in columns]
+        return MappedSequence(new_values, keys=columns, name=func)
+
+    def count(self, columns=None):
+        return self.aggregate('count', columns)
+
+    def sum(self, columns=None):
+        return self.aggregate('sum', columns)
+
+    def min(self, columns=None):
+        return self.aggregate('min', columns)
+
+    def max(self, columns=None):
+        return self.aggregate('max', columns)
+
+    def mean(self, columns=None):
+        return self.aggregate('mean', columns)
+
+    def _key_positions(self, key) -> List[int]:
+        """Position of the sort key in the rows formatted as (index, *values)"""
+        keys = [key] if is_scalar(key) else list(key)
+        positions = []
+        for k in keys:
+            # as for MappedSequence, integers that are not column names are positions
+            position = k if type(k) is int and k not in self._columns else self._columns.index(k)
+            positions.append(position + 1)
+        return positions
+
+    def sort_values(self, key: Union[int, str, Iterable[str]], ascending: bool = True,
+                    chunksize: int = DEFAULT_CHUNKSIZE) -> 'PartitionedTable':
+        """External sort: each chunk is sorted into a run, spilled if a memory budget is set, and the runs are then
+        merged with a k-way merge.
+        """
+        positions = self._key_positions(key)
+        if is_scalar(key):
+            position = positions[0]
+            sort_key = lambda row: _null_last(row[position], ascending)
+        else:
+            sort_key = lambda row: tuple(_null_last(row[position], ascending) for position in positions)
+
+        directory = None if self._memory_budget is None else self._spill_directory()
+        runs = []
+        for table in self.iter_tables():
+            run = _RowStore(directory)
+            run.extend(_iter_rows(table.sort_values(key, ascending=ascending)))
+            runs.append(run)
+
+        def merged():
+            try:
+                yield from heapq.merge(*runs, key=sort_key, reverse=not ascending)
+            finally:
+                for run in runs:
+                    run.release()
+
+        return self._derive(_tables_from_rows(merged(), self._columns, chunksize))
+
+    def _partition(self, position: int, partitions: int, bounds=None) -> List[_RowStore]:
+        """Scatter the rows, without index, in buckets according to the hash of the value at position. Chunks whose
+        values at position are out of bounds, as returned by :func:`table.stats.key_range`, are skipped."""
+        directory = None if self._memory_budget is None else self._spill_directory()
+        buckets = [_RowStore(directory) for _ in range(partitions)]
+        column = self._columns[position]
+        for chunk in self._chunks:
+            if bounds is not None and not overlaps(chunk.stats()[column], bounds):
+                continue
+            for row in zip(*chunk.load().column_values):
+                buckets[hash(row[position]) % partitions].append(row)
+        return buckets
+
+    def merge(self, right: Union['PartitionedTable', MappedTable], on=None, left_on=None, right_on=None,
+              how='inner', suffixes=('_x', '_y'), partitions: Optional[int] = None,
+              chunksize: int = DEFAULT_CHUNKSIZE) -> 'PartitionedTable':
+        """Grace hash join: both tables are scattered in buckets on the hash of the join key, then each pair of
+        buckets is joined in memory.
+
+        Parameters
+        ----------
+        partitions: Optional[int]
+            Number of buckets. By default, enough buckets for the largest table to fit in the memory budget.
+        """
+        assert on is not None or (left_on is not None and right_on is not None), \
+            'either `on` argument or left_on and right_on should not be None'
+        how_ = {'left', 'right', 'inner', 'outer'}
+        assert how in how_, 'how should be one of {}, got {} instead'.format(how_, how)
+        if on is not None:
+            left_on = right_on = on
+        if isinstance(right, MappedTable):
+            right = PartitionedTable([right], memory_budget=self._memory_budget, spill_dir=self._spill_dir)
+        assert left_on in self._columns, '{} not found in columns of left'.format(left_on)
+        assert right_on in right.columns, '{} not found in columns of right'.format(right_on)
+
+        if partitions is None:
+            cells = max(self.shape[0] * self.shape[1], right.shape[0] * right.shape[1])
+            partitions = 1 if self._memory_budget is None else max(1, -(-cells // max(self._memory_budget, 1)))
+
+        _, _, new_columns = _merge_columns(self._columns, right.columns, left_on, right_on, suffixes)
+        left_position = self._columns.index(left_on)
+        right_position = right.columns.index(right_on)
+        left_others = [i for i, col in enumerate(self._columns) if i != left_position]
+        right_others = [i for i, col in enumerate(right.columns) if i != right_position]
+        left_empty = (None,) * len(left_others)
+        right_empty = (None,) * len(right_others)
+        both_keys = left_on != right_on
+
+        def key_part(left_key, right_key):
+            return (left_key, right_key) if both_keys else (left_key if left_key is not None else right_key,)
+
+        # chunks out of the key range of the other table can only hold unmatched rows, which are dropped unless kept
+        # by the join type
+        left_bounds = right_bounds = None
+        if how in ('inner', 'right'):
+            left_bounds = key_range([chunk.stats()[right_on] for chunk in right._chunks])
+        if how in ('inner', 'left'):
+            right_bounds = key_range([chunk.stats()[left_on] for chunk in self._chunks])
+
+        def joined_rows():
+            left_buckets = self._partition(left_position, partitions, left_bounds)
+            right_buckets = right._partition(right_position, partitions, right_bounds)
+            n = 0
+            for left_bucket, right_bucket in zip(left_buckets, right_buckets):
+                lookup = {}
+                for row in right_bucket:
+                    lookup.setdefault(row[right_position], []).append(row)
+                matched = set()
+                for row in left_bucket:
+                    key = row[left_position]
+                    left_values = tuple(row[i] for i in left_others)
+                    matches = lookup.get(key)
+                    if matches:
+                        matched.add(key)
+                        for match in matches:
+                            yield (n, *key_part(key, key), *left_values, *(match[i] for i in right_others))
+                            n += 1
+                    elif how in ('left', 'outer'):
+                        yield (n, *key_part(key, None), *left_values, *right_empty)
+                        n += 1
+                if how in ('right', 'outer'):
+                    for key, matches in lookup.items():
+                        if key in matched:
+                            continue
+                        for match in matches:
+                            yield (n, *key_part(None, key), *left_empty, *(match[i] for i in right_others))
+                            n += 1
+                left_bucket.release()
+                right_bucket.release()
+
+        return self._derive(_tables_from_rows(joined_rows(), new_columns, chunksize), columns=new_columns)
@@ -0,0 +1,160 @@
+"""Instrumentation of the public table operations.
+
+Instrumented operations call the registered hooks with an :class:`OperationRecord` holding the wall time, the
+number of rows in and out, the bytes allocated (when tracemalloc is tracing), the number of transposes between
+row and column storage, and the memoize cache hits and misses. When no hook is registered, an instrumented call
+only costs a wrapper frame and a check of the ENABLED flag, so that element accessors such as
+:meth:`MappedTable.__getitem__`, called in loops, are not instrumented.
+
+Usage::
+
+    import table
+    with table.profile() as p:
+        result = df.pivot('continent', 'year', 'lifeExp')
+    print(p.summary())
+"""
+import functools
+import sys
+import time
+from collections import namedtuple
+from typing import Callable, List, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .mapped_table import MappedTable
+
+OperationRecord = namedtuple('OperationRecord', ['operation', 'depth', 'seconds', 'rows_in', 'rows_out',
+                                                 'bytes_allocated', 'transposes', 'cache_hits', 'cache_misses'])
+
+# True as soon as a hook is registered. Checked by instrumented functions before doing any work.
+ENABLED = False
+_hooks = []
+_depth = 0
+# event counters, only updated while ENABLED
+counters = {'transposes': 0, 'cache_hits': 0, 'cache_misses': 0}
+
+
+def add_hook(hook: Callable[[OperationRecord], None]):
+    """Register a callable receiving the record of each instrumented operation"""
+    global ENABLED
+    _hooks.append(hook)
+    ENABLED = True
+
+
+def remove_hook(hook: Callable[[OperationRecord], None]):
+    global ENABLED
+    _hooks.remove(hook)
+    ENABLED = bool(_hooks)
+
+
+def count(event: str):
+    """Increment an event counter. Callers should check ENABLED first."""
+    counters[event] += 1
+
+
+def _rows(value) -> int:
+    # avoid importing MappedTable at module level, which would create a circular import
+    from .mapped_table import MappedTable
+    from .mapped_sequence import MappedSequence
+    if isinstance(value, MappedTable):
+        return len(value)
+    elif isinstance(value, MappedSequence):
+        return len(value)
+    elif isinstance(value, (list, tuple)):
+        return sum([_rows(item) for item in value])
+    return 0
+
+
+def instrument(func):
+    """Decorator recording each call of func to the registered hooks"""
+    operation = func.__qualname__
+
+    @functools.wraps(func)
+    def inner(*args, **kwargs):
+        global _depth
+        if not ENABLED:
+            return func(*args, **kwargs)
+
+        transposes, hits, misses = counters['transposes'], counters['cache_hits'], counters['cache_misses']
+        # tracemalloc is slow to import, and can only be tracing if it was imported
+        tracemalloc = sys.modules.get('tracemalloc')
+        tracing = tracemalloc is not None and tracemalloc.is_tracing()
+        allocated = tracemalloc.get_traced_memory()[0] if tracing else 0
+        depth = _depth
+        _depth += 1
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            _depth -= 1
+        seconds = time.perf_counter() - start
+
+        record = OperationRecord(
+            operation=operation, depth=depth, seconds=seconds, rows_in=_rows(args), rows_out=_rows(result),
+            bytes_allocated=tracemalloc.get_traced_memory()[0] - allocated if tracing else None,
+            transposes=counters['transposes'] - transposes, cache_hits=counters['cache_hits'] - hits,
+            cache_misses=counters['cache_misses'] - misses,
+        )
+        for hook in list(_hooks):
+            hook(record)
+        return result
+
+    return inner
+
+
+class Profile:
+    """Context manager collecting the records of the operations called in its scope"""
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.records: List[OperationRecord] = []
+        self._started_tracing = False
+
+    def __enter__(self) -> 'Profile':
+        import tracemalloc
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        add_hook(self.records.append)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        remove_hook(self.records.append)
+        if self._started_tracing:
+            import tracemalloc
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def to_table(self) -> 'MappedTable':
+        """All records, in order of completion"""
+        from .mapped_table import MappedTable
+        return MappedTable(values=[tuple(record) for record in self.records], columns=OperationRecord._fields)
+
+    def summary(self) -> 'MappedTable':
+        """Records aggregated by operation, sorted by total time"""
+        from .mapped_table import MappedTable
+        columns = ['operation', 'calls', 'seconds', 'rows_in', 'rows_out', 'bytes_allocated', 'transposes',
+                   'cache_hits', 'cache_misses']
+        totals = {}
+        for record in self.records:
+            total = totals.setdefault(record.operation, [record.operation, 0, 0., 0, 0, 0, 0, 0, 0])
+            total[1] += 1
+            total[2] += record.seconds
+            total[3] += record.rows_in
+            total[4] += record.rows_out
+            total[5] += record.bytes_allocated or 0
+            total[6] += record.transposes
+            total[7] += record.cache_hits
+            total[8] += record.cache_misses
+        rows = sorted(totals.values(), key=lambda total: total[2], reverse=True)
+        return MappedTable(values=rows, columns=columns)
+
+
+def profile(trace_memory: bool = False) -> Profile:
+    """Profile the table operations called in a with block.
+
+    Parameters
+    ----------
+    trace_memory: bool
+        Start tracemalloc in the block to record the bytes allocated by each operation
+    """
+    return Profile(trace_memory=trace_memory)
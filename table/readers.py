@@ -0,0 +1,120 @@
+"""Readers of the csv and SQLite formats. Excel files are read by :func:`table.read_excel`."""
+import csv
+from typing import Optional, Union, Mapping, Sequence
+from .mapped_table import MappedTable
+from .utils import Interner
+
+
+def _convert(value: str):
+    """Convert a csv field to an int or a float when possible, empty fields being None"""
+    if value == '':
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def read_csv(path_or_buffer, header: Optional[int] = 0, convert: bool = True, intern: bool = True,
+             schema: Optional[Union[Mapping, Sequence[Optional[str]]]] = None, **kwargs) -> MappedTable:
+    """Read comma separated values.
+
+    Parameters
+    ----------
+    path_or_buffer:
+        Path of the file, or text buffer
+    header: Optional[int]
+        Position of the row holding the column names. If None, the columns are numbered.
+    convert: bool
+        Convert the fields to int or float when possible, and empty fields to None. Otherwise all fields are str.
+    intern: bool
+        Store repeated values only once
+    schema: Optional[Union[Mapping, Sequence[Optional[str]]]]
+        dtype tags of the columns, see :class:`MappedTable`
+    kwargs:
+        Formatting parameters of :func:`csv.reader`, such as delimiter
+
+    Returns
+    -------
+    MappedTable
+    Rows with fewer fields than columns are completed with None
+
+    Raises
+    ------
+    ValueError
+        If a row has more fields than columns
+    """
+    if not hasattr(path_or_buffer, 'read'):
+        with open(path_or_buffer, newline='') as file:
+            return read_csv(file, header=header, convert=convert, intern=intern, schema=schema, **kwargs)
+
+    reader = csv.reader(path_or_buffer, **kwargs)
+    rows = []
+    # line of each row, for the error messages
+    line_numbers = []
+    for row in reader:
+        rows.append(row)
+        line_numbers.append(reader.line_num)
+    if header is None:
+        columns = range(max(map(len, rows), default=0))
+    else:
+        columns = rows[header]
+        rows = rows[header + 1:]
+        line_numbers = line_numbers[header + 1:]
+
+    interner = Interner() if intern else None
+    width = len(columns)
+    values = []
+    for row, line_number in zip(rows, line_numbers):
+        if len(row) > width:
+            raise ValueError('line {} has {} fields, expected at most {}, the number of columns'.format(
+                line_number, len(row), width))
+        if convert:
+            row = map(_convert, row)
+        if interner is not None:
+            row = map(interner, row)
+        row = tuple(row)
+        values.append(row if len(row) >= width else row + (None,) * (width - len(row)))
+    return MappedTable(values=values, columns=columns, schema=schema)
+
+
+def read_sqlite(path, name: Optional[str] = None, query: Optional[str] = None, parameters: Sequence = (),
+                intern: bool = True) -> MappedTable:
+    """Read a table, or the result of a query, from a SQLite database.
+
+    Parameters
+    ----------
+    path:
+        Path of the database file
+    name: Optional[str]
+        Name of the table to read, the only table of the database by default
+    query: Optional[str]
+        Query to execute instead of reading a table
+    parameters: Sequence
+        Parameters of the query
+    intern: bool
+        Store repeated values only once
+    """
+    import sqlite3
+    connection = sqlite3.connect(path)
+    try:
+        if query is None:
+            if name is None:
+                names = [row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type='table'")]
+                assert len(names) == 1, 'name should be given when the database holds several tables, got {}'.format(
+                    names)
+                name = names[0]
+            query = 'SELECT * FROM "{}"'.format(name.replace('"', '""'))
+        cursor = connection.execute(query, parameters)
+        columns = [description[0] for description in cursor.description]
+        if not intern:
+            return MappedTable(values=cursor.fetchall(), columns=columns)
+        # sqlite3 returns a new object for each repeated value
+        interner = Interner()
+        return MappedTable(values=[tuple(map(interner, row)) for row in cursor], columns=columns)
+    finally:
+        connection.close()
@@ -0,0 +1,109 @@
+"""Registry of the file formats read and written by :func:`read` and :func:`write`.
+
+Readers and writers are registered as 'module:function' strings, and only imported the first time their format is
+used, so that ``import table`` does not pay for openpyxl or sqlite3. A reader takes a path and returns a table, a
+writer takes a table and a path.
+
+Usage::
+
+    import table
+    df = table.read('data.csv')
+    table.write(df, 'data.xlsx')
+    table.register_reader('parquet', 'my_package.parquet:read_parquet', extensions=['.parquet'])
+"""
+import importlib
+import os
+from typing import Callable, Dict, Iterable, Optional, Union
+
+# format name -> reader or writer, as a callable or a 'module:function' string
+_readers: Dict[str, Union[str, Callable]] = {}
+_writers: Dict[str, Union[str, Callable]] = {}
+# lower case file extension -> format name
+_extensions: Dict[str, str] = {}
+
+
+def _register(registry: dict, format: str, func: Union[str, Callable], extensions: Iterable[str]):
+    assert callable(func) or (isinstance(func, str) and ':' in func), \
+        "func should be a callable or a 'module:function' string, got {} instead".format(func)
+    registry[format] = func
+    for extension in extensions:
+        _extensions[extension.lower()] = format
+
+
+def register_reader(format: str, func: Union[str, Callable], extensions: Iterable[str] = ()):
+    """Register the reader of a format.
+
+    Parameters
+    ----------
+    format: str
+        Name of the format
+    func: Union[str, Callable]
+        Function of a path returning a table, or its 'module:function' location imported on first use
+    extensions: Iterable[str]
+        File extensions, such as '.csv', from which the format is inferred
+    """
+    _register(_readers, format, func, extensions)
+
+
+def register_writer(format: str, func: Union[str, Callable], extensions: Iterable[str] = ()):
+    """Register the writer of a format, a function of a table and a path. See :func:`register_reader`."""
+    _register(_writers, format, func, extensions)
+
+
+def _resolve(registry: dict, format: str, kind: str) -> Callable:
+    try:
+        func = registry[format]
+    except KeyError:
+        raise ValueError('no {} registered for format {}, expected one of {}'.format(kind, format,
+                                                                                     sorted(registry))) from None
+    if isinstance(func, str):
+        module, name = func.split(':')
+        func = registry[format] = getattr(importlib.import_module(module), name)
+    return func
+
+
+def infer_format(path) -> str:
+    """Name of the format registered for the extension of path"""
+    extension = os.path.splitext(os.fspath(path))[1].lower()
+    try:
+        return _extensions[extension]
+    except KeyError:
+        raise ValueError('cannot infer the format of {}, pass format explicitly'.format(path)) from None
+
+
+def get_reader(format: str) -> Callable:
+    return _resolve(_readers, format, 'reader')
+
+
+def get_writer(format: str) -> Callable:
+    return _resolve(_writers, format, 'writer')
+
+
+def read(path, format: Optional[str] = None, **kwargs):
+    """Read a file with the reader of its format, inferred from its extension by default.
+
+    Parameters
+    ----------
+    path:
+        Path of the file
+    format: Optional[str]
+        Name of a registered format, such as 'excel', 'csv', 'sqlite' or 'native'
+    kwargs:
+        Arguments of the reader
+    """
+    return get_reader(format or infer_format(path))(path, **kwargs)
+
+
+def write(table, path, format: Optional[str] = None, **kwargs):
+    """Write a table with the writer of a format, inferred from the extension of path by default. See :func:`read`."""
+    return get_writer(format or infer_format(path))(table, path, **kwargs)
+
+
+register_reader('excel', 'table.api:read_excel', extensions=['.xlsx', '.xlsm'])
+register_writer('excel', 'table.writers:to_excel')
+register_reader('csv', 'table.readers:read_csv', extensions=['.csv'])
+register_writer('csv', 'table.writers:to_csv')
+register_reader('sqlite', 'table.readers:read_sqlite', extensions=['.db', '.sqlite', '.sqlite3'])
+register_writer('sqlite', 'table.writers:to_sqlite')
+register_reader('native', 'table.native:read_native', extensions=['.stn'])
+register_writer('native', 'table.native:write_native')
@@ -0,0 +1,124 @@
+"""Column statistics, or zone maps, used to skip the columns and chunks that cannot match a predicate.
+
+Statistics are computed once per column, at first use, and memoized with the column. Chunks of a
+:class:`~table.PartitionedTable` keep the statistics of their columns when they are spilled, so that whole chunks can
+be skipped without reading them back.
+"""
+from collections import namedtuple
+from typing import Any, Iterable, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .mapped_sequence import MappedSequence
+
+ColumnStats = namedtuple('ColumnStats', ['count', 'null_count', 'min', 'max', 'distinct', 'increasing',
+                                         'decreasing'])
+ColumnStats.__doc__ = """Statistics of a column.
+
+count and null_count are the numbers of values and of None values. min and max ignore None values, and are None when
+there is no value or when values cannot be ordered. distinct is the number of distinct values that are not None,
+None for unhashable values. increasing and decreasing tell whether the column is sorted.
+"""
+
+OPERATORS = ('==', '!=', '<', '<=', '>', '>=')
+
+
+def column_stats(sequence: 'MappedSequence') -> ColumnStats:
+    """Compute the statistics of a column"""
+    null_count = sequence.null_count()
+    try:
+        minimum, maximum = sequence.min(), sequence.max()
+    except TypeError:
+        minimum = maximum = None
+    if minimum != minimum or maximum != maximum:
+        # NaN values are not ordered
+        minimum = maximum = None
+    try:
+        distinct = len(set(sequence.values())) - (null_count > 0)
+    except TypeError:
+        distinct = None
+    increasing, decreasing = sequence._monotonic()
+    return ColumnStats(count=len(sequence), null_count=null_count, min=minimum, max=maximum, distinct=distinct,
+                       increasing=increasing, decreasing=decreasing)
+
+
+def may_match(stats: ColumnStats, op: str, value: Any) -> bool:
+    """Whether some values of a column described by stats may satisfy `column op value`.
+
+    False is only returned when no value can match. None values only match equality with None.
+    """
+    assert op in OPERATORS, 'op should be one of {}, got {} instead'.format(OPERATORS, op)
+    if stats.count == 0:
+        return False
+    if value is None:
+        if op == '==':
+            return stats.null_count > 0
+        return op == '!=' and stats.null_count < stats.count
+    if op == '!=':
+        return not (stats.null_count == 0 and stats.min == value and stats.max == value)
+    if stats.null_count == stats.count:
+        return False
+    if stats.min is None:
+        # values cannot be ordered
+        return True
+    try:
+        if op == '==':
+            return stats.min <= value <= stats.max
+        elif op == '<':
+            return stats.min < value
+        elif op == '<=':
+            return stats.min <= value
+        elif op == '>':
+            return stats.max > value
+        return stats.max >= value
+    except TypeError:
+        return True
+
+
+def all_match(stats: ColumnStats, op: str, value: Any) -> bool:
+    """Whether all values of a column described by stats satisfy `column op value`, so that the predicate can be
+    skipped"""
+    if stats.count == 0:
+        return True
+    if value is None or stats.null_count > 0 or stats.min is None:
+        return False
+    try:
+        if op == '==':
+            return stats.min == value and stats.max == value
+        elif op == '!=':
+            return not (stats.min <= value <= stats.max)
+        elif op == '<':
+            return stats.max < value
+        elif op == '<=':
+            return stats.max <= value
+        elif op == '>':
+            return stats.min > value
+        return stats.min >= value
+    except TypeError:
+        return False
+
+
+def key_range(stats: Iterable[ColumnStats]) -> Optional[Tuple[Any, Any]]:
+    """Range (min, max) covered by several chunks of a column, or None when it cannot be used for pruning, that is
+    when some values are None or cannot be ordered"""
+    stats = list(stats)
+    if not stats or any([chunk.null_count > 0 or chunk.min is None for chunk in stats]):
+        return None
+    try:
+        return min([chunk.min for chunk in stats]), max([chunk.max for chunk in stats])
+    except TypeError:
+        return None
+
+
+def overlaps(stats: ColumnStats, bounds: Optional[Tuple[Any, Any]]) -> bool:
+    """Whether a column described by stats may hold values equal to values of the range bounds, as returned by
+    :func:`key_range`. None bounds match everything."""
+    if bounds is None:
+        return True
+    if stats.null_count == stats.count:
+        return False
+    if stats.min is None:
+        return True
+    try:
+        return not (stats.max < bounds[0] or stats.min > bounds[1])
+    except TypeError:
+        return True
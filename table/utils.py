@@ -1,11 +1,13 @@
 from collections.abc import Iterable
-import six
+import datetime
+import sys
+from typing import Optional, Set
 
 
 def is_iterable(arg):
     return (
             isinstance(arg, Iterable)
-            and not isinstance(arg, six.string_types)
+            and not isinstance(arg, str)
     )
 
 
@@ -28,3 +30,60 @@ class NullOrder(object):
             return False
 
         return True
+
+
+# size in bytes of a reference held by a tuple or a list
+REFERENCE_SIZE = sys.getsizeof((None,)) - sys.getsizeof(())
+
+
+def getsizeof(obj, seen: Optional[Set[int]] = None, deep: bool = True) -> int:
+    """
+    Size in bytes of obj. If deep, the size of the objects it contains is included.
+
+    Objects whose id is in seen are not counted, and counted objects are added to seen, so that objects shared between
+    several containers are only counted once.
+    """
+    if seen is None:
+        seen = set()
+    size = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if not deep:
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (tuple, list, set, frozenset)):
+            stack.extend(obj)
+        else:
+            for cls in type(obj).__mro__:
+                for slot in getattr(cls, '__slots__', ()):
+                    if slot != '__weakref__' and hasattr(obj, slot):
+                        stack.append(getattr(obj, slot))
+    return size
+
+
+class Interner:
+    """
+    Deduplicate equal immutable values, so that repeated values read from a file share a single object.
+
+    Values are pooled by type, so that equal values of different types (1, 1.0 and True) are kept distinct.
+    """
+
+    types = (str, bytes, int, float, datetime.datetime, datetime.date, datetime.time, datetime.timedelta)
+
+    def __init__(self):
+        self._pools = {}
+
+    def __call__(self, value):
+        pool = self._pools.get(type(value))
+        if pool is None:
+            if type(value) not in self.types:
+                return value
+            pool = self._pools[type(value)] = {}
+        return pool.setdefault(value, value)
@@ -0,0 +1,129 @@
+"""Materialized aggregate views, updated incrementally when rows are appended.
+
+A view keeps the accumulator state of each aggregation of each group (see :class:`~table.aggregation.Accumulator`):
+sums, counts, Welford moments and extrema are updated from each batch of new rows in O(batch), while aggregations
+that cannot be summarized, such as the median or callables, keep the values of their groups and are recomputed only
+for the groups that received rows. The result table is rebuilt from the states on the first access after an update.
+
+Views do not hold the source table, and are not updated automatically: :func:`concat` and :class:`TableBuilder` do
+not know about them. The caller must call `view.append` with each batch of rows added to the table, for instance by
+passing it as the sink of a :class:`TableBuilder`::
+
+    view = table.groupby('continent').materialize({'pop': 'sum', 'lifeExp': 'mean'})
+    builder = TableBuilder(table.columns, chunksize=1000, sink=view.append)
+    ...
+    view.table
+"""
+from typing import Callable, Union
+from .aggregation import get_accumulator
+from .groupby import GroupBy
+from .mapped_sequence import MappedSequence
+from .mapped_table import MappedTable, _pivot_layout, _sorted_keys
+from .profiling import instrument
+
+
+class GroupView:
+    """Aggregates of the groups of a table, built by :meth:`GroupBy.materialize`"""
+
+    def __init__(self, table: MappedTable, by=None, level=None, func: Union[str, Callable, list, dict] = 'mean',
+                 sort: bool = True):
+        groupby = GroupBy(table, by=by, level=level, sort=False)
+        if type(func) is list:
+            func = {col: func for col in groupby._value_columns()}
+        self._by = by
+        self._level = level
+        self._sort = sort
+        self._name = groupby.name
+        self._specs = groupby._specs(func)
+        self._columns = tuple(table.columns)
+        self._factories = [get_accumulator(agg_func, table.column_values[col].dtype)
+                           for col, agg_func, _ in self._specs]
+        # group key -> accumulator of each aggregation
+        self._states = {}
+        self._table = None
+        self._update(groupby)
+
+    def __len__(self):
+        return len(self._states)
+
+    @instrument
+    def append(self, rows: MappedTable):
+        """Update the aggregates with new rows, which should have the columns of the table of the view"""
+        assert tuple(rows.columns) == self._columns, 'rows should have the columns {}, got {}'.format(
+            self._columns, tuple(rows.columns))
+        self._update(GroupBy(rows, by=self._by, level=self._level, sort=False))
+
+    def _update(self, groupby: GroupBy):
+        columns = [groupby.table.column_values[col].values() for col, _, _ in self._specs]
+        for key, positions in groupby.groups.items():
+            state = self._states.get(key)
+            if state is None:
+                state = self._states[key] = [factory() for factory in self._factories]
+            for accumulator, values in zip(state, columns):
+                accumulator.update([values[i] for i in positions])
+        self._table = None
+
+    @property
+    def table(self) -> MappedTable:
+        """Aggregates of each group, laid out as :meth:`GroupBy.agg`"""
+        if self._table is None:
+            keys = _sorted_keys(self._states) if self._sort else list(self._states)
+            states = [self._states[key] for key in keys]
+            new_values = [[state[i].result() for state in states] for i in range(len(self._specs))]
+            self._table = MappedTable(values=new_values, columns=[name for _, _, name in self._specs],
+                                      index=MappedSequence(keys, name=self._name), axis=1)
+        return self._table
+
+
+class PivotView:
+    """Pivot table updated incrementally, built by :meth:`MappedTable.pivot_table` with incremental=True"""
+
+    def __init__(self, table: MappedTable, index, columns, values=None, agg_func: Union[str, Callable] = 'mean',
+                 fill_value=None, margins: bool = False, margins_name: str = 'All'):
+        self._vars = table._pivot_vars(index, columns, values)
+        self._columns = tuple(table.columns)
+        self._fill_value = fill_value
+        self._margins = margins
+        self._margins_name = margins_name
+        self._factories = [get_accumulator(agg_func, table.column_values[col].dtype) for col in self._vars[2]]
+        # accumulators of each (index, column) key, of each index key and column key, and of all values
+        self._groups = {}
+        self._row_margins = {}
+        self._column_margins = {}
+        self._total = self._state()
+        self._table = None
+        self._update(table)
+
+    def _state(self) -> list:
+        return [factory() for factory in self._factories]
+
+    @instrument
+    def append(self, rows: MappedTable):
+        """Update the pivot with new rows, which should have the columns of the table of the view"""
+        assert tuple(rows.columns) == self._columns, 'rows should have the columns {}, got {}'.format(
+            self._columns, tuple(rows.columns))
+        self._update(rows)
+
+    def _update(self, rows: MappedTable):
+        groups, row_margins, column_margins, total = rows._pivot_groups(*self._vars, margins=self._margins)
+        for states, batch in ((self._groups, groups), (self._row_margins, row_margins),
+                              (self._column_margins, column_margins)):
+            for key, lists in batch.items():
+                state = states.get(key)
+                if state is None:
+                    state = states[key] = self._state()
+                for accumulator, values in zip(state, lists):
+                    accumulator.update(values)
+        if self._margins:
+            for accumulator, values in zip(self._total, total):
+                accumulator.update(values)
+        self._table = None
+
+    @property
+    def table(self) -> MappedTable:
+        """Pivot table laid out as :meth:`MappedTable.pivot_table`"""
+        if self._table is None:
+            self._table = _pivot_layout(*self._vars, self._groups, self._row_margins, self._column_margins,
+                                        self._total, lambda state, i: state[i].result(), self._fill_value,
+                                        self._margins, self._margins_name)
+        return self._table
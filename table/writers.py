@@ -0,0 +1,162 @@
+"""Streaming writers.
+
+Rows are read lazily from whichever orientation a table stores, so that writing never transposes the table. Writers
+accept a table or an iterable of tables sharing the same columns, such as the chunks of a
+:class:`~table.PartitionedTable`, so that a read, transform and write pipeline runs in constant memory.
+"""
+import csv
+import io
+from itertools import chain, islice
+from typing import Iterable, Iterator, Union
+from .dtypes import sqlite_type
+from .mapped_table import MappedTable
+
+
+def iter_rows(table: MappedTable, index: bool = False) -> Iterator[tuple]:
+    """Iterate over the rows of a table as tuples, without building row_values"""
+    if table._column_values is not None:
+        columns = [column.values() for column in table._column_values.values()]
+        if index:
+            columns.insert(0, table.index.values())
+        if not columns:
+            return iter([()] * len(table))
+        return zip(*columns)
+    rows = (row.values() for row in table._row_values.values())
+    if index:
+        return ((label, *row) for label, row in zip(table.index.values(), rows))
+    return rows
+
+
+def _iter_chunks(chunks: Union[MappedTable, Iterable[MappedTable]]) -> Iterator[MappedTable]:
+    """Iterate over the chunks, checking they all have the columns of the first one"""
+    if isinstance(chunks, MappedTable):
+        chunks = [chunks]
+    columns = None
+    for chunk in chunks:
+        if columns is None:
+            columns = chunk.columns.values()
+        assert chunk.columns.values() == columns, 'all chunks should have the same columns'
+        yield chunk
+
+
+def _header_rows(columns: tuple, index: bool) -> list:
+    """Header rows, one per level when columns are tuples"""
+    levels = max([len(column) if type(column) is tuple else 1 for column in columns], default=1)
+    if levels == 1:
+        return [[''] * index + list(columns)]
+    return [[''] * index + [column[level] if type(column) is tuple else column if level == 0 else ''
+                            for column in columns]
+            for level in range(levels)]
+
+
+def to_csv(chunks: Union[MappedTable, Iterable[MappedTable]], path_or_buffer=None, index: bool = False,
+           header: bool = True, chunksize: int = 10000, **kwargs):
+    """Write a table, or an iterable of tables, as comma separated values.
+
+    Parameters
+    ----------
+    chunks: Union[MappedTable, Iterable[MappedTable]]
+        Table or iterable of tables with the same columns, written one after the other
+    path_or_buffer:
+        Path of the written file, or text buffer. If None, the content is returned as a string.
+    index: bool
+        Write the index as the first column
+    header: bool
+        Write the column names as the first row
+    chunksize: int
+        Number of rows given to the csv writer at once
+    kwargs:
+        Formatting parameters of :func:`csv.writer`, such as delimiter
+    """
+    if path_or_buffer is None:
+        buffer = io.StringIO()
+        to_csv(chunks, buffer, index=index, header=header, chunksize=chunksize, **kwargs)
+        return buffer.getvalue()
+    if not hasattr(path_or_buffer, 'write'):
+        with open(path_or_buffer, 'w', newline='') as file:
+            return to_csv(chunks, file, index=index, header=header, chunksize=chunksize, **kwargs)
+
+    writer = csv.writer(path_or_buffer, **kwargs)
+    first = True
+    for chunk in _iter_chunks(chunks):
+        if first and header:
+            writer.writerows(_header_rows(chunk.columns.values(), index))
+        first = False
+        rows = iter_rows(chunk, index=index)
+        for batch in iter(lambda: list(islice(rows, chunksize)), []):
+            writer.writerows(batch)
+
+
+def to_excel(chunks: Union[MappedTable, Iterable[MappedTable]], path, sheetname: str = 'Sheet1',
+             index: bool = False, header: bool = True):
+    """Write a table, or an iterable of tables, to a new excel file.
+
+    The workbook is opened in write-only mode, so that rows are streamed to the file instead of being stored as
+    cell objects.
+
+    Parameters
+    ----------
+    chunks: Union[MappedTable, Iterable[MappedTable]]
+        Table or iterable of tables with the same columns, written one after the other
+    path:
+        Path or binary file object of the written workbook
+    sheetname: str
+        Title of the sheet
+    index: bool
+        Write the index as the first column
+    header: bool
+        Write the column names as the first row
+    """
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=sheetname)
+    first = True
+    for chunk in _iter_chunks(chunks):
+        rows = iter_rows(chunk, index=index)
+        if first and header:
+            rows = chain(_header_rows(chunk.columns.values(), index), rows)
+        first = False
+        for row in rows:
+            sheet.append(row)
+    workbook.save(path)
+
+
+def to_sqlite(chunks: Union[MappedTable, Iterable[MappedTable]], path, name: str, if_exists: str = 'fail'):
+    """Write a table, or an iterable of tables, to a table of a SQLite database.
+
+    Parameters
+    ----------
+    chunks: Union[MappedTable, Iterable[MappedTable]]
+        Table or iterable of tables with the same columns, written one after the other
+    path:
+        Path of the database file, created if needed
+    name: str
+        Name of the written table
+    if_exists: str
+        What to do when the table exists: 'fail', 'replace' or 'append'
+    """
+    import sqlite3
+    options = ('fail', 'replace', 'append')
+    assert if_exists in options, 'if_exists should be one of {}, got {} instead'.format(options, if_exists)
+
+    quoted = '"{}"'.format(name.replace('"', '""'))
+    connection = sqlite3.connect(path)
+    try:
+        with connection:
+            if if_exists == 'replace':
+                connection.execute('DROP TABLE IF EXISTS {}'.format(quoted))
+            first = True
+            for chunk in _iter_chunks(chunks):
+                columns = ['"{}"'.format(str(column).replace('"', '""')) for column in chunk.columns]
+                if first:
+                    # the table is created from the dtypes of the first chunk
+                    definitions = ['{} {}'.format(column, sqlite_type(dtype))
+                                   for column, dtype in zip(columns, chunk.dtypes.values())]
+                    exists = ' IF NOT EXISTS' if if_exists == 'append' else ''
+                    connection.execute('CREATE TABLE{} {}({})'.format(exists, quoted, ', '.join(definitions)))
+                    first = False
+                query = 'INSERT INTO {}({}) VALUES ({})'.format(quoted, ', '.join(columns),
+                                                                 ', '.join('?' * len(columns)))
+                connection.executemany(query, iter_rows(chunk))
+    finally:
+        connection.close()
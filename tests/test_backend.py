@@ -0,0 +1,103 @@
+import os
+import pickle
+import subprocess
+import sys
+import unittest
+from table import MappedTable, MappedSequence, backend, bench, merge
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class BackendMixin:
+    backend_name = None
+
+    def setUp(self) -> None:
+        self.previous = backend.get_backend().name
+        backend.set_backend(self.backend_name)
+        self.table = MappedTable.from_excel('../gapminder.xlsx')
+
+    def tearDown(self) -> None:
+        backend.set_backend(self.previous)
+
+    def test_reduce(self):
+        self.assertEqual(self.table['pop'].sum(), sum(self.table['pop']))
+        self.assertEqual(self.table['year'].min(), 1952)
+        self.assertEqual(self.table['lifeExp'].max(), max(self.table['lifeExp']))
+        self.assertAlmostEqual(self.table['lifeExp'].mean(), sum(self.table['lifeExp']) / len(self.table))
+        self.assertIsNone(MappedSequence([None]).max())
+
+    def test_compare(self):
+        mask = self.table['year'].compare('>', 2000)
+        self.assertEqual(mask.values(), tuple(year > 2000 for year in self.table['year']))
+        self.assertEqual(len(self.table.where(year=2007)), 142)
+
+    def test_sort(self):
+        expected = sorted(range(len(self.table)), key=self.table['lifeExp'].values().__getitem__, reverse=True)
+        result = self.table.sort_values('lifeExp', ascending=False)
+        self.assertEqual(result.index, tuple(expected))
+        result = self.table.sort_values(['year', 'pop'])
+        self.assertEqual(result['country'].values()[0], 'Sao Tome and Principe')
+        result = self.table.sort_values(['year', 'pop'], ascending=False)
+        self.assertEqual(result['country'].values()[0], 'China')
+
+    def test_group_positions(self):
+        groups = self.table['year'].group_positions()
+        self.assertEqual(list(groups)[:2], [1952, 1957])
+        self.assertEqual(groups[1952][:2], [0, 12])
+        self.assertEqual(self.table['year'].value_counts()[1952], 142)
+
+    def test_storage(self):
+        # the typed array is memoized aside the values, which are kept as given
+        column = MappedSequence([1, 2.5, 3], name='x')
+        self.assertEqual(column.mean(), 6.5 / 3)
+        self.assertEqual(column.values(), (1, 2.5, 3))
+        self.assertIs(type(column.values()[0]), int)
+        self.assertIn('_array', column.cache_info())
+        self.assertEqual(pickle.loads(pickle.dumps(column)).values(), column.values())
+        flags = MappedSequence([True, False], dtype='int')
+        self.assertEqual(flags.sum(), 1)
+        self.assertIs(flags[0], True)
+
+    def test_array_dtype(self):
+        # typed arrays follow the dtype tag of the column
+        self.assertIsNotNone(MappedSequence([1, 2]).array())
+        self.assertIsNone(MappedSequence([1, None]).array())
+        self.assertIsNone(MappedSequence(['a', 'b']).array())
+        self.assertIsNone(MappedSequence(['a', 'b'], dtype='int').array())
+
+    def test_merge(self):
+        left = MappedTable([(i % 7, i) for i in range(50)], columns=['key', 'x'])
+        right = MappedTable([(i % 5, -i) for i in range(20)], columns=['key', 'y'])
+        result = merge(left, right, on='key', how='outer')
+        expected = [(key, x, y) for key in range(7) for x in range(50) if x % 7 == key
+                    for y in ([-y for y in range(20) if y % 5 == key] or [None])]
+        self.assertEqual(result.to_list(), expected)
+
+
+class TestPythonBackend(BackendMixin, unittest.TestCase):
+    backend_name = 'python'
+
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class TestNumpyBackend(BackendMixin, unittest.TestCase):
+    backend_name = 'numpy'
+
+    def test_array(self):
+        self.assertIsInstance(self.table['year'].array(), numpy.ndarray)
+        self.assertIsNone(self.table['country'].array())
+
+
+@unittest.skipIf(os.environ.get('SIMPLETABLE_BACKEND'), 'the suite runs under a chosen backend')
+class TestSuiteBackends(unittest.TestCase):
+    def test_suite(self):
+        # the whole suite runs again under each backend, to prove that their results are identical
+        tests = os.path.join(bench.ROOT, 'tests')
+        for name in ('python', 'numpy') if numpy is not None else ('python',):
+            env = dict(os.environ, SIMPLETABLE_BACKEND=name, PYTHONPATH=bench.ROOT)
+            process = subprocess.run([sys.executable, '-m', 'unittest', 'discover', '-s', tests, '-t', bench.ROOT],
+                                     stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True,
+                                     cwd=tests, env=env)
+            self.assertEqual(process.returncode, 0, '{} backend:\n{}'.format(name, process.stdout[-4000:]))
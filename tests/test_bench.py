@@ -0,0 +1,15 @@
+import json
+import unittest
+from table import bench
+
+
+class TestBench(unittest.TestCase):
+    def test_run(self):
+        results = bench.run(sizes=[50], repeat=1, only=['init', 'pivot', 'merge_left'], verbose=False)
+        self.assertIn('init_axis0[50]', results['results'])
+        self.assertIn('pivot[50]', results['results'])
+        self.assertNotIn('melt[50]', results['results'])
+        self.assertGreater(results['results']['init_axis1[50]']['peak_bytes'], 0)
+        # results are JSON serializable and can be compared with a baseline
+        baseline = json.loads(json.dumps(results))
+        self.assertEqual(bench.compare(results, baseline, threshold=1.), [])
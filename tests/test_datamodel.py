@@ -0,0 +1,19 @@
+import unittest
+from table import MappedTable
+from sqlite_wrap.datamodel import DataModel
+from sqlite_wrap.datatypes import get_datatypes
+
+
+class TestDataModel(unittest.TestCase):
+    def test_datatypes(self):
+        self.assertEqual(get_datatypes(float), 'REAL')
+        self.assertEqual(get_datatypes(int), 'INTEGER')
+        self.assertEqual(get_datatypes('category'), 'TEXT')
+        self.assertEqual(get_datatypes('object'), 'NONE')
+
+    def test_insert_table(self):
+        model = DataModel()
+        model.insert_table('typed', MappedTable([(1, 'a', 0.5)], columns=['x', 'y', 'z']))
+        info = model._db.execute('PRAGMA table_info(typed)').fetchall()
+        self.assertEqual([row[2] for row in info], ['INTEGER', 'TEXT', 'REAL'])
+        model._execute('DROP TABLE typed')
@@ -0,0 +1,18 @@
+import subprocess
+import sys
+import unittest
+from table import bench
+
+
+class TestImport(unittest.TestCase):
+    def test_lazy_imports(self):
+        # optional and slow modules are only imported when used
+        code = ('import sys, table; print(",".join(module for module in ("openpyxl", "six", "statistics", "asyncio", '
+                '"sqlite3", "tempfile", "hashlib", "concurrent.futures") if module in sys.modules))')
+        output = subprocess.run([sys.executable, '-c', code], stdout=subprocess.PIPE, universal_newlines=True,
+                                check=True, cwd=bench.ROOT).stdout
+        self.assertEqual(output.strip(), '')
+
+    def test_import_time(self):
+        # generous margin over IMPORT_BUDGET, for slow test machines
+        self.assertLess(bench.import_time(repeat=1), 4 * bench.IMPORT_BUDGET)
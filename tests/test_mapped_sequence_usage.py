@@ -1,5 +1,6 @@
+import pickle
 import unittest
-from table import MappedSequence
+from table import MappedSequence, cache
 
 
 class TestMappedSequenceUse(unittest.TestCase):
@@ -29,12 +30,106 @@ class TestMappedSequenceUse(unittest.TestCase):
     def test_unique(self):
         self.assertEqual(self.mapped_sequence.unique(), (0, 1, 2))
 
+    def test_value_counts(self):
+        sequence = MappedSequence([2, 1, 2, 0])
+        self.assertEqual(sequence.unique(), (2, 1, 0))
+        self.assertEqual(sequence.value_counts(), (2, 1, 1))
+        self.assertEqual(sequence.value_counts().keys(), (2, 1, 0))
+
     def test_fillnone(self):
         sequence = self.mapped_sequence.reindex(['a', 'b', 'c', 'd'])
         self.assertEqual(sequence, (0, 1, 2, None))
         self.assertEqual(sequence.fillnone(0), (0, 1, 2, 0))
+        self.assertEqual(sequence.null_count(), 1)
+        self.assertEqual(sequence.fillnone(method='ffill'), (0, 1, 2, 2))
+        self.assertEqual(MappedSequence([None, 1]).fillnone(method='bfill'), (1, 1))
+        self.assertIs(self.mapped_sequence.fillnone(0), self.mapped_sequence)
 
     def test_where(self):
         self.assertEqual(self.mapped_sequence.where(0), ['a'])
         self.assertEqual(self.mapped_sequence.where(0), ['a'])
         self.assertEqual(self.mapped_sequence.where(lambda x: x == 0), ['a'])
+
+    def test_pickle(self):
+        self.mapped_sequence.unique()
+        sequence = pickle.loads(pickle.dumps(self.mapped_sequence))
+        self.assertEqual(sequence, self.mapped_sequence)
+        self.assertEqual(sequence['b'], 1)
+        self.assertEqual(sequence.unique(), (0, 1, 2))
+
+    def test_cache(self):
+        sequence = MappedSequence([None, None])
+        self.assertEqual(sequence.null_count(), 2)
+        self.assertIn('null_count', sequence.cache_info())
+        sequence.clear_cache()
+        self.assertEqual(sequence.cache_info(), {})
+
+        first = MappedSequence(range(1000))
+        second = MappedSequence(range(1000))
+        try:
+            cache.set_budget(cache.entry_cost(tuple(range(1000))) + 100)
+            first.unique()
+            self.assertIn('unique', first.cache_info())
+            # memoizing the second result evicts the least recently used one
+            second.unique()
+            self.assertNotIn('unique', first.cache_info())
+            self.assertIn('unique', second.cache_info())
+            self.assertLessEqual(cache.usage(), cache.BUDGET)
+            del second
+            self.assertEqual(cache.usage(), 0)
+        finally:
+            cache.set_budget(None)
+
+    def test_positions(self):
+        # the first occurrence of duplicate keys is retrieved
+        sequence = MappedSequence([1, 2, 3], keys=['a', 'b', 'a'])
+        self.assertEqual(sequence['a'], 1)
+        self.assertEqual(sequence[['a']].values(), (1,))
+        self.assertEqual(sequence.get('a'), 1)
+        # sequences of the same keys object share their positions
+        keys = ('x', 'y')
+        first, second = MappedSequence([0, 1], keys=keys), MappedSequence([2, 3], keys=keys)
+        self.assertEqual(second['y'], 3)
+        self.assertIs(first._positions(), second._positions())
+        self.assertIsNot(first._positions(), MappedSequence([0, 1], keys=['x', 'y'])._positions())
+
+    def test_digest(self):
+        sequence = MappedSequence([0, 1, 2])
+        self.assertEqual(hash(sequence), hash((0, 1, 2)))
+        self.assertIsInstance(sequence.digest(), int)
+        self.assertIn('_digest', sequence.cache_info())
+        self.assertEqual(sequence.digest(), MappedSequence([0, 1, 2], keys=['a', 'b', 'c']).digest())
+        # unlike hash, the digest tells -1 from -2, and 1.0 is encoded as 1 in a float column
+        self.assertNotEqual(MappedSequence([-1]).digest(), MappedSequence([-2]).digest())
+        self.assertEqual(MappedSequence([1, 2.5]).digest(), MappedSequence([1.0, 2.5]).digest())
+        self.assertEqual(MappedSequence([-0.0, 2.5]), MappedSequence([0.0, 2.5]))
+        self.assertNotEqual(sequence, MappedSequence([0, 1, 3]))
+        unhashable = MappedSequence([[0], [1]])
+        self.assertIsInstance(unhashable.digest(), int)
+        with self.assertRaises(TypeError):
+            hash(unhashable)
+
+    def test_stats(self):
+        stats = MappedSequence([3, None, 1, 3]).stats()
+        self.assertEqual((stats.count, stats.null_count, stats.min, stats.max, stats.distinct), (4, 1, 1, 3, 2))
+        self.assertFalse(stats.increasing)
+        stats = MappedSequence(['a', 'b', 'b']).stats()
+        self.assertEqual((stats.min, stats.max, stats.distinct, stats.increasing), ('a', 'b', 2, True))
+        stats = MappedSequence([1, 'a', [0]]).stats()
+        self.assertEqual((stats.min, stats.distinct), (None, None))
+
+    def test_dtype(self):
+        self.assertEqual(MappedSequence([1, None, 2]).dtype, 'int')
+        self.assertEqual(MappedSequence([1, 2.5]).dtype, 'float')
+        self.assertEqual(MappedSequence(['a', 1]).dtype, 'object')
+        self.assertEqual(MappedSequence([None]).dtype, 'object')
+        self.assertEqual(MappedSequence(['a', 'b'], dtype='category').dtype, 'category')
+        self.assertEqual(MappedSequence([1, 2], dtype=str)[:1].dtype, 'str')
+        with self.assertRaises(AssertionError):
+            MappedSequence([1], dtype='complex')
+
+    def test_argsort_none(self):
+        sequence = MappedSequence([2, None, 1, 2])
+        self.assertEqual(sequence.argsort(), [2, 0, 3, 1])
+        self.assertEqual(sequence.argsort(ascending=False), [0, 3, 2, 1])
+        self.assertEqual(MappedSequence(['b', 1, 'a']).argsort(), [1, 2, 0])
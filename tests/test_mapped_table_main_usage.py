@@ -1,5 +1,11 @@
+import os
+import subprocess
+import sys
 import unittest
-from table import MappedTable, MappedSequence, concat, merge
+from unittest import mock
+from table import bench
+from table.formatter import TableFormatter
+from table import MappedTable, MappedSequence, concat, merge, merge_asof
 
 
 class TestMappedTable1(unittest.TestCase):
@@ -66,6 +72,23 @@ class TestMappedTable1(unittest.TestCase):
         self.assertIsInstance(result, MappedTable)
         self.assertEqual(result.shape, (150, 5))
 
+    def test_merge_duplicates(self):
+        left = MappedTable([(1, 'a'), (2, 'b'), (1, 'c'), (4, 'd')], columns=['ID', 'x'])
+        right = MappedTable([(2, 'e'), (1, 'f'), (1, 'g'), (3, 'h')], columns=['key', 'y'])
+        result = merge(left, right, left_on='ID', right_on='key', how='outer')
+        self.assertEqual(result.columns, ('ID', 'key', 'x', 'y'))
+        self.assertEqual(result.to_list(), [(1, 1, 'a', 'f'), (1, 1, 'a', 'g'), (1, 1, 'c', 'f'), (1, 1, 'c', 'g'),
+                                            (2, 2, 'b', 'e'), (None, 3, None, 'h'), (4, None, 'd', None)])
+        self.assertEqual(merge(left, right, left_on='ID', right_on='key', how='inner').shape, (5, 4))
+        self.assertEqual(merge(left, right, left_on='ID', right_on='key', how='left')['x'], tuple('aaccbd'))
+
+        # inputs sorted by their keys are merged in a single pass, without grouping, with the same result
+        expected = {how: merge(left, right, left_on='ID', right_on='key', how=how) for how in ('inner', 'outer')}
+        left, right = left.sort_values('ID'), right.sort_values('key')
+        with mock.patch.object(MappedSequence, 'group_positions', side_effect=AssertionError):
+            for how, result in expected.items():
+                self.assertEqual(merge(left, right, left_on='ID', right_on='key', how=how), result)
+
     def test_fillnone(self):
         new_columns = self.table.columns
         new_columns = ('ID',) + tuple(new_columns)
@@ -77,11 +100,77 @@ class TestMappedTable1(unittest.TestCase):
         self.assertEqual(result.shape, (150, 5))
         self.assertEqual(result[0, :], (0, 5.1, 3.5, 1.4, 0.2))
 
+    def test_dropnone(self):
+        table = self.table[0:4].reindex(('ID', *self.table.columns))
+        self.assertEqual(table.null_count()['ID'], 4)
+        self.assertEqual(table.dropnone().shape, (0, 5))
+        self.assertEqual(table.dropnone(how='all').shape, (4, 5))
+        self.assertIs(table.dropnone(subset=['sepal length (cm)']), table)
+        filled = table.fillnone({'ID': 1})
+        self.assertEqual(filled.dropnone().shape, (4, 5))
+
+        table = concat(table.fillnone({'ID': 1})[0:2], table[2:], axis=0)
+        result = table.dropnone()
+        self.assertEqual(result.index, (0, 1))
+        self.assertEqual(table.fillnone(method='ffill')['ID'], (1, 1, 1, 1))
+        self.assertEqual(table.notnone()['ID'], (True, True, False, False))
+
     def test_melt(self):
         new_table = concat(self.table, MappedSequence(range(len(self.table)), name='ID'), axis=1)
         new_table = new_table.melt('ID')
         self.assertEqual(new_table.columns, ('ID', 'variable', 'value'))
         self.assertEqual(new_table.shape, (len(self.table)*len(self.table.columns), 3))
+        self.assertEqual(new_table[0, :], (0, 'sepal length (cm)', 5.1))
+        self.assertEqual(new_table[len(self.table), :], (0, 'sepal width (cm)', 3.5))
+
+    def test_drop_duplicates(self):
+        column = 'petal width (cm)'
+        table = self.table[[column]]
+        result = table.drop_duplicates()
+        self.assertEqual(result[column], table[column].unique())
+        self.assertEqual(result.index[0], 0)
+        self.assertEqual(len(result) + sum(table.duplicated()), len(table))
+        last = table.drop_duplicates(keep='last')
+        self.assertEqual(len(last), len(result))
+        self.assertEqual(last.index[-1], len(table) - 1)
+
+    def test_value_counts(self):
+        column = 'petal width (cm)'
+        result = self.table.value_counts(column)
+        self.assertEqual(result.columns, (column, 'count'))
+        self.assertEqual(sum(result['count']), len(self.table))
+        self.assertEqual(result['count'][0], max(result['count']))
+        result = self.table.value_counts([column, 'petal length (cm)'], normalize=True)
+        self.assertAlmostEqual(sum(result['proportion']), 1.)
+
+    def test_fingerprint(self):
+        other = MappedTable.from_excel('../iris.xlsx')
+        self.assertEqual(self.table, other)
+        # equality does not compute the digests, which cost more than comparing the values
+        self.assertNotIn('_digest', self.table.values['petal width (cm)'].cache_info())
+        self.assertEqual(self.table.fingerprint(), other.fingerprint())
+        # projections reuse the digests of their columns
+        projection = self.table[['sepal length (cm)', 'petal width (cm)']]
+        self.assertIn('_digest', projection.values['petal width (cm)'].cache_info())
+        self.assertNotEqual(projection.fingerprint(), self.table.fingerprint())
+        self.assertNotEqual(self.table, self.table.sort_values('sepal length (cm)'))
+        self.assertNotEqual(self.table, self.table[:10])
+        # hash(-1) == hash(-2), digests differ
+        self.assertNotEqual(MappedTable([[-1]], columns=['a']).fingerprint(),
+                            MappedTable([[-2]], columns=['a']).fingerprint())
+
+    def test_fingerprint_stable(self):
+        # string hashes are salted per process, fingerprints should not be
+        values = "[['a', 1, 2.5], ['b', -1, None]]"
+        code = "from table import MappedTable; print(MappedTable({}, columns=['x', 'y', 'z']).fingerprint())"
+        code = code.format(values)
+        outputs = set()
+        for seed in ('1', '2'):
+            env = dict(os.environ, PYTHONHASHSEED=seed)
+            outputs.add(subprocess.run([sys.executable, '-c', code], stdout=subprocess.PIPE, universal_newlines=True,
+                                       check=True, cwd=bench.ROOT, env=env).stdout)
+        fingerprint = MappedTable([['a', 1, 2.5], ['b', -1, None]], columns=['x', 'y', 'z']).fingerprint()
+        self.assertEqual(outputs, {'{}\n'.format(fingerprint)})
 
 
 class TestMappedTable2(unittest.TestCase):
@@ -90,3 +179,156 @@ class TestMappedTable2(unittest.TestCase):
 
     def test_get_attr(self):
         self.assertIsInstance(self.table.experiment_1, MappedSequence)
+
+
+class TestMappedTable3(unittest.TestCase):
+    def setUp(self) -> None:
+        self.table = MappedTable.from_excel('../gapminder.xlsx')
+
+    def test_pivot(self):
+        result = self.table.pivot('continent', 'year', 'lifeExp')
+        self.assertEqual(result.shape, (5, 13))
+        self.assertEqual(result.columns[:2], ('continent', 1952))
+
+    def test_filter(self):
+        result = self.table.filter([('year', '>', 2000), ('continent', '==', 'Asia')])
+        self.assertEqual(result, self.table.where(lambda row: row['year'] > 2000 and row['continent'] == 'Asia'))
+        self.assertEqual(len(self.table.filter([('year', '>', 2010)])), 0)
+        self.assertEqual(len(self.table.filter([('year', '>=', 1952)])), len(self.table))
+        description = self.table.describe()
+        self.assertEqual(description.index, self.table.columns)
+        self.assertEqual(description['year', 'min'], 1952)
+        self.assertEqual(description['continent', 'distinct'], 5)
+
+    def test_dtypes(self):
+        self.assertEqual(self.table.dtypes['year'], 'int')
+        self.assertEqual(self.table.dtypes['country'], 'str')
+        table = MappedTable(self.table.row_values[:3], columns=self.table.columns, schema={'continent': 'category'})
+        self.assertEqual(table.dtypes['continent'], 'category')
+        self.assertEqual(table.sort_values('year').dtypes['continent'], 'category')
+        self.assertNotEqual(table, self.table[:3])
+        with self.assertRaises(TypeError):
+            self.table.pivot_table('continent', 'year', 'country')
+
+    def test_pivot_table(self):
+        result = self.table.pivot_table('continent', 'year', 'pop', agg_func='sum', margins=True)
+        self.assertEqual(result.shape, (6, 14))
+        self.assertEqual(result[-1, 'All'], sum(self.table['pop']))
+        result = self.table.pivot_table(['continent', 'country'], 'year', ['lifeExp', 'pop'], fill_value=0)
+        self.assertEqual(result.shape, (142, 2 + 2 * 12))
+        self.assertIn(('pop', 2007), result.columns)
+
+    def test_repr(self):
+        text = str(self.table)
+        self.assertEqual(len(text.splitlines()), 14)
+        self.assertIn('[1704 rows x 8 columns]', text)
+        html = self.table._repr_html_()
+        self.assertEqual(html.count('<tr>'), 12)
+        self.assertIn('<tr><td><b>0</b></td><td>Afghanistan</td>', html)
+        with self.assertRaises(TypeError):
+            TableFormatter()
+        # rendering reads the stored rows without building the columns
+        self.assertIsNone(self.table._column_values)
+
+    def test_memory_usage(self):
+        usage = self.table.memory_usage()
+        self.assertEqual(usage.columns, ('values', 'keys', 'cache', 'total'))
+        self.assertEqual(usage.index[-3:], ('<index>', '<columns>', '<rows>'))
+        # the fields of the rows are attributed to the columns when only the rows are stored
+        self.assertIsNone(self.table._column_values)
+        self.assertTrue(all([usage['values'][col] > 0 for col in self.table.columns]))
+        self.assertEqual(self.table.memory_usage(deep=False)['values']['pop'], len(self.table) * 8)
+        # repeated strings are interned when read
+        country = self.table['country']
+        self.assertIs(country[0], country[1])
+
+        self.table.column_values
+        self.assertEqual(len(self.table.memory_usage()), 11)
+        total = sum(self.table.memory_usage()['total'])
+        self.table.compact()
+        self.assertIsNone(self.table._row_values)
+        self.assertLess(sum(self.table.memory_usage()['total']), total)
+        self.assertEqual(len(self.table.memory_usage()), 10)
+
+
+class TestSortedness(unittest.TestCase):
+    def setUp(self) -> None:
+        self.table = MappedTable([(3, 'c'), (1, 'a'), (2, 'b'), (4, 'd')], columns=['time', 'value'])
+
+    def test_sorted_by(self):
+        self.assertIsNone(self.table.sorted_by)
+        result = self.table.sort_values('time')
+        self.assertEqual(result.sorted_by, (('time',), True))
+        self.assertIs(result.sort_values('time'), result)
+        by_both = self.table.sort_values(['time', 'value'])
+        self.assertIs(by_both.sort_values('time'), by_both)
+        self.assertIsNot(result.sort_values('time', ascending=False), result)
+        # propagation
+        self.assertEqual(result[1:].sorted_by, (('time',), True))
+        self.assertIsNone(result[::-1].sorted_by)
+        self.assertEqual(result[['value', 'time']].sorted_by, (('time',), True))
+        self.assertIsNone(result[['value']].sorted_by)
+        self.assertEqual(result.where(lambda row: row['time'] > 1).sorted_by, (('time',), True))
+        self.assertEqual(concat(result[:2], result[2:]).sorted_by, (('time',), True))
+        self.assertIsNone(concat(result[2:], result[:2]).sorted_by)
+        # sorted columns are detected without metadata
+        sorted_table = MappedTable([(1, 'b'), (2, 'a')], columns=['time', 'value'])
+        self.assertIs(sorted_table.sort_values('time'), sorted_table)
+
+    def test_merge_asof(self):
+        quotes = MappedTable([(1, 10.), (3, 30.), (5, 50.)], columns=['time', 'price'])
+        result = merge_asof(self.table, quotes, on='time')
+        self.assertEqual(result.columns, ('time', 'value', 'price'))
+        self.assertEqual(result['time'], (1, 2, 3, 4))
+        self.assertEqual(result['price'], (10., 10., 30., 30.))
+        self.assertEqual(merge_asof(self.table, quotes, on='time', direction='forward')['price'],
+                         (10., 30., 30., 50.))
+        self.assertEqual(merge_asof(self.table, quotes, on='time', direction='nearest')['price'],
+                         (10., 10., 30., 30.))
+        self.assertEqual(merge_asof(self.table, quotes, on='time', allow_exact_matches=False)['price'],
+                         (None, 10., 10., 30.))
+        self.assertEqual(merge_asof(self.table, quotes, on='time', direction='forward', tolerance=0)['price'],
+                         (10., None, 30., None))
+        quotes = MappedTable([(2, 20.)], columns=['at', 'price'])
+        result = merge_asof(self.table, quotes, left_on='time', right_on='at')
+        self.assertEqual(result.columns, ('time', 'at', 'value', 'price'))
+        self.assertEqual(result['at'], (None, 2, 2, 2))
+
+
+class TestExpressions(unittest.TestCase):
+    def setUp(self) -> None:
+        self.table = MappedTable([(1, 2.5, 'a'), (2, None, 'b'), (3, 0.5, 'c')], columns=['a', 'b', 'c d'])
+
+    def test_eval(self):
+        self.assertEqual(self.table.eval('a * 2 + b'), (4.5, None, 6.5))
+        self.assertEqual(self.table.eval('`c d` + str(a)'), ('a1', 'b2', 'c3'))
+        self.assertEqual(self.table.eval('max(a, 2) if a > 1 else -a'), (-1, 2, 3))
+        self.assertEqual(self.table.eval('1'), (1, 1, 1))
+        with self.assertRaises(KeyError):
+            self.table.eval('e + 1')
+        with self.assertRaises(ValueError):
+            self.table.eval('a.real')
+        with self.assertRaises(ValueError):
+            self.table.eval('__import__("os")')
+
+    def test_assign(self):
+        result = self.table.assign(e='a * 10', f=lambda table: table['e'], g=0, a=[3, 2, 1])
+        self.assertEqual(result.columns, ('a', 'b', 'c d', 'e', 'f', 'g'))
+        self.assertEqual(result['a'], (3, 2, 1))
+        self.assertEqual(result['f'], (10, 20, 30))
+        self.assertEqual(result['g'], (0, 0, 0))
+        self.assertEqual(self.table.sort_values('a').assign(a=[0, 0, 0]).sorted_by, None)
+
+    def test_apply(self):
+        self.assertEqual(self.table.apply(lambda column: column.null_count()), (0, 1, 0))
+        self.assertEqual(self.table[['a']].apply(lambda column: column.map(lambda x: -x))['a'], (-1, -2, -3))
+        self.assertEqual(self.table.apply(lambda row: row['c d'] * row['a'], axis=1), ('a', 'bb', 'ccc'))
+        batches = []
+
+        def double(batch):
+            batches.append(len(batch['a']))
+            return [value * 2 for value in batch['a']]
+
+        self.assertEqual(self.table.apply(double, axis=1, batch=True, chunksize=2), (2, 4, 6))
+        self.assertEqual(batches, [2, 1])
+        self.assertEqual(MappedSequence([1, 2, 3]).map(lambda chunk: [-x for x in chunk], batch=True), (-1, -2, -3))
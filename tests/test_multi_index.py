@@ -0,0 +1,82 @@
+import unittest
+from table import MappedTable, MappedSequence, MultiIndex
+
+
+class TestMultiIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self.table = MappedTable.from_excel('../gapminder.xlsx')
+        self.indexed = self.table.set_index(['continent', 'country', 'year'])[['lifeExp', 'pop']]
+
+    def test_levels(self):
+        index = MultiIndex([('a', 1), ('a', 2), ('b', 1)])
+        self.assertEqual(index.levels, (('a', 'b'), (1, 2)))
+        self.assertEqual(list(index.codes[1]), [0, 1, 0])
+        self.assertEqual(index.get_locs('a'), [0, 1])
+        self.assertEqual(index.get_locs(1, levels=(1,)), [0, 2])
+        with self.assertRaises(KeyError):
+            index.get_locs(('b', 2))
+        with self.assertRaises(KeyError):
+            index.get_locs(('a', 1, 'z'))
+
+    def test_sequence_partial_key(self):
+        sequence = MappedSequence([1, 2, 3, 4], keys=[('a', 'x'), ('a', 'y'), ('b', 'x'), ('b', 'y')])
+        self.assertEqual(sequence[('a', 'y')], 2)
+        self.assertEqual(sequence['a'].keys(), ('x', 'y'))
+        self.assertEqual(sequence.xs('x', level=1), (1, 3))
+        with self.assertRaises(KeyError):
+            sequence[('a', 'x', 'z')]
+        self.assertIs(MappedSequence([1, 2]).multi_index(), None)
+
+    def test_partial_columns(self):
+        table = MappedTable([(1, 2, 3), (4, 5, 6)], columns=[('2020', 'a'), ('2020', 'b'), ('2021', 'a')])
+        self.assertEqual(table['2020'].columns, ('a', 'b'))
+        self.assertEqual(table['2020']['b'], (2, 5))
+        self.assertEqual(table.xs('a', axis=1, level=1).columns, ('2020', '2021'))
+        with self.assertRaises(KeyError):
+            table['2022']
+        with self.assertRaises(KeyError):
+            table[('2020', 'a', 'z')]
+        # integers remain positions of the columns
+        self.assertEqual(table[0], (1, 4))
+        self.assertEqual(table[-1].name, ('2021', 'a'))
+        # pivot tables with several values have columns (value, column)
+        pivot = self.table.pivot_table('continent', 'year', ['lifeExp', 'pop'])
+        self.assertEqual(pivot['pop'].columns, tuple(sorted(set(self.table['year']))))
+        self.assertEqual(pivot['continent'], ('Africa', 'Americas', 'Asia', 'Europe', 'Oceania'))
+
+    def test_set_index(self):
+        self.assertEqual(self.indexed.index.name, ('continent', 'country', 'year'))
+        self.assertEqual(self.indexed.index[0], ('Asia', 'Afghanistan', 1952))
+        asia = self.indexed.xs('Asia')
+        self.assertEqual(len(asia), len(self.table.where(continent='Asia')))
+        self.assertEqual(asia.index.name, ('country', 'year'))
+        self.assertEqual(self.indexed.xs(2007, level='year').index.name, ('continent', 'country'))
+        self.assertEqual(self.indexed.reset_index().columns, ('continent', 'country', 'year', 'lifeExp', 'pop'))
+        self.assertEqual(self.indexed.reset_index()[['country', 'lifeExp']], self.table[['country', 'lifeExp']])
+
+    def test_stack_unstack(self):
+        unstacked = self.indexed.unstack('year')
+        self.assertEqual(unstacked.shape, (142, 24))
+        self.assertEqual(unstacked.columns.name, (None, 'year'))
+        self.assertEqual(unstacked.index.name, ('continent', 'country'))
+        self.assertEqual(unstacked.xs('Asia')['lifeExp'].shape, (33, 12))
+        self.assertEqual(unstacked.stack('year'), self.indexed)
+        # missing combinations are filled, and dropped when stacking
+        partial = self.indexed[:-1].unstack('year', fill_value=0)
+        self.assertEqual(partial[-1, ('pop', 2007)], 0)
+        self.assertEqual(len(self.indexed[:-1].unstack('year').stack('year')), len(self.indexed) - 1)
+        with self.assertRaises(ValueError):
+            self.table.set_index(['continent', 'year']).unstack()
+
+    def test_groupby(self):
+        result = self.table.groupby('continent').agg({'lifeExp': 'mean', 'pop': ['sum', 'max']})
+        self.assertEqual(result.columns, ('lifeExp', ('pop', 'sum'), ('pop', 'max')))
+        self.assertEqual(result.index, ('Africa', 'Americas', 'Asia', 'Europe', 'Oceania'))
+        self.assertEqual(result['Asia', ('pop', 'sum')], sum(self.table.where(continent='Asia')['pop']))
+        by_level = self.indexed.groupby(level='continent').sum()
+        self.assertEqual(by_level['pop'], result.column_values[('pop', 'sum')])
+        self.assertEqual(self.indexed.groupby(level=[0, 2]).size()[('Asia', 2007)], 33)
+        means = self.table[['continent', 'year', 'pop']].groupby(['continent', 'year']).mean()
+        self.assertEqual(means.index.name, ('continent', 'year'))
+        key, group = next(iter(self.table.groupby('continent', sort=False)))
+        self.assertEqual((key, len(group)), ('Asia', 396))
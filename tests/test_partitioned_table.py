@@ -0,0 +1,117 @@
+import gc
+import os
+import unittest
+from unittest import mock
+from table import MappedTable, MappedSequence, PartitionedTable, concat, merge
+from table.partitioned import Chunk
+
+
+class TestPartitionedTable(unittest.TestCase):
+    def setUp(self) -> None:
+        self.table = concat(MappedTable.from_excel('../iris.xlsx'),
+                            MappedSequence(range(150), name='ID'), axis=1)
+        # budget of two chunks of 20 rows, so that most chunks are spilled
+        self.partitioned = PartitionedTable.from_table(self.table, chunksize=20, memory_budget=200)
+
+    def test_spill(self):
+        self.assertEqual(len(self.partitioned), 150)
+        self.assertEqual(len(self.partitioned.chunks), 8)
+        self.assertTrue(self.partitioned.chunks[0].spilled)
+        self.assertFalse(self.partitioned.chunks[-1].spilled)
+        self.assertEqual(self.partitioned.to_table(), self.table)
+
+    def test_spill_dir_removed(self):
+        directory = self.partitioned.spill_dir
+        derived = self.partitioned.where(lambda row: row['ID'] > 10)
+        del self.partitioned
+        gc.collect()
+        # the spilled chunks of the derived table still live in the directory
+        self.assertTrue(os.path.isdir(directory))
+        self.assertEqual(len(derived), 139)
+        del derived
+        gc.collect()
+        self.assertFalse(os.path.exists(directory))
+
+    def test_where(self):
+        result = self.partitioned.where(lambda row: row['ID'] % 2 == 0)
+        self.assertEqual(result.to_table(), self.table.where(lambda row: row['ID'] % 2 == 0))
+        result = self.partitioned[['ID', 'sepal length (cm)']]
+        self.assertEqual(result.columns, ('ID', 'sepal length (cm)'))
+
+    def test_melt(self):
+        result = self.partitioned.melt('ID')
+        self.assertEqual(result.shape, (150 * 4, 3))
+
+    def test_aggregate(self):
+        self.assertEqual(self.partitioned.max(['ID'])['ID'], 149)
+        self.assertEqual(self.partitioned.count()['ID'], 150)
+        self.assertAlmostEqual(self.partitioned.mean(['ID'])['ID'], 74.5)
+
+    def test_concat(self):
+        result = self.partitioned.concat(self.partitioned)
+        self.assertEqual(len(result), 300)
+
+    def test_sort(self):
+        result = self.partitioned.sort_values('sepal length (cm)', ascending=False, chunksize=50)
+        self.assertEqual(result.to_table(), self.table.sort_values('sepal length (cm)', ascending=False))
+
+    def test_sort_none(self):
+        table = MappedTable(values=[[3, None, 1, None, 2, 5, None, 4]], columns=['x'], axis=1)
+        partitioned = PartitionedTable.from_table(table, chunksize=3, memory_budget=3)
+        for ascending in (True, False):
+            result = partitioned.sort_values('x', ascending=ascending, chunksize=3)
+            self.assertEqual(result.to_table()['x'].values(), table.sort_values('x', ascending=ascending)['x'].values())
+
+    def test_merge(self):
+        left = self.partitioned[['ID', 'sepal length (cm)']]
+        right = PartitionedTable.from_table(self.table[10:, ['ID', 'sepal width (cm)']], chunksize=20,
+                                            memory_budget=200)
+        self.assertEqual(left.merge(right, on='ID', how='inner').shape, (140, 3))
+        self.assertEqual(left.merge(right, on='ID', how='left').shape, (150, 3))
+        self.assertEqual(right.merge(left, on='ID', how='right').shape, (150, 3))
+        result = left.merge(right, on='ID', how='inner').sort_values('ID').to_table()
+        expected = merge(self.table[['ID', 'sepal length (cm)']], self.table[10:, ['ID', 'sepal width (cm)']],
+                         on='ID', how='inner')
+        self.assertEqual(result.values, expected.values)
+
+    def test_filter(self):
+        loads = []
+        load = Chunk.load
+
+        def counting_load(chunk):
+            loads.append(chunk)
+            return load(chunk)
+
+        self.partitioned.describe()
+        with mock.patch.object(Chunk, 'load', counting_load):
+            result = self.partitioned.filter([('ID', '>=', 130), ('sepal length (cm)', '>', 0)])
+        # only the last two chunks hold IDs from 130
+        self.assertEqual(len(loads), 2)
+        self.assertEqual(result.to_table(), self.table.filter([('ID', '>=', 130)]))
+        self.assertEqual(len(self.partitioned.where(ID=3)), 1)
+
+    def test_describe(self):
+        result = self.partitioned.describe()
+        self.assertEqual(result.shape, (8 * 5, 9))
+        ids = result.where(column='ID')
+        self.assertEqual(ids['min'], tuple(range(0, 150, 20)))
+        self.assertTrue(all(ids['increasing']))
+
+    def test_merge_pruning(self):
+        left = self.partitioned[['ID', 'sepal length (cm)']]
+        right = PartitionedTable.from_table(self.table[:30, ['ID', 'sepal width (cm)']], chunksize=20)
+        left.describe()
+        loads = []
+        load = Chunk.load
+
+        def counting_load(chunk):
+            if chunk in left.chunks:
+                loads.append(chunk)
+            return load(chunk)
+
+        with mock.patch.object(Chunk, 'load', counting_load):
+            self.assertEqual(left.merge(right, on='ID', how='inner').shape, (30, 3))
+        # the chunks of IDs 0-19 and 20-39 are the only ones in the range of right
+        self.assertEqual(len(loads), 2)
+        self.assertEqual(left.merge(right, on='ID', how='left').shape, (150, 3))
+        self.assertEqual(right.merge(left, on='ID', how='right').shape, (150, 3))
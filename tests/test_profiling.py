@@ -0,0 +1,40 @@
+import unittest
+import table
+from table import MappedTable, profiling
+
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self) -> None:
+        self.table = MappedTable.from_excel('../gapminder.xlsx')
+
+    def test_profile(self):
+        with table.profile(trace_memory=True) as p:
+            self.table.pivot('continent', 'year', 'lifeExp')
+            self.table.where(continent='Asia')
+        self.assertFalse(profiling.ENABLED)
+        operations = [record.operation for record in p.records]
+        self.assertEqual(operations, ['MappedTable.pivot_table', 'MappedTable.pivot', 'MappedTable.where'])
+        pivot = p.records[1]
+        self.assertEqual(pivot.depth, 0)
+        self.assertEqual(pivot.rows_in, 1704)
+        self.assertEqual(pivot.rows_out, 5)
+        # the table was read by rows, pivot reads it by columns
+        self.assertEqual(pivot.transposes, 1)
+        self.assertIsNotNone(pivot.bytes_allocated)
+
+        summary = p.summary()
+        self.assertEqual(summary.shape, (3, 9))
+        self.assertEqual(p.to_table().shape, (3, 9))
+
+    def test_hook(self):
+        records = []
+        profiling.add_hook(records.append)
+        try:
+            self.table.where(year=2007)
+            # accessors are not instrumented
+            self.table['year']
+        finally:
+            profiling.remove_hook(records.append)
+        self.table.where(year=2007)
+        self.assertEqual(len(records), 1)
+        self.assertIsNone(records[0].bytes_allocated)
@@ -0,0 +1,114 @@
+import asyncio
+import os
+import re
+import shutil
+import tempfile
+import unittest
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from openpyxl import Workbook
+from table import MappedTable, read_excel, read_excel_many, aread_excel
+
+
+class TestReadExcel(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.directory = tempfile.mkdtemp()
+        cls.path = os.path.join(cls.directory, 'sheets.xlsx')
+        workbook = Workbook()
+        workbook.active.title = 'first'
+        workbook.active.append(('a', 'b'))
+        workbook.active.append((0, 1))
+        second = workbook.create_sheet('second')
+        second.append(('c',))
+        second.append((2,))
+        second.append((3,))
+        workbook.save(cls.path)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(cls.directory)
+
+    def test_sheets(self):
+        self.assertEqual(read_excel(self.path).columns, ('a', 'b'))
+        self.assertEqual(read_excel(self.path, sheetname='second').shape, (2, 1))
+        tables = read_excel(self.path, sheetname=None)
+        self.assertEqual(list(tables), ['first', 'second'])
+        self.assertEqual(tables['second']['c'], (2, 3))
+        tables = read_excel(self.path, sheetname=[1])
+        self.assertEqual(tables[1].columns, ('c',))
+
+    def test_multi_header(self):
+        table = read_excel(self.path, header=[0, 1])
+        self.assertEqual(table.columns, (('a', 0), ('b', 1)))
+        self.assertEqual(len(table), 0)
+
+    def test_short_rows(self):
+        # sheets written without their dimensions are read with the trailing empty cells of each row omitted
+        path = os.path.join(self.directory, 'short_rows.xlsx')
+        workbook = Workbook()
+        workbook.active.append(('a', 'b', None))
+        workbook.active.append(('x', 'y', 'z'))
+        workbook.active.append((1,))
+        workbook.active.append((2, 3, 4))
+        workbook.save(path)
+        with zipfile.ZipFile(path) as archive:
+            contents = {name: archive.read(name) for name in archive.namelist()}
+        sheet = 'xl/worksheets/sheet1.xml'
+        contents[sheet] = re.sub(rb'<dimension[^>]*/>', b'', contents[sheet])
+        with zipfile.ZipFile(path, 'w') as archive:
+            for name, content in contents.items():
+                archive.writestr(name, content)
+
+        table = read_excel(path)
+        self.assertEqual(table.columns, ('a', 'b', None))
+        self.assertEqual(table.row_values[0].values(), ('x', 'y', 'z'))
+        self.assertEqual(table.row_values[1].values(), (1, None, None))
+        table = read_excel(path, header=[0, 1])
+        self.assertEqual(table.columns, (('a', 'x'), ('b', 'y'), (None, 'z')))
+        self.assertEqual(table.shape, (2, 3))
+
+    def test_read_many(self):
+        paths = [self.path, '../iris.xlsx']
+        with ThreadPoolExecutor(2) as executor:
+            tables = read_excel_many(paths, executor=executor, sheetname=None)
+        self.assertEqual(list(tables), paths)
+        self.assertEqual(tables['../iris.xlsx']['Sheet1'], MappedTable.from_excel('../iris.xlsx'))
+        tables = read_excel_many(paths, max_workers=2)
+        self.assertEqual(tables[self.path].shape, (1, 2))
+
+    def test_async(self):
+        table = asyncio.run(aread_excel('../iris.xlsx'))
+        self.assertEqual(table.shape, (150, 4))
+
+    def test_parse_cache(self):
+        cache_dir = os.path.join(self.directory, 'cache')
+        table = read_excel('../iris.xlsx', cache_dir=cache_dir)
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+        self.assertEqual(read_excel('../iris.xlsx', cache_dir=cache_dir), table)
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+        tables = read_excel(self.path, sheetname=None, cache_dir=cache_dir)
+        self.assertEqual(read_excel(self.path, sheetname=None, cache_dir=cache_dir)['second']['c'], (2, 3))
+        self.assertEqual(list(tables), ['first', 'second'])
+        self.assertEqual(len(os.listdir(cache_dir)), 2)
+
+        # the least recently used entry is evicted
+        read_excel(self.path, header=[0, 1], cache_dir=cache_dir, cache_max_size=2 * 1024)
+        self.assertEqual(len(os.listdir(cache_dir)), 2)
+
+    def test_parse_cache_corrupted(self):
+        cache_dir = os.path.join(self.directory, 'corrupted')
+        table = read_excel('../iris.xlsx', cache_dir=cache_dir)
+        entry = os.path.join(cache_dir, os.listdir(cache_dir)[0])
+        with open(entry, 'rb') as file:
+            data = file.read()
+        # truncated entry, then a flipped bit in the middle of the entry, then a flipped bit in the checksum
+        for corrupted in (data[:len(data) // 2], data[:len(data) // 2] + bytes([data[len(data) // 2] ^ 1]) +
+                          data[len(data) // 2 + 1:], data[:-1] + bytes([data[-1] ^ 1])):
+            with open(entry, 'wb') as file:
+                file.write(corrupted)
+            self.assertEqual(read_excel('../iris.xlsx', cache_dir=cache_dir), table)
+            # the entry is written again
+            with open(entry, 'rb') as file:
+                self.assertEqual(file.read(), data)
@@ -0,0 +1,41 @@
+import unittest
+from table import MappedTable, TableBuilder
+
+
+class TestTableBuilder(unittest.TestCase):
+    def setUp(self) -> None:
+        self.table = MappedTable.from_excel('../iris.xlsx')
+
+    def test_append_row(self):
+        builder = TableBuilder(columns=['a', 'b'])
+        builder.append_row((0, 1))
+        builder.append_row({'b': 3})
+        builder.append_rows([(4, 5), (6, 7)])
+        self.assertEqual(len(builder), 4)
+        result = builder.freeze()
+        self.assertEqual(result.shape, (4, 2))
+        self.assertEqual(result['a'], (0, None, 4, 6))
+        self.assertEqual(len(builder), 0)
+
+    def test_schema(self):
+        builder = TableBuilder(columns=['a', 'b'], converters={'a': int})
+        builder.append_rows([('1', 'x'), (None, 'y')])
+        self.assertEqual(builder.freeze()['a'], (1, None))
+
+    def test_append_table(self):
+        builder = TableBuilder(columns=self.table.columns)
+        builder.append_table(self.table[0:30])
+        builder.append_table(self.table[30:])
+        self.assertEqual(builder.freeze(), self.table)
+
+    def test_flush(self):
+        chunks = []
+        builder = TableBuilder(columns=['a'], chunksize=10, sink=chunks.append)
+        builder.append_rows([(i,) for i in range(25)])
+        builder.flush()
+        self.assertEqual([len(chunk) for chunk in chunks], [10, 10, 5])
+        self.assertEqual(chunks[1].index, tuple(range(10, 20)))
+        builder.append_row((0,))
+        builder.append_table(MappedTable([(i,) for i in range(25)], columns=['a']))
+        builder.flush()
+        self.assertEqual([len(chunk) for chunk in chunks[3:]], [10, 10, 6])
@@ -0,0 +1,59 @@
+import unittest
+from table import MappedTable, TableBuilder
+from table.aggregation import Accumulator, get_accumulator, get_aggregation
+
+
+class TestViews(unittest.TestCase):
+    def setUp(self) -> None:
+        self.table = MappedTable.from_excel('../gapminder.xlsx')
+        self.head, self.tail = self.table[:852], self.table[852:]
+
+    def assertTablesAlmostEqual(self, first: MappedTable, second: MappedTable):
+        self.assertEqual(first.columns, second.columns)
+        self.assertEqual(first.index, second.index)
+        for column in second.columns:
+            for value, expected in zip(first.column_values[column], second.column_values[column]):
+                if isinstance(expected, float):
+                    self.assertAlmostEqual(value, expected, places=6)
+                else:
+                    self.assertEqual(value, expected)
+
+    def test_accumulators(self):
+        values = [3, None, 1.5, 4, 1, 5.5, 9, 2]
+        for name in ('sum', 'count', 'mean', 'std', 'min', 'max', 'median'):
+            accumulator = get_accumulator(name)()
+            for start in range(0, len(values), 3):
+                accumulator.update(values[start:start + 3])
+            self.assertAlmostEqual(accumulator.result(), get_aggregation(name)(values))
+        self.assertIsNone(get_accumulator('std')().result())
+        with self.assertRaises(TypeError):
+            get_accumulator('sum', 'str')
+        # accumulators should implement update and result
+        with self.assertRaises(TypeError):
+            Accumulator()
+
+    def test_materialize(self):
+        spec = {'lifeExp': ['mean', 'std', 'median'], 'pop': ['sum', 'max', 'count']}
+        view = self.head.groupby('continent').materialize(spec)
+        builder = TableBuilder(self.table.columns, chunksize=100, sink=view.append)
+        builder.append_table(self.tail)
+        builder.flush()
+        self.assertTablesAlmostEqual(view.table, self.table.groupby('continent').agg(spec))
+        with self.assertRaises(AssertionError):
+            view.append(self.tail[['pop']])
+
+        indexed = self.table.set_index(['continent', 'year'])[['pop']]
+        view = indexed[:10].groupby(level='year').materialize('sum')
+        view.append(indexed[10:])
+        self.assertEqual(view.table, indexed.groupby(level='year').sum())
+
+    def test_incremental_pivot(self):
+        view = self.head.pivot('continent', 'year', 'lifeExp', incremental=True)
+        view.append(self.tail)
+        self.assertTablesAlmostEqual(view.table, self.table.pivot('continent', 'year', 'lifeExp'))
+        view = self.head.pivot_table('continent', 'year', ['pop', 'lifeExp'], agg_func='max', margins=True,
+                                     fill_value=0, incremental=True)
+        self.assertEqual(view.table.shape, (6, 1 + 2 * 13))
+        view.append(self.tail)
+        self.assertEqual(view.table, self.table.pivot_table('continent', 'year', ['pop', 'lifeExp'], agg_func='max',
+                                                            margins=True, fill_value=0))
@@ -0,0 +1,81 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import table
+from table import MappedTable, PartitionedTable, read_excel, read_csv, to_csv
+
+
+class TestWriters(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.table = MappedTable([(1, 'a', 0.5), (2, None, 1.5), (3, 'c', None)], columns=['x', 'y', 'z'])
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+
+    def test_to_csv(self):
+        self.assertEqual(self.table.to_csv(lineterminator='\n'), 'x,y,z\n1,a,0.5\n2,,1.5\n3,c,\n')
+        self.assertEqual(self.table.to_csv(index=True, header=False, lineterminator='\n').splitlines()[0],
+                         '0,1,a,0.5')
+        # rows stored table
+        self.assertIsNone(self.table._column_values)
+        buffer = io.StringIO()
+        self.table.to_csv(buffer, chunksize=2)
+        self.assertEqual(buffer.getvalue(), self.table.to_csv())
+        self.assertIsNone(self.table._column_values)
+
+    def test_to_csv_chunks(self):
+        path = os.path.join(self.directory, 'table.csv')
+        chunks = PartitionedTable.from_table(self.table, chunksize=2)
+        chunks.to_csv(path)
+        with open(path, newline='') as file:
+            self.assertEqual(file.read(), self.table.to_csv())
+        self.assertEqual(to_csv((self.table[['x']] for _ in range(2)), lineterminator='\n'), 'x\n1\n2\n3\n1\n2\n3\n')
+        with self.assertRaises(AssertionError):
+            to_csv([self.table, self.table[['x']]])
+
+    def test_to_excel(self):
+        path = os.path.join(self.directory, 'table.xlsx')
+        self.table.to_excel(path, sheetname='data')
+        self.assertEqual(read_excel(path, sheetname='data'), self.table)
+        PartitionedTable.from_table(self.table, chunksize=2).to_excel(path)
+        self.assertEqual(read_excel(path), self.table)
+
+    def test_multi_header(self):
+        table = MappedTable([(1, 2)], columns=[('a', 'x'), ('a', 'y')])
+        self.assertEqual(table.to_csv(lineterminator='\n'), 'a,a\nx,y\n1,2\n')
+
+    def test_read_csv(self):
+        path = os.path.join(self.directory, 'table.csv')
+        self.table.to_csv(path)
+        self.assertEqual(read_csv(path), self.table)
+        self.assertEqual(read_csv(path, convert=False)['x'].values(), ('1', '2', '3'))
+        self.assertEqual(read_csv(io.StringIO('1;2\n3;4\n'), header=None, delimiter=';').columns.values(), (0, 1))
+        self.assertEqual(read_csv(io.StringIO('a,b\n1\n')).row_values[0].values(), (1, None))
+        with self.assertRaisesRegex(ValueError, 'line 3 has 3 fields'):
+            read_csv(io.StringIO('a,b\n1,2\n3,4,5\n'))
+
+    def test_registry(self):
+        for extension in ('.csv', '.xlsx', '.stn'):
+            path = os.path.join(self.directory, 'table' + extension)
+            table.write(self.table, path)
+            self.assertEqual(table.read(path), self.table)
+        path = os.path.join(self.directory, 'table.db')
+        table.write(self.table, path, name='data')
+        table.write(self.table, path, name='data', if_exists='append')
+        self.assertEqual(table.read(path).row_values.values(), self.table.row_values.values() * 2)
+        self.assertEqual(len(table.read(path, query='SELECT * FROM data WHERE x > ?', parameters=(1,))), 4)
+        # repeated values are interned when read
+        query = "SELECT y || ' repeated' AS y FROM data"
+        values = table.read(path, query=query)['y']
+        self.assertIs(values[0], values[3])
+        values = table.read(path, query=query, intern=False)['y']
+        self.assertIsNot(values[0], values[3])
+        with self.assertRaises(ValueError):
+            table.read(os.path.join(self.directory, 'table.unknown'))
+        table.register_reader('text', read_csv, extensions=['.txt'])
+        path = os.path.join(self.directory, 'table.txt')
+        self.table.to_csv(path)
+        self.assertEqual(table.read(path), self.table)